@@ -26,6 +26,10 @@ __all__ = [
 
 logger = logging.getLogger(__name__)
 
+# Bytes of streamed parts that may wait for the client before
+# `wait_for_stream_capacity` blocks.
+DEFAULT_MAX_PENDING_STREAM_BYTES = 64 * 1024
+
 _fastapi_response_map = {
     ResponderErrorCodes.INVALID_REQUEST_ARGS: status.HTTP_400_BAD_REQUEST,
     ResponderErrorCodes.QUEUE_FULL: status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -34,6 +38,11 @@ _fastapi_response_map = {
 }
 
 
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
 class RequestStatusTracker(AbstractStatusTracker):
     def __init__(self, request: Request):
         super().__init__()
@@ -84,10 +93,18 @@ class FastAPIResponder(AbstractResponder):
         return await message.responder.response
     ```
 
+    Streamed parts are buffered until the client reads them. Producers can
+    await `wait_for_stream_capacity()` after each part so that they do not
+    run ahead of the client by more than `max_pending_stream_bytes`.
+
     See: examples/python/fastapi/server.py
     """
 
-    def __init__(self, request: Request):
+    def __init__(
+        self,
+        request: Request,
+        max_pending_stream_bytes: int = DEFAULT_MAX_PENDING_STREAM_BYTES,
+    ):
         super().__init__()
         self.request = request
         # Capture the running loop so that we can send responses back.
@@ -96,6 +113,15 @@ class FastAPIResponder(AbstractResponder):
         self.responded = False
         self._streaming_queue: asyncio.Queue | None = None
         self._status_tracker = RequestStatusTracker(request)
+        self._max_pending_stream_bytes = max_pending_stream_bytes
+        # Parts are produced on another loop than the one sending them, so the
+        # pending byte count and its waiters are guarded by a lock.
+        self._pending_lock = threading.Lock()
+        self._pending_stream_bytes = 0
+        self._stream_finished = False
+        self._capacity_waiters: list[
+            tuple[asyncio.AbstractEventLoop, asyncio.Future]
+        ] = []
 
     def close(self):
         self._status_tracker.close()
@@ -161,13 +187,20 @@ class FastAPIResponder(AbstractResponder):
         self._streaming_queue = asyncio.Queue()
 
         async def gen(request, streaming_queue):
-            while True:
-                if self._status_tracker.is_disconnected():
-                    break
-                part = await streaming_queue.get()
-                if part is None:
-                    break
-                yield part
+            try:
+                while True:
+                    if self._status_tracker.is_disconnected():
+                        break
+                    part = await streaming_queue.get()
+                    if part is None:
+                        break
+                    self._release_pending_bytes(len(part))
+                    yield part
+            finally:
+                # Nothing is read anymore, so producers must not wait for it.
+                with self._pending_lock:
+                    self._stream_finished = True
+                    self._notify_capacity_waiters()
 
         def start(request, streaming_queue, response_future):
             response = StreamingResponse(gen(request, streaming_queue), **kwargs)
@@ -185,6 +218,37 @@ class FastAPIResponder(AbstractResponder):
         assert self._streaming_queue is not None, "stream_start() not called"
         if self._loop.is_closed():
             raise IOError("Web server is shut down")
+        if content is not None:
+            with self._pending_lock:
+                self._pending_stream_bytes += len(content)
         self._loop.call_soon_threadsafe(self._streaming_queue.put_nowait, content)
         if content is None:
             self._streaming_queue = None
+
+    async def wait_for_stream_capacity(self):
+        """Waits until at most `max_pending_stream_bytes` streamed bytes are
+        left unread by the client, or the stream ended.
+
+        May be awaited from any loop.
+        """
+        with self._pending_lock:
+            if (
+                self._stream_finished
+                or self._pending_stream_bytes <= self._max_pending_stream_bytes
+            ):
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._capacity_waiters.append((loop, future))
+        await future
+
+    def _release_pending_bytes(self, num_bytes: int):
+        with self._pending_lock:
+            self._pending_stream_bytes -= num_bytes
+            if self._pending_stream_bytes <= self._max_pending_stream_bytes:
+                self._notify_capacity_waiters()
+
+    def _notify_capacity_waiters(self):
+        for loop, future in self._capacity_waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+        self._capacity_waiters = []
@@ -41,3 +41,8 @@ class AbstractResponder:
 
     def stream_part(self, content: bytes | None):
         pass
+
+    async def wait_for_stream_capacity(self):
+        """Waits until streamed parts the client has not read yet fit the
+        responder's buffer. Responders without a limit return immediately."""
+        pass
@@ -13,10 +13,7 @@ from typing import (
 )
 from fastapi.responses import JSONResponse
 
-from shortfin_apps.types.Base64CharacterEncodedByteSequence import (
-    Base64CharacterEncodedByteSequence,
-)
-from shortfin_apps.utilities.image import png_from
+from shortfin_apps.utilities.image import ImageFormat, validate_compression_level
 from shortfin_apps.text_to_image.TextToImageInferenceOutput import (
     TextToImageInferenceOutput,
 )
@@ -75,6 +72,7 @@ class ClientGenerateBatchProcess(sf.Process):
     * Tokenization
     * Random Latents Generation
     * Splitting the batch into GenerateImageProcesses
+    * Encoding the output images
     * Streaming responses
     * Final responses
     """
@@ -83,6 +81,9 @@ class ClientGenerateBatchProcess(sf.Process):
         "batcher",
         "complete_infeed",
         "gen_req",
+        "image_compression_level",
+        "image_encoder",
+        "image_format",
         "responder",
     ]
 
@@ -96,6 +97,18 @@ class ClientGenerateBatchProcess(sf.Process):
         self.gen_req = gen_req
         self.responder = responder
         self.batcher = service.batcher
+        self.image_encoder = service.image_encoder
+        self.image_format = (
+            ImageFormat(gen_req.image_format)
+            if gen_req.image_format is not None
+            else service.image_format
+        )
+        # The server's compression level is meant for the server's format.
+        self.image_compression_level = gen_req.image_compression_level
+        if self.image_compression_level is None:
+            if self.image_format == service.image_format:
+                self.image_compression_level = service.image_compression_level
+        validate_compression_level(self.image_format, self.image_compression_level)
         self.complete_infeed = self.system.create_queue()
 
     async def run(self):
@@ -113,21 +126,25 @@ class ClientGenerateBatchProcess(sf.Process):
             # TODO: stream image outputs
             logging.debug("Responding to one shot batch")
 
-            png_images: list[Base64CharacterEncodedByteSequence] = []
-
             for index_of_each_process, each_process in enumerate(gen_processes):
                 if each_process.output is None:
                     raise Exception(
                         f"Expected output for process {index_of_each_process} but got `None`"
                     )
 
-                each_png_image = png_from(each_process.output.image)
-                png_images.append(each_png_image)
+            # Encoding runs on the encoding pool, leaving the fiber to the
+            # next batch.
+            encoded_images = await self.image_encoder.encode(
+                [each_process.output.image for each_process in gen_processes],
+                self.image_format,
+                self.image_compression_level,
+            )
 
             self.responder.send_response(
                 JSONResponse(
                     content={
-                        "images": png_images,
+                        "images": encoded_images,
+                        "format": self.image_format.value,
                     },
                     media_type="application/json",
                 )
@@ -13,6 +13,7 @@ import logging
 from PIL.Image import Image
 import shortfin as sf
 import shortfin.array as sfnp
+import numpy as np
 
 from .io_struct import GenerateReqInput
 from ...utils import InferenceExecRequest
@@ -62,7 +63,7 @@ class FluxInferenceExecRequest(InferenceExecRequest):
         txt_ids: sfnp.device_array | None = None,
         timesteps: sfnp.device_array | None = None,
         denoised_latents: sfnp.device_array | None = None,
-        image_array: sfnp.device_array | None = None,
+        image_array: np.ndarray | None = None,
     ):
         super().__init__()
         self.print_debug = True
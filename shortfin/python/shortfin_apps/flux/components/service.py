@@ -7,17 +7,27 @@
 import asyncio
 import logging
 import math
+import time
 import torch
 import numpy as np
 from tqdm.auto import tqdm
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Optional
 from PIL import Image
 
 import shortfin as sf
 import shortfin.array as sfnp
 
-from ...utils import GenerateService, BatcherProcess
+from ...utils import (
+    GenerateService,
+    BatcherProcess,
+    BoardingPolicy,
+    StrobeMessage,
+    copy_device_array,
+    read_device_array,
+)
+from ...utilities.image import ImageEncodingPool, ImageFormat, to_uint8_images
+from ...utilities.prompt_cache import PromptEmbeddingCache
 
 from .config_struct import ModelParams
 from .manager import FluxSystemManager
@@ -75,6 +85,11 @@ class FluxGenerateService(GenerateService):
         prog_isolation: str = "per_fiber",
         show_progress: bool = False,
         trace_execution: bool = False,
+        boarding_deadline_s: Optional[float] = None,
+        image_format: ImageFormat = ImageFormat.PNG,
+        image_compression_level: Optional[int] = None,
+        image_encoding_workers: int = 4,
+        prompt_cache_bytes: int = 0,
     ):
         super().__init__(sysman, fibers_per_device, workers_per_device)
         self.name = name
@@ -83,11 +98,30 @@ class FluxGenerateService(GenerateService):
         self.model_params = model_params
         self.trace_execution = trace_execution
         self.show_progress = show_progress
+        # Embeddings of recent prompts, reused in place of encoding them.
+        self.prompt_cache = (
+            PromptEmbeddingCache(prompt_cache_bytes) if prompt_cache_bytes > 0 else None
+        )
+        self.prompt_fingerprint = (
+            model_params.clip_module_name,
+            model_params.clip_dtype.name,
+            model_params.clip_max_seq_len,
+            model_params.t5xxl_module_name,
+            model_params.t5xxl_dtype.name,
+            model_params.t5xxl_max_seq_len,
+            *(tokenizer.fingerprint for tokenizer in clip_tokenizers),
+            *(tokenizer.fingerprint for tokenizer in t5xxl_tokenizers),
+        )
 
         # Finish initialization
         self.set_isolation(prog_isolation)
         self.initialize_workers_and_fibers()
-        self.batcher = FluxBatcherProcess(self)
+        self.batcher = FluxBatcherProcess(self, boarding_deadline_s)
+        # Default encoding of the response images. Images are encoded on a
+        # thread pool, while the fibers run the next batch.
+        self.image_format = image_format
+        self.image_compression_level = image_compression_level
+        self.image_encoder = ImageEncodingPool(image_encoding_workers)
 
     def initialize_workers_and_fibers(self):
         self.workers = []
@@ -158,6 +192,21 @@ class FluxGenerateService(GenerateService):
         self.initialize_inference_functions()
         self.batcher.launch()
 
+    def shutdown(self):
+        super().shutdown()
+        self.image_encoder.shutdown()
+        if self.prompt_cache is not None:
+            stats = self.prompt_cache.get_stats()
+            logger.info(
+                "Prompt cache: %d hits, %d misses (%.1f%% hit rate), %d entries of %d bytes, %d evictions",
+                stats.hits,
+                stats.misses,
+                100 * stats.hit_rate,
+                stats.entries,
+                stats.bytes,
+                stats.evictions,
+            )
+
     def initialize_inference_functions(self):
         for worker_idx, worker in enumerate(self.workers):
             # Initialize clip functions
@@ -201,15 +250,41 @@ class FluxBatcherProcess(BatcherProcess):
     STROBE_SHORT_DELAY = 0.5
     STROBE_LONG_DELAY = 1
 
-    def __init__(self, service: FluxGenerateService):
+    def __init__(
+        self,
+        service: FluxGenerateService,
+        boarding_deadline_s: Optional[float] = None,
+    ):
         super().__init__(fiber=service.fibers[0])
         self.service = service
         self.ideal_batch_size: int = max(service.model_params.max_batch_size)
         self.num_fibers = len(service.fibers)
+        self.boarding_policy = None
+        if boarding_deadline_s is not None:
+            self.boarding_policy = BoardingPolicy(
+                ideal_batch_size=self.ideal_batch_size, max_delay_s=boarding_deadline_s
+            )
+        # Arrival time of each pending request, oldest first.
+        self._arrivals: dict[FluxInferenceExecRequest, float] = {}
 
     def handle_inference_request(self, request):
+        if self.boarding_policy is not None:
+            now = time.monotonic()
+            self.boarding_policy.record_arrival(now)
+            self._arrivals[request] = now
         self.pending_requests.add(request)
 
+    def _oldest_arrival(self) -> Optional[float]:
+        return next(iter(self._arrivals.values()), None)
+
+    def next_boarding_deadline(self) -> Optional[float]:
+        # Without an idle fiber, the batcher is woken up when one is released.
+        if not self.pending_requests or not self.service.idle_fibers:
+            return None
+        return self.boarding_policy.deadline(
+            len(self.pending_requests), self._oldest_arrival()
+        )
+
     async def process_batches(self):
         await self.board_flights()
 
@@ -217,7 +292,13 @@ class FluxBatcherProcess(BatcherProcess):
         waiting_count = len(self.pending_requests)
         if waiting_count == 0:
             return
-        if waiting_count < self.ideal_batch_size and self.strobes < 2:
+        if self.boarding_policy is not None:
+            if not self.boarding_policy.should_board(
+                waiting_count, self._oldest_arrival()
+            ):
+                logger.info("Waiting a bit longer to fill flight")
+                return
+        elif waiting_count < self.ideal_batch_size and self.strobes < 2:
             logger.info("Waiting a bit longer to fill flight")
             return
         self.strobes = 0
@@ -246,6 +327,7 @@ class FluxBatcherProcess(BatcherProcess):
         if exec_process.exec_requests:
             for flighted_request in exec_process.exec_requests:
                 self.pending_requests.remove(flighted_request)
+                self._arrivals.pop(flighted_request, None)
             exec_process.launch()
 
 
@@ -282,8 +364,12 @@ class InferenceExecutorProcess(sf.Process):
             if phases[InferencePhase.PREPARE]["required"]:
                 await self._prepare(device=device0, requests=self.exec_requests)
             if phases[InferencePhase.ENCODE]["required"]:
-                await self._clip(device=device0, requests=self.exec_requests)
-                await self._t5xxl(device=device0, requests=self.exec_requests)
+                # Requests whose prompt embeddings were cached skip encoding.
+                uncached = [req for req in self.exec_requests if req.txt is None]
+                if uncached:
+                    await self._clip(device=device0, requests=uncached)
+                    await self._t5xxl(device=device0, requests=uncached)
+                    await self._cache_prompt_embeds(device=device0, requests=uncached)
             if phases[InferencePhase.DENOISE]["required"]:
                 await self._denoise(device=device0, requests=self.exec_requests)
             if phases[InferencePhase.DECODE]["required"]:
@@ -296,6 +382,8 @@ class InferenceExecutorProcess(sf.Process):
                 req.done.set_success()
             if self.service.prog_isolation == sf.ProgramIsolation.PER_FIBER:
                 self.service.idle_fibers.add(self.fiber)
+                if self.service.batcher.boarding_policy is not None:
+                    self.service.batcher.submit(StrobeMessage())
 
         except Exception:
             logger.exception("Fatal error in image generation")
@@ -303,30 +391,61 @@ class InferenceExecutorProcess(sf.Process):
             for req in self.exec_requests:
                 req.done.set_success()
 
+    def _prompt_cache_key(self, device, request):
+        # Only the prompt is encoded, not the negative prompt.
+        return (device.raw_device.name, self.service.prompt_fingerprint, request.prompt)
+
+    async def _cache_prompt_embeds(self, device, requests):
+        if self.service.prompt_cache is None:
+            return
+        copies = {}
+        for request in requests:
+            key = self._prompt_cache_key(device, request)
+            if key not in copies:
+                copies[key] = (
+                    copy_device_array(request.vec, device),
+                    copy_device_array(request.txt, device),
+                )
+        await device
+        for key, embeddings in copies.items():
+            self.service.prompt_cache.put(key, embeddings)
+
+    def _tokenize(self, request):
+        # Tokenize prompts and negative prompts. We tokenize in bs1 for now and join later.
+        clip_input_ids_list = []
+        clip_neg_ids_list = []
+        for tokenizer in self.service.clip_tokenizers:
+            input_ids = tokenizer.encode(request.prompt)
+            clip_input_ids_list.append(input_ids)
+            neg_ids = tokenizer.encode(request.neg_prompt)
+            clip_neg_ids_list.append(neg_ids)
+        clip_ids_list = [*clip_input_ids_list, *clip_neg_ids_list]
+
+        request.clip_input_ids = clip_ids_list
+
+        t5xxl_input_ids_list = []
+        t5xxl_neg_ids_list = []
+        for tokenizer in self.service.t5xxl_tokenizers:
+            input_ids = tokenizer.encode(request.prompt)
+            t5xxl_input_ids_list.append(input_ids)
+            neg_ids = tokenizer.encode(request.neg_prompt)
+            t5xxl_neg_ids_list.append(neg_ids)
+        t5xxl_ids_list = [*t5xxl_input_ids_list, *t5xxl_neg_ids_list]
+
+        request.t5xxl_input_ids = t5xxl_ids_list
+
     async def _prepare(self, device, requests):
         for request in requests:
-            # Tokenize prompts and negative prompts. We tokenize in bs1 for now and join later.
-            clip_input_ids_list = []
-            clip_neg_ids_list = []
-            for tokenizer in self.service.clip_tokenizers:
-                input_ids = tokenizer.encode(request.prompt)
-                clip_input_ids_list.append(input_ids)
-                neg_ids = tokenizer.encode(request.neg_prompt)
-                clip_neg_ids_list.append(neg_ids)
-            clip_ids_list = [*clip_input_ids_list, *clip_neg_ids_list]
-
-            request.clip_input_ids = clip_ids_list
-
-            t5xxl_input_ids_list = []
-            t5xxl_neg_ids_list = []
-            for tokenizer in self.service.t5xxl_tokenizers:
-                input_ids = tokenizer.encode(request.prompt)
-                t5xxl_input_ids_list.append(input_ids)
-                neg_ids = tokenizer.encode(request.neg_prompt)
-                t5xxl_neg_ids_list.append(neg_ids)
-            t5xxl_ids_list = [*t5xxl_input_ids_list, *t5xxl_neg_ids_list]
-
-            request.t5xxl_input_ids = t5xxl_ids_list
+            cached = None
+            if self.service.prompt_cache is not None:
+                cached = self.service.prompt_cache.get(
+                    [self._prompt_cache_key(device, request)]
+                )
+            if cached is not None:
+                # Cached embeddings are shared and only read by the denoise phase.
+                ((request.vec, request.txt),) = cached
+            else:
+                self._tokenize(request)
 
             # Generate random sample latents.
             seed = request.seed
@@ -415,10 +534,6 @@ class InferenceExecutorProcess(sf.Process):
             cfg_mult = 1
             requests[i].vec = vec.view(slice(i, (i + 1)))
 
-        a = vec.for_transfer()
-        a.copy_from(vec)
-        await device
-
         return
 
     async def _t5xxl(self, device, requests):
@@ -693,45 +808,17 @@ class InferenceExecutorProcess(sf.Process):
         await device
         (image,) = await fn(latents, fiber=self.fiber)
         await device
-        images_shape = [
-            req_bs,
-            3,
-            requests[0].height,
-            requests[0].width,
-        ]
-        images_host = sfnp.device_array.for_host(
-            device, images_shape, self.service.model_params.vae_dtype
-        )
-        images_host.copy_from(image)
-        await device
+        images = await read_device_array(image, device)
         for idx, req in enumerate(requests):
-            req.image_array = images_host.view(idx)
+            req.image_array = images[idx]
         return
 
     async def _postprocess(self, device, requests):
-        # Process output images
-        for req in requests:
-            image_shape = [
-                3,
-                req.height,
-                req.width,
-            ]
-            out_shape = [req.height, req.width, 3]
-            images_planar = sfnp.device_array.for_host(
-                device, image_shape, self.service.model_params.vae_dtype
-            )
-            images_planar.copy_from(req.image_array)
-            await device
-            permuted = sfnp.device_array.for_host(
-                device, out_shape, self.service.model_params.vae_dtype
-            )
-            out = sfnp.device_array.for_host(device, out_shape, sfnp.uint8)
-            sfnp.transpose(images_planar, (1, 2, 0), out=permuted)
-            permuted = sfnp.multiply(127.5, (sfnp.add(permuted, 1.0)))
-            out = sfnp.round(permuted, dtype=sfnp.uint8)
-            out_bytes = bytes(out.map(read=True))
-            processed_image = Image.frombytes(
-                mode="RGB", size=out.shape[:2], data=out_bytes
-            )
-            req.response_image = processed_image
+        # Process output images. The pixels of the whole batch are converted
+        # at once; encoding is left to the service's encoding pool.
+        images = to_uint8_images(
+            np.stack([req.image_array for req in requests]), value_range=(-1.0, 1.0)
+        )
+        for req, image in zip(requests, images):
+            req.response_image = Image.fromarray(image)
         return
@@ -33,6 +33,11 @@ class Tokenizer:
             max_length = 77
         return Tokenizer(raw_tk, max_length=max_length)
 
+    @property
+    def fingerprint(self) -> tuple:
+        """Identifies the tokenizer and its settings, e.g. in cache keys."""
+        return (self._raw.name_or_path, len(self._raw), self.max_length)
+
     def encode(self, texts: list[str]):
         """Encodes a batch of texts, applying no padding."""
         return self._raw(
@@ -28,6 +28,7 @@ from .components.io_struct import GenerateReqInput
 from .components.manager import FluxSystemManager
 from .components.service import FluxGenerateService
 from .components.tokenizer import Tokenizer
+from ..utilities.image import ImageFormat, validate_compression_level
 
 
 logger = logging.getLogger("shortfin-flux")
@@ -146,6 +147,11 @@ def configure_service(args, sysman, model_config, flagfile, tuning_spec):
         prog_isolation=args.isolation,
         show_progress=args.show_progress,
         trace_execution=args.trace_execution,
+        boarding_deadline_s=args.batch_boarding_deadline_s,
+        image_format=ImageFormat(args.image_format),
+        image_compression_level=args.image_compression_level,
+        image_encoding_workers=args.image_encoding_workers,
+        prompt_cache_bytes=args.prompt_cache_mb * 2**20,
     )
     for key, vmfblist in vmfbs.items():
         for vmfb in vmfblist:
@@ -352,6 +358,37 @@ def main(argv, log_config=UVICORN_LOG_CONFIG):
         action="store_true",
         help="Enable tracing of program modules.",
     )
+    parser.add_argument(
+        "--batch_boarding_deadline_s",
+        type=float,
+        default=None,
+        help="Board batches when full or at most this many seconds after the oldest pending request, instead of on strobe timers.",
+    )
+    parser.add_argument(
+        "--prompt_cache_mb",
+        type=int,
+        default=128,
+        help="Device memory in MiB for caching the embeddings of recent prompts, per service. 0 disables the cache.",
+    )
+    parser.add_argument(
+        "--image_format",
+        type=str,
+        choices=[image_format.value for image_format in ImageFormat],
+        default=ImageFormat.PNG.value,
+        help="Default encoding of the output images. `fast_png` uses the fastest zlib level; `raw` returns the uint8 HWC pixels.",
+    )
+    parser.add_argument(
+        "--image_compression_level",
+        type=int,
+        default=None,
+        help="PNG zlib level (0-9) or JPEG/WebP quality (0-100) of output images in the default format.",
+    )
+    parser.add_argument(
+        "--image_encoding_workers",
+        type=int,
+        default=4,
+        help="Number of threads encoding output images.",
+    )
     parser.add_argument(
         "--amdgpu_async_allocations",
         action="store_true",
@@ -407,6 +444,12 @@ def main(argv, log_config=UVICORN_LOG_CONFIG):
         help="Use tunings for attention and matmul ops. 0 to disable.",
     )
     args = parser.parse_args(argv)
+    try:
+        validate_compression_level(
+            ImageFormat(args.image_format), args.image_compression_level
+        )
+    except ValueError as e:
+        parser.error(str(e))
     if not args.artifacts_dir:
         home = Path.home()
         artdir = home / ".cache" / "shark"
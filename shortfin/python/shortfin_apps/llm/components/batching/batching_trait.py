@@ -5,7 +5,10 @@
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
 from abc import ABC, abstractmethod
+from typing import Dict
+
 from ..config_struct import ModelParams
+from ..device_array_cache import ArgumentArenaStats
 
 
 # BatchingTrait is an interface that ensures that the batching
@@ -38,3 +41,8 @@ class BatchingTrait(ABC):
     @abstractmethod
     def get_model_params(self) -> ModelParams:
         pass
+
+    @abstractmethod
+    def get_argument_arena_stats(self) -> Dict[str, ArgumentArenaStats]:
+        """Argument arena counters of each batching lane."""
+        pass
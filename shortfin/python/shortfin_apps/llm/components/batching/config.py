@@ -21,10 +21,13 @@ from dataclasses import dataclass
 from typing import Optional
 
 from ..config_struct import ModelParams
+from .preemption import PreemptionPolicy
 
 
 class BatchMode(Enum):
     DEFAULT = "Default"
+    PIPELINED = "Pipelined"
+    CONTINUOUS = "Continuous"
 
 
 @dataclass(slots=True)
@@ -35,3 +38,7 @@ class BatchConfig:
     decode_functions: dict[int, sf.ProgramFunction]  # type: ignore
     prog_isolation: sf.ProgramIsolation  # type: ignore
     chunk_block_size: Optional[int] = None
+    token_budget: Optional[int] = None
+    boarding_deadline_s: Optional[float] = None
+    preemption_policy: Optional[PreemptionPolicy] = None
+    tenant_shares: Optional[dict[str, float]] = None
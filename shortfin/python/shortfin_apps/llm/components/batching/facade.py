@@ -10,12 +10,14 @@ Implements a unified facade to handle batching.
 
 import shortfin as sf
 
-from typing import Callable
+from typing import Callable, Dict, Optional
 
+from ..device_array_cache import ArgumentArenaStats
 from ..kvcache.base_attention_cache import BasePagedAttentionCache
-from ..messages import LlmInferenceExecRequest
+from ..messages import InferencePhase, LlmInferenceExecRequest
 from .factory import _BatchingEngineImpl, _create_impl
 from .config import BatchConfig
+from .preemption import PreemptionManager
 
 
 class BatchingFacade:
@@ -31,8 +33,14 @@ class BatchingFacade:
     def shutdown(self):
         self._impl.shutdown()
 
-    def reserve_workload(self, *, rid: str, count: int):
-        self._impl.reserve_workload(rid=rid, count=count)
+    def reserve_workload(
+        self,
+        *,
+        rid: str,
+        count: int,
+        phase: InferencePhase = InferencePhase.DECODE,
+    ):
+        self._impl.reserve_workload(rid=rid, count=count, phase=phase)
 
     def model_params(self):
         return self._impl.model_params()
@@ -40,6 +48,12 @@ class BatchingFacade:
     def get_page_cache(self) -> BasePagedAttentionCache:
         return self._impl.get_page_cache()
 
+    def get_preemption_manager(self) -> Optional[PreemptionManager]:
+        return self._impl.get_preemption_manager()
+
+    def get_argument_arena_stats(self) -> Dict[str, ArgumentArenaStats]:
+        return self._impl.get_argument_arena_stats()
+
     @staticmethod
     def build_batcher(
         batch_config: BatchConfig,
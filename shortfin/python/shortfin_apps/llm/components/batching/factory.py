@@ -12,24 +12,33 @@ are not leaked.
 
 import shortfin as sf
 
+from typing import Dict, Optional
+
 from .config import BatchConfig, BatchMode
+from ..device_array_cache import ArgumentArenaStats
 from ..kvcache.base_attention_cache import BasePagedAttentionCache
 from .batching_trait import BatchingTrait
+from .modes.continuous import ContinuousBatchingEngine
 from .modes.default import DefaultBatchingEngine
-from ..messages import LlmInferenceExecRequest
+from .modes.pipelined import PipelinedBatchingEngine
+from .preemption import PreemptionManager
+from ..messages import InferencePhase, LlmInferenceExecRequest
 
 
 class _BatchingEngineImpl:
     batching_engine: BatchingTrait
     page_cache: BasePagedAttentionCache
+    preemption_manager: Optional[PreemptionManager]
 
     def __init__(
         self,
         batching_engine: BatchingTrait,
         page_cache: BasePagedAttentionCache,
+        preemption_manager: Optional[PreemptionManager] = None,
     ):
         self.batching_engine = batching_engine
         self.page_cache = page_cache
+        self.preemption_manager = preemption_manager
 
     def launch(self):
         self.batching_engine.launch()
@@ -40,17 +49,33 @@ class _BatchingEngineImpl:
     def get_page_cache(self) -> BasePagedAttentionCache:
         return self.page_cache
 
+    def get_preemption_manager(self) -> Optional[PreemptionManager]:
+        return self.preemption_manager
+
     def submit(self, request: LlmInferenceExecRequest):
         self.batching_engine.submit(request)
 
-    def reserve_workload(self, *, rid: str, count: int):
-        self.batching_engine.reserve_workload(rid=rid, count=count)
+    def reserve_workload(
+        self,
+        *,
+        rid: str,
+        count: int,
+        phase: InferencePhase = InferencePhase.DECODE,
+    ):
+        self.batching_engine.reserve_workload(rid=rid, count=count, phase=phase)
 
     def model_params(self):
         return self.batching_engine.get_model_params()
 
+    def get_argument_arena_stats(self) -> Dict[str, ArgumentArenaStats]:
+        return self.batching_engine.get_argument_arena_stats()
+
 
 def _create_impl(batch_cfg: BatchConfig, page_cache: BasePagedAttentionCache, prefill_fiber: sf.Fiber, decode_fiber: sf.Fiber | None = None):  # type: ignore
+    preemption_manager = None
+    if batch_cfg.preemption_policy is not None:
+        preemption_manager = PreemptionManager(batch_cfg.preemption_policy)
+
     if batch_cfg.mode == BatchMode.DEFAULT:
         return _BatchingEngineImpl(
             DefaultBatchingEngine.create(
@@ -60,6 +85,30 @@ def _create_impl(batch_cfg: BatchConfig, page_cache: BasePagedAttentionCache, pr
                 decode_fiber=decode_fiber,
             ),
             page_cache=page_cache,
+            preemption_manager=preemption_manager,
+        )
+    elif batch_cfg.mode == BatchMode.PIPELINED:
+        return _BatchingEngineImpl(
+            PipelinedBatchingEngine.create(
+                batch_cfg=batch_cfg,
+                page_cache=page_cache,
+                prefill_fiber=prefill_fiber,
+                decode_fiber=decode_fiber,
+            ),
+            page_cache=page_cache,
+            preemption_manager=preemption_manager,
+        )
+
+    elif batch_cfg.mode == BatchMode.CONTINUOUS:
+        return _BatchingEngineImpl(
+            ContinuousBatchingEngine.create(
+                batch_cfg=batch_cfg,
+                page_cache=page_cache,
+                prefill_fiber=prefill_fiber,
+                decode_fiber=decode_fiber,
+            ),
+            page_cache=page_cache,
+            preemption_manager=preemption_manager,
         )
 
     raise ValueError(f"Unsupported Batching Mode: {batch_cfg.mode}")
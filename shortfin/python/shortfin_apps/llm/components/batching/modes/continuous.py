@@ -0,0 +1,233 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Continuous (iteration-level) batching mode.
+
+A single batcher process runs the model one iteration at a time. Each
+iteration is scheduled from scratch under a token budget: the decode steps of
+the running sequences, plus as many new prefills or prefill chunks as fit.
+New requests join at the next iteration and finished sequences leave the
+running set as soon as they are done, instead of waiting for a strobe to
+board a separate prefill or decode lane.
+
+Prefill and decode are separate programs, so an iteration launches one decode
+and one prefill invocation and waits for both before scheduling the next.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import shortfin as sf
+
+from shortfin import Fiber
+
+from ..batching_trait import BatchingTrait
+from ..config import BatchConfig
+from .default import DecodeBatcherProcess, PrefillBatcherProcess
+
+from ...config_struct import ModelParams
+from ...device_array_cache import ArgumentArenaStats
+from ...kvcache.base_attention_cache import BasePagedAttentionCache
+from ...messages import InferencePhase, LlmInferenceExecRequest
+from ...scheduler import ContinuousScheduler, WeightedFairQueue
+
+from .....utils import BatcherProcess
+
+
+logger = logging.getLogger(__name__)
+
+
+class IterationComplete(sf.Message):
+    """Sent by the batcher to itself once an iteration has finished."""
+
+    ...
+
+
+class ContinuousBatcherProcess(BatcherProcess):
+    """Batcher process scheduling prefill and decode work at every iteration.
+
+    The prefill and decode lanes are not launched. They only build the tasks
+    and invocations for their phase, while this process owns the scheduling
+    loop.
+
+    Arrivals and finished iterations wake the process with a message, so the
+    periodic strobe keeps its long default delay. Only an iteration held up by
+    a running sequence schedules a strobe after `STROBE_SHORT_DELAY`.
+    """
+
+    STROBE_SHORT_DELAY = 0.0006
+
+    def __init__(
+        self,
+        fiber: Fiber,
+        page_cache: BasePagedAttentionCache,
+        model_params: ModelParams,
+        prefill_functions: dict[int, sf.ProgramFunction],
+        decode_functions: dict[int, sf.ProgramFunction],
+        program_isolation: str,
+        chunk_block_size: Optional[int],
+        token_budget: int,
+        tenant_shares: Optional[dict[str, float]] = None,
+    ):
+        super().__init__(fiber=fiber)
+        self.page_cache = page_cache
+        self.model_params = model_params
+        self.scheduler = ContinuousScheduler(
+            token_budget=token_budget,
+            max_prefill_batch_size=max(model_params.prefill_batch_sizes),
+            max_decode_batch_size=max(model_params.decode_batch_sizes),
+        )
+        if tenant_shares is not None:
+            self.scheduler.fair_queue = WeightedFairQueue(tenant_shares)
+        self.prefill_lane = PrefillBatcherProcess(
+            fiber=fiber,
+            page_cache=page_cache,
+            model_params=model_params,
+            prefill_functions=prefill_functions,
+            program_isolation=program_isolation,
+            chunk_block_size=chunk_block_size,
+            scheduler=self.scheduler,
+        )
+        self.decode_lane = DecodeBatcherProcess(
+            fiber=fiber,
+            page_cache=page_cache,
+            model_params=model_params,
+            decode_functions=decode_functions,
+            program_isolation=program_isolation,
+            scheduler=self.scheduler,
+        )
+        self._iteration: Optional[asyncio.Task] = None
+
+    def handle_inference_request(self, request: LlmInferenceExecRequest):
+        prefill = request.phase == InferencePhase.PREFILL
+        lane = self.prefill_lane if prefill else self.decode_lane
+        lane._llm_task_responder.add_request(request)
+        for task_input in lane.make_task_inputs(request):
+            self.scheduler.schedule_job(task_input, prefill=prefill)
+
+    def reserve_workload(self, *, rid, count):
+        return self.scheduler.reserve_workload(batcher=self, count=count, rid=rid)
+
+    def custom_message(self, msg):
+        if self.scheduler.handle_scheduler(msg):
+            return
+        if isinstance(msg, IterationComplete):
+            return
+
+        super().custom_message(msg)
+
+    def shutdown(self):
+        super().shutdown()
+        self.prefill_lane.shutdown()
+        self.decode_lane.shutdown()
+
+    def next_boarding_deadline(self) -> Optional[float]:
+        if self._iteration is None and self.scheduler.waiting_for_decode:
+            return time.monotonic() + self.STROBE_SHORT_DELAY
+        return None
+
+    async def process_batches(self):
+        if self._iteration is not None:
+            return
+
+        iteration = self.scheduler.should_execute(self.strobes)
+        if iteration is None:
+            self._schedule_wakeup()
+            return
+
+        logger.debug(
+            "Iteration with %d prefill and %d decode tasks (%d tokens)",
+            len(iteration.prefill),
+            len(iteration.decode),
+            iteration.token_count,
+        )
+        invocations = []
+        if iteration.prefill:
+            invocations.append(
+                self.prefill_lane.make_invoker(
+                    self.page_cache, self.fiber, iteration.prefill
+                )
+            )
+        if iteration.decode:
+            invocations.append(
+                self.decode_lane.make_invoker(
+                    self.page_cache, self.fiber, iteration.decode
+                )
+            )
+        self._iteration = asyncio.create_task(self._run_iteration(invocations))
+
+    async def _run_iteration(self, invocations):
+        try:
+            await asyncio.gather(*[invocation.launch() for invocation in invocations])
+        finally:
+            self._iteration = None
+            if not self.batcher_infeed.closed:
+                self.submit(IterationComplete())
+
+
+class ContinuousBatchingEngine(BatchingTrait):
+    def __init__(self, batcher: ContinuousBatcherProcess):
+        self.batcher = batcher
+
+    def submit(self, request: LlmInferenceExecRequest):
+        if request.phase not in (InferencePhase.PREFILL, InferencePhase.DECODE):
+            raise ValueError(
+                "Requested unsupported batching lane: Supported only either prefill or decode in continuous mode."
+            )
+        self.batcher.submit(request)
+
+    def launch(self):
+        self.batcher.launch()
+
+    def shutdown(self):
+        self.batcher.shutdown()
+
+    def reserve_workload(
+        self,
+        rid: str,
+        count: int,
+        phase: InferencePhase = InferencePhase.DECODE,
+    ):
+        # Prefill work joins the next iteration without a reservation.
+        if phase == InferencePhase.DECODE:
+            self.batcher.reserve_workload(rid=rid, count=count)
+
+    def get_model_params(self) -> ModelParams:
+        return self.batcher.model_params
+
+    def get_argument_arena_stats(self) -> Dict[str, ArgumentArenaStats]:
+        return {
+            "prefill": self.batcher.prefill_lane.get_argument_arena_stats(),
+            "decode": self.batcher.decode_lane.get_argument_arena_stats(),
+        }
+
+    @staticmethod
+    def create(
+        batch_cfg: BatchConfig, page_cache: BasePagedAttentionCache, prefill_fiber: sf.Fiber, decode_fiber: sf.Fiber | None = None  # type: ignore
+    ):
+        # Iterations are sequential, so both phases run on the prefill fiber.
+        model_params = batch_cfg.model_params
+        token_budget = batch_cfg.token_budget
+        if token_budget is None:
+            token_budget = (
+                max(model_params.decode_batch_sizes) + model_params.max_seq_len
+            )
+
+        batcher = ContinuousBatcherProcess(
+            fiber=prefill_fiber,
+            page_cache=page_cache,
+            model_params=model_params,
+            prefill_functions=batch_cfg.prefill_functions,
+            decode_functions=batch_cfg.decode_functions,
+            program_isolation=batch_cfg.prog_isolation,
+            chunk_block_size=batch_cfg.chunk_block_size,
+            token_budget=token_budget,
+            tenant_shares=batch_cfg.tenant_shares,
+        )
+        return ContinuousBatchingEngine(batcher=batcher)
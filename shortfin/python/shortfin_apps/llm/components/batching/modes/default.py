@@ -5,8 +5,9 @@
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
 import logging
+import math
 import traceback
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 
 
 import shortfin as sf
@@ -18,7 +19,7 @@ from ..batching_trait import BatchingTrait
 from ..config import BatchConfig
 
 from ...config_struct import ModelParams
-from ...device_array_cache import DeviceArrayCache
+from ...device_array_cache import ArgumentArena, ArgumentArenaStats
 from ...invocation import (
     DecodeTask,
     PrefillTask,
@@ -31,9 +32,15 @@ from ...kvcache.base_attention_cache import (
     BasePagedAttentionCache,
 )
 from ...messages import InferencePhase, LlmInferenceExecRequest
-from ...scheduler import AbstractScheduler, ChunkScheduler, Scheduler
+from ...scheduler import (
+    AbstractScheduler,
+    ChunkScheduler,
+    Scheduler,
+    WeightedFairQueue,
+)
+from ...token_selection import assign_batch_candidates
 
-from .....utils import BatcherProcess
+from .....utils import BatcherProcess, BoardingPolicy, StrobeMessage
 
 
 logger = logging.getLogger(__name__)
@@ -47,6 +54,8 @@ logger = logging.getLogger(__name__)
 class PrefillTaskResponder(LlmTaskResponder):
     def __init__(self, scheduler: AbstractScheduler):
         self._scheduler = scheduler
+        # Called when a finished chunk made the next chunk of its request ready.
+        self.on_chunk_ready: Optional[Callable[[], None]] = None
         super().__init__()
 
     def set_success(
@@ -68,14 +77,14 @@ class PrefillTaskResponder(LlmTaskResponder):
             task_input = task_inputs[i]
             sl = len(task_input.input_tokens) - 1
 
-            if logits.shape[1] == 1:
+            if logits.shape[1] == 1 or req.return_all_logits:
                 logits_item = logits.view(i)
             else:
                 logits_item = logits.view(i, sl)
 
             index_item = None
             if indices is not None:
-                if indices.shape[1] == 1:
+                if indices.shape[1] == 1 or req.return_all_logits:
                     index_item = indices.view(i)
                 else:
                     index_item = indices.view(i, sl)
@@ -87,6 +96,8 @@ class PrefillTaskResponder(LlmTaskResponder):
             if self._scheduler.handle_completed(req.orig_instance_id):
                 req.done.set_success()
                 self._remove_request(req.instance_id)
+            elif self.on_chunk_ready is not None:
+                self.on_chunk_ready()
 
     def set_failure(self, llm_task: LlmTask):
         logger.error(
@@ -126,6 +137,8 @@ class DecodeTaskResponder(LlmTaskResponder):
             req.result_logits = logits_item
             req.result_indices = index_item
 
+        assign_batch_candidates(exec_requests, logits, indices)
+
         for req in exec_requests:
             if self._scheduler.handle_completed(req.orig_instance_id):
                 req.done.set_success()
@@ -157,6 +170,9 @@ class LlmBatcherProcess(BatcherProcess):
     STROBE_SHORT_DELAY = 0.065
     STROBE_LONG_DELAY = 0.065
 
+    # Sets of argument buffers allocated up front for each entrypoint.
+    PREALLOCATED_ARGUMENT_SETS = 2
+
     def __init__(
         self,
         name: str,
@@ -168,8 +184,15 @@ class LlmBatcherProcess(BatcherProcess):
         program_isolation: str,
         scheduler: AbstractScheduler,
         llm_task_responder: LlmTaskResponder,
+        boarding_deadline_s: Optional[float] = None,
+        tenant_shares: Optional[dict[str, float]] = None,
     ):
-        super().__init__(fiber=fiber)
+        boarding_policy = None
+        if boarding_deadline_s is not None:
+            boarding_policy = BoardingPolicy(
+                ideal_batch_size=ideal_batch_size, max_delay_s=boarding_deadline_s
+            )
+        super().__init__(fiber=fiber, boarding_policy=boarding_policy)
         self.name = name
         self.page_cache: BasePagedAttentionCache = page_cache
         self.model_params = model_params
@@ -179,15 +202,30 @@ class LlmBatcherProcess(BatcherProcess):
         # batching in the scheduling algo.
         self.ideal_batch_size: int = ideal_batch_size
         self.page_seq_stride = self.model_params.paged_kv_cache.block_seq_stride
-        self.array_cache: DeviceArrayCache = DeviceArrayCache(fiber.device(0))
+        self.array_cache: ArgumentArena = ArgumentArena(fiber.device(0))
 
         self.program_isolation = program_isolation
 
         self.scheduler = scheduler
+        self.scheduler.boarding_policy = boarding_policy
+        if tenant_shares is not None:
+            self.scheduler.fair_queue = WeightedFairQueue(tenant_shares)
         self._llm_task_responder = llm_task_responder
 
+        # Invocations pad their batch to the batch size of an entrypoint.
+        for batch_size in self.functions or ():
+            self.array_cache.preallocate(
+                self.argument_shapes(batch_size),
+                sfnp.int64,
+                count=self.PREALLOCATED_ARGUMENT_SETS,
+            )
+
     def handle_inference_request(self, request: LlmInferenceExecRequest):
         """Handle an inference request."""
+        if self.boarding_policy is not None and not self.scheduler.is_reserved(
+            request.orig_instance_id
+        ):
+            self.boarding_policy.record_arrival()
         self._llm_task_responder.add_request(request)
         task_inputs = self.make_task_inputs(request)
         for task_input in task_inputs:
@@ -196,8 +234,16 @@ class LlmBatcherProcess(BatcherProcess):
     def shutdown(self):
         """Shutdown the batcher process."""
         super().shutdown()
+        logger.info(
+            "%s argument arena stats at shutdown: %r",
+            self.name,
+            self.array_cache.get_stats(),
+        )
         self.array_cache.free()
 
+    def get_argument_arena_stats(self) -> ArgumentArenaStats:
+        return self.array_cache.get_stats()
+
     async def process_batches(self):
         """Process batches of requests."""
         await self.board_flights()
@@ -205,6 +251,9 @@ class LlmBatcherProcess(BatcherProcess):
     def reserve_workload(self, *, rid, count):
         return self.scheduler.reserve_workload(batcher=self, count=count, rid=rid)
 
+    def next_boarding_deadline(self) -> Optional[float]:
+        return self.scheduler.boarding_deadline()
+
     def custom_message(self, msg):
         if self.scheduler.handle_scheduler(msg):
             return
@@ -225,6 +274,10 @@ class LlmBatcherProcess(BatcherProcess):
             self.board(page_cache, self.fiber, job)
             logger.debug("Post boarding cache state: %r", page_cache)
 
+    def argument_shapes(self, batch_size: int) -> List[List[int]]:
+        """Shapes of the integer arguments of the largest invocation of `batch_size`."""
+        return []
+
     def make_task_inputs(
         self, exec_request: LlmInferenceExecRequest
     ) -> List[LlmTaskInput]:
@@ -303,11 +356,14 @@ class PrefillBatcherProcess(LlmBatcherProcess):
         prefill_functions: dict[int, sf.ProgramFunction],
         program_isolation: str,
         chunk_block_size: Optional[int],
+        scheduler: Optional[AbstractScheduler] = None,
+        boarding_deadline_s: Optional[float] = None,
+        tenant_shares: Optional[dict[str, float]] = None,
     ):
         ideal_batch_size = max(model_params.prefill_batch_sizes)
-        if chunk_block_size is not None:
+        if scheduler is None and chunk_block_size is not None:
             scheduler = ChunkScheduler(ideal_batch_size=ideal_batch_size)
-        else:
+        elif scheduler is None:
             scheduler = Scheduler(ideal_batch_size=ideal_batch_size)
 
         llm_task_responder = PrefillTaskResponder(scheduler=scheduler)
@@ -321,9 +377,31 @@ class PrefillBatcherProcess(LlmBatcherProcess):
             program_isolation=program_isolation,
             scheduler=scheduler,
             llm_task_responder=llm_task_responder,
+            boarding_deadline_s=boarding_deadline_s,
+            tenant_shares=tenant_shares,
         )
 
         self._chunk_block_size = chunk_block_size
+        if self.boarding_policy is not None:
+            # Without the periodic strobe, nothing else wakes the batcher for
+            # the next chunk of a request.
+            llm_task_responder.on_chunk_ready = self._strobe
+
+    def _strobe(self):
+        if not self.batcher_infeed.closed:
+            self.submit(StrobeMessage())
+
+    def argument_shapes(self, batch_size: int) -> List[List[int]]:
+        seq_stride = self.page_seq_stride
+        batch_seq_len = (
+            math.ceil(self.model_params.max_seq_len / seq_stride) * seq_stride
+        )
+        # An unaligned start position can make the writes span one extra block.
+        block_count = batch_seq_len // seq_stride + 1
+        shapes = [[batch_size, batch_seq_len], [batch_size], [batch_size, block_count]]
+        if self.model_params.has_prefill_position:
+            shapes.append([batch_size])
+        return shapes
 
     def _make_chunked_task_inputs(
         self, exec_request: LlmInferenceExecRequest
@@ -354,6 +432,8 @@ class PrefillBatcherProcess(LlmBatcherProcess):
                 seq_len=seq_len,
                 page_ids=tuple(page_ids),
                 start_position=start_position,
+                priority=exec_request.priority,
+                tenant=exec_request.tenant,
             )
             task_inputs.append(task_input)
 
@@ -380,6 +460,8 @@ class PrefillBatcherProcess(LlmBatcherProcess):
                 input_tokens=tuple(input_tokens),
                 page_ids=tuple(exec_request.page_ids),
                 start_position=exec_request.start_position,
+                priority=exec_request.priority,
+                tenant=exec_request.tenant,
             )
         ]
 
@@ -439,9 +521,13 @@ class DecodeBatcherProcess(LlmBatcherProcess):
         model_params: ModelParams,
         decode_functions: dict[int, sf.ProgramFunction],
         program_isolation: str,
+        scheduler: Optional[AbstractScheduler] = None,
+        boarding_deadline_s: Optional[float] = None,
+        tenant_shares: Optional[dict[str, float]] = None,
     ):
         ideal_batch_size = max(model_params.decode_batch_sizes)
-        scheduler = Scheduler(ideal_batch_size=ideal_batch_size)
+        if scheduler is None:
+            scheduler = Scheduler(ideal_batch_size=ideal_batch_size)
         super().__init__(
             name="decode",
             fiber=fiber,
@@ -452,8 +538,19 @@ class DecodeBatcherProcess(LlmBatcherProcess):
             program_isolation=program_isolation,
             scheduler=scheduler,
             llm_task_responder=DecodeTaskResponder(scheduler=scheduler),
+            boarding_deadline_s=boarding_deadline_s,
+            tenant_shares=tenant_shares,
         )
 
+    def argument_shapes(self, batch_size: int) -> List[List[int]]:
+        block_count = math.ceil(self.model_params.max_seq_len / self.page_seq_stride)
+        return [
+            [batch_size, 1],
+            [batch_size],
+            [batch_size],
+            [batch_size, block_count],
+        ]
+
     def make_task_inputs(
         self, exec_request: LlmInferenceExecRequest
     ) -> List[LlmTaskInput]:
@@ -466,6 +563,8 @@ class DecodeBatcherProcess(LlmBatcherProcess):
                 input_tokens=tuple(exec_request.input_token_ids),
                 page_ids=tuple(exec_request.page_ids),
                 start_position=exec_request.start_position,
+                priority=exec_request.priority,
+                tenant=exec_request.tenant,
             )
         ]
 
@@ -533,8 +632,16 @@ class DefaultBatchingEngine(BatchingTrait):
         self.prefill_lane.shutdown()
         self.decode_lane.shutdown()
 
-    def reserve_workload(self, rid: str, count: int):
-        self.decode_lane.reserve_workload(
+    def reserve_workload(
+        self,
+        rid: str,
+        count: int,
+        phase: InferencePhase = InferencePhase.DECODE,
+    ):
+        lane = (
+            self.prefill_lane if phase == InferencePhase.PREFILL else self.decode_lane
+        )
+        lane.reserve_workload(
             rid=rid,
             count=count,
         )
@@ -542,6 +649,12 @@ class DefaultBatchingEngine(BatchingTrait):
     def get_model_params(self) -> ModelParams:
         return self.prefill_lane.model_params
 
+    def get_argument_arena_stats(self) -> Dict[str, ArgumentArenaStats]:
+        return {
+            "prefill": self.prefill_lane.get_argument_arena_stats(),
+            "decode": self.decode_lane.get_argument_arena_stats(),
+        }
+
     @staticmethod
     def create(
         batch_cfg: BatchConfig, page_cache: BasePagedAttentionCache, prefill_fiber: sf.Fiber, decode_fiber: sf.Fiber | None = None  # type: ignore
@@ -556,6 +669,8 @@ class DefaultBatchingEngine(BatchingTrait):
             prefill_functions=batch_cfg.prefill_functions,
             program_isolation=batch_cfg.prog_isolation,
             chunk_block_size=batch_cfg.chunk_block_size,
+            boarding_deadline_s=batch_cfg.boarding_deadline_s,
+            tenant_shares=batch_cfg.tenant_shares,
         )
         decode_batcher = DecodeBatcherProcess(
             fiber=decode_fiber,
@@ -563,6 +678,8 @@ class DefaultBatchingEngine(BatchingTrait):
             model_params=batch_cfg.model_params,
             decode_functions=batch_cfg.decode_functions,
             program_isolation=batch_cfg.prog_isolation,
+            boarding_deadline_s=batch_cfg.boarding_deadline_s,
+            tenant_shares=batch_cfg.tenant_shares,
         )
 
         return DefaultBatchingEngine(
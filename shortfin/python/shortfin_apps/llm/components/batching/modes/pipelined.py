@@ -0,0 +1,100 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Pipelined batching mode.
+
+Decode requests are split over two batches that are dispatched alternately, so
+the host work of one batch (token selection, request updates and argument
+packing) overlaps the device execution of the other. Prefill is batched as in
+the default mode.
+"""
+
+from typing import Optional
+
+import shortfin as sf
+
+from shortfin import Fiber
+
+from ..config import BatchConfig
+from .default import (
+    DecodeBatcherProcess,
+    DefaultBatchingEngine,
+    PrefillBatcherProcess,
+)
+
+from ...config_struct import ModelParams
+from ...kvcache.base_attention_cache import BasePagedAttentionCache
+from ...scheduler import PipelinedScheduler
+
+
+class PipelinedDecodeBatcherProcess(DecodeBatcherProcess):
+    """Decode batcher keeping `PIPELINE_DEPTH` batches in flight.
+
+    Each batch uses its own set of argument buffers from the arena, so a batch
+    is packed while the previous one still owns its buffers on device. The
+    default `PREALLOCATED_ARGUMENT_SETS` covers the batches in flight.
+    """
+
+    PIPELINE_DEPTH = 2
+
+    def __init__(
+        self,
+        fiber: Fiber,
+        page_cache: BasePagedAttentionCache,
+        model_params: ModelParams,
+        decode_functions: dict[int, sf.ProgramFunction],
+        program_isolation: str,
+        boarding_deadline_s: Optional[float] = None,
+        tenant_shares: Optional[dict[str, float]] = None,
+    ):
+        super().__init__(
+            fiber=fiber,
+            page_cache=page_cache,
+            model_params=model_params,
+            decode_functions=decode_functions,
+            program_isolation=program_isolation,
+            scheduler=PipelinedScheduler(
+                ideal_batch_size=max(model_params.decode_batch_sizes),
+                pipeline_depth=self.PIPELINE_DEPTH,
+            ),
+            boarding_deadline_s=boarding_deadline_s,
+            tenant_shares=tenant_shares,
+        )
+
+
+class PipelinedBatchingEngine(DefaultBatchingEngine):
+    @staticmethod
+    def create(
+        batch_cfg: BatchConfig, page_cache: BasePagedAttentionCache, prefill_fiber: sf.Fiber, decode_fiber: sf.Fiber | None = None  # type: ignore
+    ):
+        assert (
+            decode_fiber is not None
+        ), "Request to construct decode batcher, but no fiber supplied"
+        prefill_batcher = PrefillBatcherProcess(
+            fiber=prefill_fiber,
+            page_cache=page_cache,
+            model_params=batch_cfg.model_params,
+            prefill_functions=batch_cfg.prefill_functions,
+            program_isolation=batch_cfg.prog_isolation,
+            chunk_block_size=batch_cfg.chunk_block_size,
+            boarding_deadline_s=batch_cfg.boarding_deadline_s,
+            tenant_shares=batch_cfg.tenant_shares,
+        )
+        decode_batcher = PipelinedDecodeBatcherProcess(
+            fiber=decode_fiber,
+            page_cache=page_cache,
+            model_params=batch_cfg.model_params,
+            decode_functions=batch_cfg.decode_functions,
+            program_isolation=batch_cfg.prog_isolation,
+            boarding_deadline_s=batch_cfg.boarding_deadline_s,
+            tenant_shares=batch_cfg.tenant_shares,
+        )
+
+        return PipelinedBatchingEngine(
+            prefill_lane=prefill_batcher,
+            decode_lane=decode_batcher,
+        )
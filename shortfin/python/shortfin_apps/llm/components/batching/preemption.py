@@ -0,0 +1,167 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Preemption of decoding sequences when the KV cache runs out of pages.
+
+A decoder whose page allocation fails asks the `PreemptionManager` to make
+room. The manager picks a victim among the running sequences by its policy
+and asks it to suspend at its next decode step. A suspended sequence
+publishes its pages to the prefix cache and releases them, then waits until
+a running sequence finishes. On resume, it re-prefills its tokens, reusing
+the pages still held by the prefix cache, or restored from the host tier if
+one is configured, and recomputing the rest.
+
+Sequences may run on different workers, so waiting is done on futures of
+the waiter's own loop, resolved through `call_soon_threadsafe`.
+"""
+
+import asyncio
+import logging
+import threading
+
+from enum import Enum
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PreemptionPolicy(Enum):
+    # Preempt the most recently started sequence.
+    NEWEST_FIRST = "newest_first"
+    # Preempt the sequence with the largest priority value, then the newest.
+    LOWEST_PRIORITY = "lowest_priority"
+
+
+class SequenceState(Enum):
+    RUNNING = "running"
+    # Waiting for another sequence to suspend.
+    WAITING = "waiting"
+    SUSPENDED = "suspended"
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class PreemptibleSequence:
+    """Handle of a decoding sequence registered for preemption."""
+
+    def __init__(self, priority: int, arrival: int):
+        self.priority = priority
+        self.arrival = arrival
+        self.state = SequenceState.RUNNING
+        # Set when the sequence should suspend at its next decode step.
+        self.preempt_requested = False
+        self._suspension_waiters: List[
+            Tuple[asyncio.AbstractEventLoop, asyncio.Future]
+        ] = []
+        self._resume: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = None
+
+    def _notify_suspension_waiters(self):
+        for loop, future in self._suspension_waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+        self._suspension_waiters = []
+
+
+class PreemptionManager:
+    def __init__(self, policy: PreemptionPolicy):
+        self._policy = policy
+        self._lock = threading.Lock()
+        self._arrivals = 0
+        self._sequences: List[PreemptibleSequence] = []
+        self.preemptions = 0
+
+    def _victim_key(self, seq: PreemptibleSequence):
+        if self._policy == PreemptionPolicy.LOWEST_PRIORITY:
+            return (seq.priority, seq.arrival)
+        return seq.arrival
+
+    def register(self, priority: int = 0) -> PreemptibleSequence:
+        """Registers a running sequence. Lower `priority` values are more important."""
+        with self._lock:
+            self._arrivals += 1
+            seq = PreemptibleSequence(priority=priority, arrival=self._arrivals)
+            self._sequences.append(seq)
+            return seq
+
+    def unregister(self, seq: PreemptibleSequence):
+        """Unregisters a finished sequence, resuming a suspended one in its place."""
+        with self._lock:
+            self._sequences.remove(seq)
+            seq._notify_suspension_waiters()
+            suspended = [
+                s for s in self._sequences if s.state == SequenceState.SUSPENDED
+            ]
+            if suspended:
+                self._resume_locked(min(suspended, key=self._victim_key))
+
+    def _resume_locked(self, seq: PreemptibleSequence):
+        seq.state = SequenceState.RUNNING
+        loop, future = seq._resume
+        seq._resume = None
+        loop.call_soon_threadsafe(_resolve, future)
+
+    async def make_room(self, seq: PreemptibleSequence) -> bool:
+        """Preempts a sequence after an allocation of `seq` failed.
+
+        If another sequence is preempted, this returns once it released its
+        pages. If `seq` itself is the victim, its `preempt_requested` is set.
+
+        Returns:
+            Whether the allocation may be retried, False if there is no
+            sequence to preempt.
+        """
+        with self._lock:
+            candidates = [
+                s
+                for s in self._sequences
+                if s.state == SequenceState.RUNNING and not s.preempt_requested
+            ]
+            if not candidates or not any(
+                s is not seq and s.state != SequenceState.SUSPENDED
+                for s in self._sequences
+            ):
+                # Without other active sequences, nothing could use the
+                # pages that a suspension frees.
+                return False
+
+            victim = max(candidates, key=self._victim_key)
+            victim.preempt_requested = True
+            self.preemptions += 1
+            logger.debug(
+                "Preempting sequence %d (priority %d)", victim.arrival, victim.priority
+            )
+            if victim is seq:
+                return True
+
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            victim._suspension_waiters.append((loop, future))
+            seq.state = SequenceState.WAITING
+
+        try:
+            await future
+        finally:
+            with self._lock:
+                if seq.state == SequenceState.WAITING:
+                    seq.state = SequenceState.RUNNING
+        return True
+
+    async def suspend(self, seq: PreemptibleSequence):
+        """Suspends `seq`, which released its pages, until it may resume."""
+        with self._lock:
+            seq.preempt_requested = False
+            seq.state = SequenceState.SUSPENDED
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            seq._resume = (loop, future)
+            seq._notify_suspension_waiters()
+            if not any(s.state != SequenceState.SUSPENDED for s in self._sequences):
+                # No running sequence is left to resume it.
+                self._resume_locked(seq)
+        await future
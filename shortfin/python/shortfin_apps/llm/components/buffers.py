@@ -1,6 +1,10 @@
 import logging
+import math
 
-from typing import List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 import shortfin as sf
 import shortfin.array as sfnp
@@ -49,6 +53,62 @@ def create_argument_buffers(
     return args
 
 
+@contextmanager
+def map_host_array(buffer: Allocation) -> Iterator[np.ndarray]:
+    """Map the host side of `buffer` for writing as a NumPy array of its shape.
+
+    The previous contents of the buffer are discarded. Only dtypes that NumPy
+    knows by the same name (e.g. int64, float16) are supported.
+    """
+    shape = buffer.shape
+    with buffer.host.map(discard=True) as host_buffer:
+        # The mapping covers the whole backing storage, which can be larger
+        # than the array when the buffer comes from an `ArgumentArena`.
+        yield np.frombuffer(
+            host_buffer, dtype=np.dtype(buffer.dtype.name), count=math.prod(shape)
+        ).reshape(shape)
+
+
+def pack_argument_buffers(
+    buffers: List[Allocation],
+    data: Sequence[Sequence[int | float] | Sequence[Sequence[int | float]]],
+    defaults: List[int | float],
+) -> List[Allocation]:
+    """Pack argument data directly into the mapped host buffers.
+
+    Like `create_argument_buffers`, but data for a 2D buffer is given per row
+    instead of flattened and pre-padded: each row is written into the leading
+    elements of the matching buffer row, and everything else is set to the
+    default. No intermediate lists are built.
+
+    Args:
+        buffers (List[Allocation]): Buffers to passed to VMFB.
+        data (Sequence[Sequence[int | float] | Sequence[Sequence[int | float]]]): Values of 1D buffers, or rows of 2D buffers.
+        defaults (List[int | float]): Padding value of each buffer.
+
+    Returns:
+        List[Allocation]: The input buffers, with their transfers to device enqueued.
+    """
+    assert len(buffers) == len(data), "`buffers` and `data` must be parallel lists"
+    assert len(buffers) == len(
+        defaults
+    ), "`buffers` and `defaults` must be parallel lists"
+
+    for buffer, buffer_data, default in zip(buffers, data, defaults):
+        with map_host_array(buffer) as host_array:
+            host_array.fill(default)
+            if host_array.ndim == 1:
+                host_array[: len(buffer_data)] = buffer_data
+            else:
+                # `fromiter` converts Python ints faster than slice assignment.
+                for row, row_data in zip(host_array, buffer_data):
+                    count = len(row_data)
+                    row[:count] = np.fromiter(row_data, host_array.dtype, count)
+        buffer.transfer_to_device()
+
+    return list(buffers)
+
+
 async def copy_buffers_to_host(
     buffers: Tuple[Optional[sfnp.device_array]],
     device: sf.ScopedDevice,
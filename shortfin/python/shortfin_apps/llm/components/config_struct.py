@@ -10,9 +10,12 @@ Configuration objects.
 Classes:
 - ModelParams: for reading and managing config keys specified in `config.json` files exported by `python -m sharktank.examples.export_paged_llm_v1`
 - ServerParams: for specifying config keys needed by `python -m shortfin_apps.llm.server`
+- ServedModelConfig: for additional models served by the same server, listed in a `--models` file
 """
 
 import dataclasses_json
+import hashlib
+import json
 
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -218,6 +221,27 @@ class ModelParams:
         assert self.paged_kv_cache is not None
         return self.paged_kv_unit_size_elements * self.paged_kv_cache.block_seq_stride
 
+    def fingerprint(
+        self, *artifacts: Path | str, weights_version: Optional[str] = None
+    ) -> str:
+        """Digest identifying the model whose KV cache contents may be reused.
+
+        Covers these parameters and either `weights_version`, if given, or the
+        name, size and modification time of each artifact (e.g. the vmfb and
+        parameter files) the model is loaded from. Hashing the contents of
+        multi-gigabyte parameter files on every startup is not affordable, so
+        weights copied elsewhere keep their cache only with a `weights_version`.
+        """
+        digest = hashlib.sha256(self.to_json(sort_keys=True).encode())
+        if weights_version is not None:
+            digest.update(f"weights:{weights_version}".encode())
+            return digest.hexdigest()
+        for artifact in artifacts:
+            artifact = Path(artifact)
+            stat = artifact.stat()
+            digest.update(f"{artifact.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+
     @staticmethod
     def load_json(path: Path | str):
         with open(path, "rt") as f:
@@ -237,7 +261,22 @@ class ServerParams:
     """
 
     # KV cache configuration
-    prefix_sharing_algorithm: str = "none"  # none or trie
+    prefix_sharing_algorithm: str = "none"  # none, trie, radix or hashed
+
+    # Number of pages in the host memory tier that evicted prefix cache pages
+    # are spilled to. 0 disables the host tier.
+    host_offload_page_count: int = 0
+
+    # Directory holding a snapshot of the prefix cache. It is restored on
+    # startup and written on shutdown.
+    prefix_cache_snapshot_path: Optional[str] = None
+
+    # If set, the prefix cache snapshot is also rewritten at this interval.
+    prefix_cache_snapshot_interval_s: Optional[float] = None
+
+    # Version of the model weights that prefix cache snapshots are valid for.
+    # Defaults to the size and modification time of the model files.
+    prefix_cache_snapshot_weights_version: Optional[str] = None
 
     # Program isolation configuration
     program_isolation: str = "per_call"
@@ -248,6 +287,51 @@ class ServerParams:
 
     chunk_block_size: Optional[int] = None
 
+    # Batching mode: "default", "pipelined", which keeps two decode batches
+    # in flight so that host work overlaps device execution, or "continuous",
+    # which reschedules prefill and decode work at every iteration.
+    batch_mode: str = "default"
+
+    # Tokens processed per iteration in continuous batching mode. Defaults to
+    # the largest decode batch plus `max_seq_len`.
+    token_budget: Optional[int] = None
+
+    # If set, batches are boarded as soon as they are full, or at the latest
+    # this many seconds after the oldest pending request arrived, adapted to
+    # the arrival rate. Otherwise batchers wake up on fixed strobe timers.
+    batch_boarding_deadline_s: Optional[float] = None
+
+    # If set, greedy decodes are preempted when the KV cache runs out of pages
+    # and resumed by re-prefilling once a request finishes. Victims are picked
+    # "newest_first" or by "lowest_priority".
+    preemption_policy: Optional[str] = None
+
+    # If set, batches are filled by weighted fair queueing across tenants,
+    # each served input tokens in proportion to its share here. Tenants not
+    # listed get a share of 1. Requests of lower priority values go first.
+    tenant_shares: Optional[dict[str, float]] = None
+
+    # Request admission: "reserve" reserves the worst case KV cache pages of
+    # each request and rejects requests that do not fit. "overcommit" counts
+    # prefix cache hits, reserves pages for the expected completion length
+    # and queues requests until they fit.
+    admission_mode: str = "reserve"
+
+    # Maximum number of tokens proposed per target invocation in speculative
+    # decoding, with a draft model or by prompt lookup.
+    num_speculative_tokens: int = 4
+
+    # Speculative decoding without a draft model: continuations of the
+    # sequence are looked up in the prefix cache and in the sequence itself,
+    # matching its last n-gram of up to this many tokens. 0 disables it.
+    prompt_lookup_ngram_size: int = 0
+
+    # Threads encoding and decoding text off the serving event loop.
+    tokenizer_workers: int = 2
+
+    # Number of prompt encodings kept for repeated prompts. 0 disables it.
+    tokenizer_cache_size: int = 1024
+
     # Device configuration
     device_ids: list[str] = field(default_factory=list)
     amdgpu_async_allocations: bool = False
@@ -291,3 +375,43 @@ class ServerParams:
                     arg_value is not None
                 ):  # Only override if a cmdline arg of the same name was provided
                     setattr(self, field, arg_value)
+
+
+@dataclass_json(undefined=Undefined.RAISE)
+@dataclass
+class ServedModelConfig:
+    """
+    A model served next to the default one, selected by the `model` field of requests.
+
+    All models share the system, devices and workers of the server. Each
+    parameter archive is loaded once, so models loading the same archive, such
+    as a base archive next to different adapters, share its memory.
+    """
+
+    # Name that requests select the model by.
+    name: str
+
+    model_config: str
+    vmfb: str
+    parameters: list[str] = field(default_factory=list)
+
+    # Tokenizer of the model, the tokenizer of the default model if not set.
+    tokenizer_json: Optional[str] = None
+    tokenizer_config_json: Optional[str] = None
+
+    # Number of KV cache pages allocated for the model. Defaults to the
+    # `device_block_count` of its model config.
+    page_budget: Optional[int] = None
+
+    def __post_init__(self):
+        if self.tokenizer_json is not None and self.tokenizer_config_json is None:
+            raise ValueError(
+                f"Model '{self.name}' sets `tokenizer_json` without "
+                "`tokenizer_config_json`."
+            )
+
+    @staticmethod
+    def load_list(path: Path | str) -> List["ServedModelConfig"]:
+        """Loads the models listed in a `--models` json file."""
+        with open(path, "rt") as f:
+            return [ServedModelConfig.from_dict(entry) for entry in json.load(f)]
@@ -7,14 +7,16 @@
 import asyncio
 import itertools
 import logging
+import math
 import numpy as np
 import threading
 
-from typing import Callable, Dict, List, Optional, Tuple, Union
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
 from _shortfin import lib as _sfl
 
 from shortfin_apps.llm.components.batching.facade import BatchingFacade
+from shortfin_apps.llm.components.batching.preemption import PreemptibleSequence
 from shortfin_apps.llm.components.decode_config import (
     DecodeConfig,
     LogitsNormalization,
@@ -30,6 +32,7 @@ from shortfin_apps.llm.components.messages import (
     InferencePhase,
 )
 from shortfin_apps.llm.components.prefill_config import PrefillConfig
+from shortfin_apps.llm.components.token_selection import normalize_scores
 
 logger = logging.getLogger(__name__)
 
@@ -164,6 +167,7 @@ class PageManager:
             pages = req_allocated_cache_info.pages + acquired[:count]
             req_allocated_cache_info = acquired_cache_info
             req_allocated_cache_info.pages = pages
+            allocated_cache_recs[req.instance_id] = req_allocated_cache_info
         else:
             req_allocated_cache_info.num_tokens += len(input_token_ids)
             req_allocated_cache_info.tokens.extend(input_token_ids)
@@ -174,6 +178,35 @@ class PageManager:
 
         return allocation, req
 
+    def _reserve_free_pages(
+        self,
+        count: int,
+        req: LlmInferenceExecRequest,
+        allocated_cache_recs: Dict[str, CacheInfo],
+    ):
+        """Acquires pages from the cache until `count` free pages are held.
+
+        Nothing else is changed, so a step whose allocation fails can be
+        retried once the cache made room.
+        """
+        shortfall = count - len(self._free_pages)
+        if shortfall <= 0:
+            return
+        req_allocated_cache_info = allocated_cache_recs.get(req.instance_id, None)
+        if not req_allocated_cache_info:
+            raise CacheAllocationFailure("No allocated cache info found for request.")
+
+        # Take a whole block while the pool has room for it, but only evict
+        # for the pages the step needs.
+        acquire_count = shortfall
+        if self._page_pool.available_page_count() >= self._allocation_block_size:
+            acquire_count = max(shortfall, self._allocation_block_size)
+        acquired_cache_info = self._page_cache.allocate(
+            [], req_allocated_cache_info, acquire_count
+        )
+        acquired = acquired_cache_info.pages[len(req_allocated_cache_info.pages) :]
+        self._free_pages.extend([p.index for p in acquired])
+
     def _update_decode_reqs_new_page(
         self,
         beam_page_ids: List[List[int]],
@@ -268,6 +301,17 @@ class PageManager:
         old_pages = set(itertools.chain.from_iterable(self._beam_page_ids))
         new_pages = set(itertools.chain.from_iterable(new_beam_page_ids))
         free_pages = old_pages - new_pages
+
+        # Acquire every page of the step up front, so that a failed
+        # allocation leaves the beams and their cache info untouched.
+        if new_page:
+            pages_needed = len(new_beam_page_ids)
+        else:
+            last_pages = [beam[-1] for beam in new_beam_page_ids if len(beam) > 0]
+            pages_needed = len(last_pages) - len(set(last_pages))
+        self._reserve_free_pages(
+            pages_needed - len(free_pages), decode_reqs[0], allocated_cache_recs
+        )
         self._free_pages.extend(free_pages)
 
         if new_page:
@@ -289,6 +333,74 @@ class PageManager:
             decode_reqs[i].page_ids = self._shared_pages + new_beam_page_ids[i]
         return decode_reqs[: len(tokens)]
 
+    @property
+    def position(self) -> int:
+        """Number of tokens held by the pages of the beams."""
+        return self._position
+
+    def extend(
+        self,
+        req: LlmInferenceExecRequest,
+        allocated_cache_recs: Dict[str, CacheInfo],
+        tokens: List[int],
+    ) -> List[int]:
+        """Appends `tokens` to a single beam, allocating the pages they need.
+
+        Returns:
+            Page ids of the beam.
+        """
+        beam = self._beam_page_ids[0]
+        page_count = math.ceil((self._position + len(tokens)) / self._tokens_per_page)
+        count = page_count - len(self._shared_pages) - len(beam)
+        if count > 0:
+            # Pages are allocated one at a time, so that the pages recorded for
+            # the request are the ones returned.
+            for i in range(count):
+                pages, _ = self.allocate(
+                    req=req,
+                    allocated_cache_recs=allocated_cache_recs,
+                    input_token_ids=tokens if i == 0 else [],
+                    count=1,
+                )
+                beam.extend(pages)
+        else:
+            cache_info = allocated_cache_recs.get(req.instance_id, None)
+            if not cache_info:
+                raise CacheAllocationFailure(
+                    "No allocated cache info found for request."
+                )
+            cache_info.num_tokens += len(tokens)
+            cache_info.tokens.extend(tokens)
+
+        self._position += len(tokens)
+        return self._shared_pages + beam
+
+    def rollback(
+        self,
+        req: LlmInferenceExecRequest,
+        allocated_cache_recs: Dict[str, CacheInfo],
+        count: int,
+    ):
+        """Drops the last `count` tokens of a single beam.
+
+        Pages that only held dropped tokens are kept for the next allocation.
+        """
+        if count == 0:
+            return
+        cache_info = allocated_cache_recs.get(req.instance_id, None)
+        if not cache_info:
+            raise CacheAllocationFailure("No allocated cache info found for request.")
+
+        self._position -= count
+        cache_info.num_tokens -= count
+        del cache_info.tokens[-count:]
+
+        beam = self._beam_page_ids[0]
+        page_count = math.ceil(self._position / self._tokens_per_page)
+        while beam and len(self._shared_pages) + len(beam) > page_count:
+            self._free_pages.insert(0, beam.pop())
+            cache_info.pages.pop()
+
     def release_pages(self):
         self._page_cache.free_allocated_pages(self._free_pages)
         self._free_pages = []
@@ -335,6 +447,25 @@ class TokenSelector:
             beams = tokens // token_options
             tokens = tokens % token_options
 
+        return self._filter_eos(step, beams, tokens, scores)
+
+    def _select_candidates(self, candidates: List[Tuple[np.ndarray, np.ndarray]]):
+        step = len(self._selected_beams)
+        max_score = max(self._scores)
+
+        tokens = np.concatenate([c[0] for c in candidates])
+        scores = np.concatenate([c[1] for c in candidates])
+        beams = np.repeat(np.arange(len(candidates)), [len(c[0]) for c in candidates])
+        scores = normalize_scores(
+            scores, max_score, self._decode_config.logits_normalization
+        )
+
+        selected, scores = self._select_function(
+            scores[np.newaxis, :], self._decode_config
+        )
+        return self._filter_eos(step, beams[selected], tokens[selected], scores)
+
+    def _filter_eos(self, step, beams, tokens, scores):
         # Filter out eos cases
         eos = self._eos_token_id
         next_tokens = [token for token in tokens if token != eos]
@@ -356,6 +487,20 @@ class TokenSelector:
 
         return beams, tokens
 
+    def step_candidates(self, candidates: List[Tuple[np.ndarray, np.ndarray]]):
+        """Steps from the (tokens, scores) candidates selected for each beam.
+
+        See `token_selection.select_batch_candidates`.
+        """
+        beams, tokens = self._select_candidates(candidates)
+
+        return beams, tokens
+
+    @property
+    def scores(self) -> List[float]:
+        """Running scores of the beams returned by the last step."""
+        return self._scores
+
     def done(self):
         return len(self._completed) >= self._hypothesis
 
@@ -397,6 +542,9 @@ class LlmDecoder:
         results_callback: Callable[[Union[int, List[int]]], None],
         rid,
         use_native_impls: bool = False,
+        stream_callback: Optional[Callable[[List[int]], Awaitable[None]]] = None,
+        priority: int = 0,
+        tenant: Optional[str] = None,
     ):
         self._prefill_config = prefill_config
         self._decode_config = decode_config
@@ -406,7 +554,15 @@ class LlmDecoder:
         self._page_cache = self._unified_batcher.get_page_cache()
         self._tokens_per_page = self._page_cache.tokens_per_page
         self._page_pool = self._page_cache.page_pool
+        self._preemption = self._unified_batcher.get_preemption_manager()
+        self._priority = priority
+        self._tenant = tenant
         self._results_callback = results_callback
+        # Token streaming is only possible without beam search, where the
+        # selected tokens are final as soon as they are selected.
+        self._stream_callback = (
+            stream_callback if decode_config.num_beams == 1 else None
+        )
         self._rid = rid
         self._lock = threading.Lock()
         self._cancelled = False
@@ -453,6 +609,9 @@ class LlmDecoder:
 
         for req in decode_reqs:
             req.start_position = len(prefill_req.input_token_ids)
+            req.decode_config = self._decode_config
+            req.priority = self._priority
+            req.tenant = self._tenant
             self._allocated_cach_recs[req.instance_id] = self._allocated_cach_recs[
                 prefill_req.instance_id
             ]
@@ -463,6 +622,8 @@ class LlmDecoder:
         prefill_req = LlmInferenceExecRequest(
             phase=InferencePhase.PREFILL, input_token_ids=input_ids, rid=self._rid
         )
+        prefill_req.priority = self._priority
+        prefill_req.tenant = self._tenant
 
         cached_allocation = self._page_cache.lookup(input_ids[: -self._tokens_per_page])
         if self._prefill_config.has_prefill_position:
@@ -498,15 +659,27 @@ class LlmDecoder:
         req.page_ids = []
         self._allocated_cach_recs[req.instance_id] = None
 
-    async def run(self, input_ids):
-        input_length = len(input_ids)
-        prefill_req = self.create_prefill_req(input_ids)
-        # Run Prefill:
+    async def _stream(self, tokens: List[int]):
+        if self._stream_callback is not None and len(tokens) > 0:
+            await self._stream_callback([int(token) for token in tokens])
+
+    async def _create_prefill_req(self, input_ids: List[int]):
+        while True:
+            try:
+                return self.create_prefill_req(input_ids)
+            except CacheAllocationFailure:
+                # Pages evicted to the host tier are free once copied.
+                if not await self._page_cache.complete_spills():
+                    raise
+
+    async def _prefill(self, input_ids: List[int]) -> LlmInferenceExecRequest:
+        prefill_req = await self._create_prefill_req(input_ids)
         self._unified_batcher.submit(prefill_req)
         await prefill_req.done
         self.publish_request(prefill_req, publish_incomplete_page=False)
+        return prefill_req
 
-        token_selector = TokenSelector(self._decode_config)
+    def _create_page_manager(self, prefill_req: LlmInferenceExecRequest):
         prefill_req_cache_info = self._allocated_cach_recs.get(
             prefill_req.instance_id, None
         )
@@ -517,7 +690,7 @@ class LlmDecoder:
 
         initial_pages = [p.index for p in prefill_req_cache_info.pages]
         initial_length = len(prefill_req.input_token_ids)
-        page_manager = PageManager(
+        return PageManager(
             self._page_cache,
             self._page_pool,
             initial_pages=initial_pages,
@@ -525,41 +698,133 @@ class LlmDecoder:
             tokens_per_page=self._tokens_per_page,
         )
 
+    def _release_decode_reqs(
+        self, decode_reqs: List[LlmInferenceExecRequest], page_manager: PageManager
+    ):
+        for req in decode_reqs:
+            self.publish_request(req, publish_incomplete_page=True)
+            self.free_req_cache(req)
+        page_manager.release_pages()
+
+    async def _suspend(
+        self,
+        handle: PreemptibleSequence,
+        prefill_req: LlmInferenceExecRequest,
+        decode_reqs: List[LlmInferenceExecRequest],
+        page_manager: PageManager,
+        sequence: List[int],
+    ):
+        """Releases the pages of a preempted sequence and restores them on resume.
+
+        The pages are published before they are released, so the prefill on
+        resume only recomputes the tokens evicted meanwhile.
+
+        Args:
+            sequence: Tokens held by the KV cache of the sequence.
+        """
+        self._unified_batcher.reserve_workload(
+            rid=prefill_req.orig_instance_id, count=0
+        )
+        self._release_decode_reqs(decode_reqs, page_manager)
+
+        while True:
+            if handle.preempt_requested:
+                await self._preemption.suspend(handle)
+            try:
+                prefill_req = await self._prefill(sequence)
+                break
+            except CacheAllocationFailure:
+                if not await self._preemption.make_room(handle):
+                    raise
+
+        page_manager = self._create_page_manager(prefill_req)
+        decode_reqs = self.create_decode_reqs(prefill_req)
+        return prefill_req, decode_reqs, page_manager
+
+    async def run(self, input_ids):
+        input_length = len(input_ids)
+        # Run Prefill:
+        prefill_req = await self._prefill(input_ids)
+
+        token_selector = TokenSelector(self._decode_config)
+        page_manager = self._create_page_manager(prefill_req)
+
         # Run token selection and send to emitter:
         beams, tokens = token_selector.step(
             [prefill_req.result_logits], [prefill_req.result_indices]
         )
+        await self._stream(tokens)
 
         # Setup decode requests:
         decode_reqs = self.create_decode_reqs(prefill_req)
 
-        # Run Decoder:
-        for _ in range(self._decode_config.max_completion_tokens - 1):
-            if token_selector.done() or self._cancelled or len(beams) == 0:
-                break
-
-            # Update the reqs:
-            to_run = page_manager.update_decode_reqs(
-                beams, decode_reqs, self._allocated_cach_recs, tokens, input_length
-            )
-
-            input_length = input_length + 1
-
-            self._unified_batcher.reserve_workload(
-                rid=prefill_req.orig_instance_id, count=len(to_run)
-            )
+        # Greedy sequences can be preempted when pages run out, and resumed
+        # by a prefill of the tokens held by their cache.
+        handle = None
+        if self._preemption is not None and self._decode_config.num_beams == 1:
+            handle = self._preemption.register(priority=self._priority)
+        sequence = list(input_ids)
+
+        try:
+            # Run Decoder:
+            for _ in range(self._decode_config.max_completion_tokens - 1):
+                if token_selector.done() or self._cancelled or len(beams) == 0:
+                    break
+
+                # Update the reqs:
+                while True:
+                    if handle is not None and handle.preempt_requested:
+                        prefill_req, decode_reqs, page_manager = await self._suspend(
+                            handle, prefill_req, decode_reqs, page_manager, sequence
+                        )
+                    try:
+                        to_run = page_manager.update_decode_reqs(
+                            beams,
+                            decode_reqs,
+                            self._allocated_cach_recs,
+                            tokens,
+                            input_length,
+                        )
+                        break
+                    except CacheAllocationFailure:
+                        # A failed update changed nothing, so it is retried
+                        # once the spilled pages were released.
+                        if await self._page_cache.complete_spills():
+                            continue
+                        if handle is None or not await self._preemption.make_room(
+                            handle
+                        ):
+                            raise
+
+                input_length = input_length + 1
+                if handle is not None:
+                    sequence.extend(tokens)
+
+                self._unified_batcher.reserve_workload(
+                    rid=prefill_req.orig_instance_id, count=len(to_run)
+                )
 
-            for req in to_run:
-                req.reset(InferencePhase.DECODE)
-                self._unified_batcher.submit(req)
+                for req, score in zip(to_run, token_selector.scores):
+                    req.reset(InferencePhase.DECODE)
+                    req.score = float(score)
+                    self._unified_batcher.submit(req)
 
-            gathered = asyncio.gather(*[req.done for req in to_run])
-            await gathered
+                gathered = asyncio.gather(*[req.done for req in to_run])
+                await gathered
 
-            beams, tokens = token_selector.step(
-                [req.result_logits for req in to_run],
-                [req.result_indices for req in to_run],
-            )
+                if all(req.result_candidates is not None for req in to_run):
+                    beams, tokens = token_selector.step_candidates(
+                        [req.result_candidates for req in to_run]
+                    )
+                else:
+                    beams, tokens = token_selector.step(
+                        [req.result_logits for req in to_run],
+                        [req.result_indices for req in to_run],
+                    )
+                await self._stream(tokens)
+        finally:
+            if handle is not None:
+                self._preemption.unregister(handle)
 
         # Remove the reservation:
         self._unified_batcher.reserve_workload(
@@ -572,7 +837,4 @@ class LlmDecoder:
         # Return Results:
         self._results_callback(completed)
 
-        for req in decode_reqs:
-            self.publish_request(req, publish_incomplete_page=True)
-            self.free_req_cache(req)
-        page_manager.release_pages()
+        self._release_decode_reqs(decode_reqs, page_manager)
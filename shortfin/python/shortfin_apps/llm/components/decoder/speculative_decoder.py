@@ -0,0 +1,509 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Speculative decoding.
+
+Up to `num_speculative_tokens` tokens are proposed, either by a small draft
+model (`DraftModelDecoder`) or by looking up continuations of the sequence in
+its own tokens and the prefix cache (`PromptLookupDecoder`). The target model
+then runs the last accepted token and all proposals through a single prefill
+invocation starting at the current position, keeps the longest prefix of
+proposals that matches its own greedy choices and adds the token it selects
+after that prefix. Every target invocation therefore yields between one and
+`num_speculative_tokens + 1` tokens, with the same output as greedy decoding
+of the target model.
+
+KV cache entries written for rejected proposals are rolled back through the
+`PageManager` of each model.
+"""
+
+import asyncio
+import logging
+import threading
+import numpy as np
+
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable, List, Optional
+
+from shortfin_apps.llm.components.batching.facade import BatchingFacade
+from shortfin_apps.llm.components.decode_config import DecodeConfig
+from shortfin_apps.llm.components.decoder.decoder import LlmDecoder, PageManager
+from shortfin_apps.llm.components.kvcache.base_attention_cache import (
+    CacheAllocationFailure,
+)
+from shortfin_apps.llm.components.messages import (
+    InferencePhase,
+    LlmInferenceExecRequest,
+)
+from shortfin_apps.llm.components.prefill_config import PrefillConfig
+
+logger = logging.getLogger(__name__)
+
+
+def greedy_tokens(logits: np.ndarray, indices: Optional[np.ndarray]) -> List[int]:
+    """Returns the greedy token of each row of `[n, d]` logits."""
+    positions = np.argmax(logits, axis=-1)
+    if indices is not None:
+        positions = np.take_along_axis(indices, positions[:, np.newaxis], axis=-1)
+        positions = positions[:, 0]
+    return [int(token) for token in positions]
+
+
+def accept_draft_tokens(draft_tokens: List[int], target_tokens: List[int]) -> List[int]:
+    """Returns the tokens accepted from a verified draft.
+
+    Args:
+        draft_tokens: The `k` proposed tokens.
+        target_tokens: The `k + 1` greedy tokens of the target model, after
+            the last accepted token and after each proposal.
+
+    Returns:
+        The longest matching prefix of `draft_tokens`, followed by the target
+        token after it.
+    """
+    accepted = 0
+    while (
+        accepted < len(draft_tokens)
+        and draft_tokens[accepted] == target_tokens[accepted]
+    ):
+        accepted += 1
+    return draft_tokens[:accepted] + [target_tokens[accepted]]
+
+
+def propose_ngram_tokens(
+    tokens: List[int], max_ngram_size: int, max_tokens: int
+) -> List[int]:
+    """Proposes the tokens that followed an earlier occurrence of the end of `tokens`.
+
+    The longest n-gram ending `tokens`, of at most `max_ngram_size` tokens,
+    that also occurs earlier in `tokens` is matched, and up to `max_tokens`
+    tokens following its most recent earlier occurrence are returned.
+    """
+    sequence = np.asarray(tokens)
+    for n in range(min(max_ngram_size, len(tokens) - 1), 0, -1):
+        # Windows of the sequence without its last token, so that every match
+        # is followed by at least one token.
+        windows = np.lib.stride_tricks.sliding_window_view(sequence[:-1], n)
+        matches = np.flatnonzero(np.all(windows == sequence[-n:], axis=-1))
+        if len(matches) > 0:
+            start = int(matches[-1]) + n
+            return list(tokens[start : start + max_tokens])
+    return []
+
+
+@dataclass
+class SpeculationStats:
+    """Counters describing the effectiveness of speculative decoding.
+
+    Attributes:
+        steps: Number of target model verifications
+        proposed_tokens: Number of tokens proposed for verification
+        accepted_tokens: Number of proposed tokens accepted
+    """
+
+    steps: int = 0
+    proposed_tokens: int = 0
+    accepted_tokens: int = 0
+
+    @property
+    def acceptance_rate(self) -> float:
+        return (
+            self.accepted_tokens / self.proposed_tokens if self.proposed_tokens else 0.0
+        )
+
+    @property
+    def tokens_per_step(self) -> float:
+        return (self.accepted_tokens + self.steps) / self.steps if self.steps else 0.0
+
+
+class SpeculationMetrics:
+    """Speculation counters shared by the decoders of a service."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = SpeculationStats()
+
+    def record(self, proposed_tokens: int, accepted_tokens: int):
+        with self._lock:
+            self.stats.steps += 1
+            self.stats.proposed_tokens += proposed_tokens
+            self.stats.accepted_tokens += accepted_tokens
+
+    def get_stats(self) -> SpeculationStats:
+        with self._lock:
+            return replace(self.stats)
+
+
+def _result_rows(req: LlmInferenceExecRequest, count: int) -> List[int]:
+    """Greedy tokens of the first `count` result positions of a request."""
+    logits = np.asarray(req.result_logits)
+    logits = logits.reshape(-1, logits.shape[-1])
+    indices = None
+    if req.result_indices is not None:
+        indices = np.asarray(req.result_indices)
+        indices = indices.reshape(-1, indices.shape[-1])
+    if logits.shape[0] < count:
+        raise RuntimeError(
+            "Speculative decoding requires a model returning the logits of all prefill positions."
+        )
+    return greedy_tokens(
+        logits[:count], indices[:count] if indices is not None else None
+    )
+
+
+class _Sequence:
+    """State of the decoded sequence in one model."""
+
+    def __init__(self, decoder: LlmDecoder, input_ids: List[int]):
+        self.decoder = decoder
+        self.input_ids = input_ids
+        self.prefill_req: Optional[LlmInferenceExecRequest] = None
+        self.req: Optional[LlmInferenceExecRequest] = None
+        self.page_manager: Optional[PageManager] = None
+
+    @property
+    def rid(self):
+        return self.prefill_req.orig_instance_id
+
+    async def submit_prefill(self):
+        self.prefill_req = await self.decoder._create_prefill_req(self.input_ids)
+        self.decoder._unified_batcher.submit(self.prefill_req)
+
+    def start(self):
+        """Sets up the request and pages for the steps after the prefill."""
+        decoder = self.decoder
+        decoder.publish_request(self.prefill_req, publish_incomplete_page=False)
+        cache_info = decoder._allocated_cach_recs.get(
+            self.prefill_req.instance_id, None
+        )
+        if not cache_info:
+            raise CacheAllocationFailure(
+                "No allocated cache info found for prefill request."
+            )
+
+        self.page_manager = PageManager(
+            decoder._page_cache,
+            decoder._page_pool,
+            initial_pages=[p.index for p in cache_info.pages],
+            initial_length=len(self.prefill_req.input_token_ids),
+            tokens_per_page=decoder._tokens_per_page,
+        )
+        self.req = decoder.create_decode_reqs(self.prefill_req)[0]
+
+    def extend(self, tokens: List[int]) -> int:
+        """Appends `tokens` to the cache, returning the position of the first."""
+        position = self.page_manager.position
+        self.req.page_ids = self.page_manager.extend(
+            self.req, self.decoder._allocated_cach_recs, tokens
+        )
+        self.req.start_position = position
+        return position
+
+    def rollback(self, count: int):
+        self.page_manager.rollback(self.req, self.decoder._allocated_cach_recs, count)
+
+    def release(self):
+        if self.req is not None:
+            self.decoder.publish_request(self.req, publish_incomplete_page=True)
+            self.decoder.free_req_cache(self.req)
+            self.page_manager.release_pages()
+        elif self.prefill_req is not None:
+            self.decoder.free_req_cache(self.prefill_req)
+
+
+class SpeculativeDecoder(LlmDecoder):
+    """Greedy decoder verifying proposed tokens with the target model.
+
+    Subclasses propose the tokens. Only used without beam search.
+    """
+
+    def __init__(
+        self,
+        prefill_config: PrefillConfig,
+        decode_config: DecodeConfig,
+        unified_batcher: BatchingFacade,
+        results_callback: Callable[[List[List[int]]], None],
+        rid,
+        num_speculative_tokens: int,
+        stream_callback: Optional[Callable[[List[int]], Awaitable[None]]] = None,
+        metrics: Optional[SpeculationMetrics] = None,
+        priority: int = 0,
+        tenant: Optional[str] = None,
+    ):
+        super().__init__(
+            prefill_config=prefill_config,
+            decode_config=decode_config,
+            unified_batcher=unified_batcher,
+            results_callback=results_callback,
+            rid=rid,
+            stream_callback=stream_callback,
+            priority=priority,
+            tenant=tenant,
+        )
+        assert decode_config.num_beams == 1, "Speculative decoding is greedy"
+        self._num_speculative_tokens = num_speculative_tokens
+        self._metrics = metrics
+
+    async def _start_proposer(self, input_ids: List[int]):
+        """Prepares proposals for a sequence, concurrently with its prefill."""
+        pass
+
+    async def _propose(self, tokens: List[int], k: int) -> List[int]:
+        """Proposes up to `k` tokens to follow `tokens`."""
+        ...
+
+    def _rollback_proposer(
+        self, tokens: List[int], proposals: List[int], accepted: List[int]
+    ):
+        """Drops the proposer state of rejected proposals."""
+        pass
+
+    def _release_proposer(self):
+        pass
+
+    async def _verify(
+        self, target: _Sequence, tokens: List[int], last: int, proposals: List[int]
+    ) -> List[int]:
+        req = target.req
+        req.reset(InferencePhase.PREFILL)
+        req.return_all_logits = True
+        start_position = target.extend([last] + proposals)
+        req.input_token_ids = tokens[:start_position] + [last] + proposals
+        self._unified_batcher.submit(req)
+        await req.done
+        if req.result_logits is None:
+            raise RuntimeError("Target verification failed")
+        return _result_rows(req, len(proposals) + 1)
+
+    async def _decode(self, target: _Sequence, last: int) -> List[int]:
+        """Runs a plain decode step, for steps without proposals."""
+        req = target.req
+        req.reset(InferencePhase.DECODE)
+        req.return_all_logits = False
+        req.input_token_ids = [last]
+        target.extend([last])
+        self._unified_batcher.submit(req)
+        await req.done
+        if req.result_logits is None:
+            raise RuntimeError("Target decode failed")
+        return _result_rows(req, 1)
+
+    def _switch_lane(
+        self,
+        target: _Sequence,
+        lane: Optional[InferencePhase],
+        phase: InferencePhase,
+    ) -> InferencePhase:
+        """Moves the reservation of `target` from `lane` to the lane of `phase`."""
+        if lane != phase:
+            if lane is not None:
+                self._unified_batcher.reserve_workload(
+                    rid=target.rid, count=0, phase=lane
+                )
+            self._unified_batcher.reserve_workload(rid=target.rid, count=1, phase=phase)
+        return phase
+
+    async def run(self, input_ids):
+        target = _Sequence(self, input_ids)
+        eos = self._eos_token
+        max_tokens = self._decode_config.max_completion_tokens
+        generated: List[int] = []
+        # Steps are verified in the prefill lane, or run as plain decode steps
+        # without proposals. The sequence is reserved in the lane of its step.
+        lane = None
+        try:
+            await target.submit_prefill()
+            await asyncio.gather(
+                target.prefill_req.done, self._start_proposer(input_ids)
+            )
+            if target.prefill_req.result_logits is None:
+                raise RuntimeError("Target prefill failed")
+            target.start()
+
+            generated.append(_result_rows(target.prefill_req, 1)[-1])
+            await self._stream([t for t in generated if t != eos])
+
+            while (
+                generated[-1] != eos
+                and len(generated) < max_tokens
+                and not self._cancelled
+            ):
+                tokens = input_ids + generated
+                k = min(self._num_speculative_tokens, max_tokens - len(generated) - 1)
+                proposals = []
+                if k > 0:
+                    proposals = await self._propose(tokens, k)
+
+                if proposals:
+                    lane = self._switch_lane(target, lane, InferencePhase.PREFILL)
+                    target_tokens = await self._verify(
+                        target, tokens, generated[-1], proposals
+                    )
+                else:
+                    lane = self._switch_lane(target, lane, InferencePhase.DECODE)
+                    target_tokens = await self._decode(target, generated[-1])
+                accepted = accept_draft_tokens(proposals, target_tokens)
+                logger.debug(
+                    "Accepted %d of %d proposals", len(accepted) - 1, len(proposals)
+                )
+                if self._metrics is not None:
+                    self._metrics.record(len(proposals), len(accepted) - 1)
+
+                # Drop the cache entries of rejected proposals.
+                target.rollback(len(proposals) + 1 - len(accepted))
+                self._rollback_proposer(tokens, proposals, accepted)
+
+                if eos in accepted:
+                    accepted = accepted[: accepted.index(eos) + 1]
+                accepted = accepted[: max_tokens - len(generated)]
+                generated.extend(accepted)
+                await self._stream([t for t in accepted if t != eos])
+        finally:
+            if lane is not None:
+                self._unified_batcher.reserve_workload(
+                    rid=target.rid, count=0, phase=lane
+                )
+            target.release()
+            self._release_proposer()
+
+        self._results_callback([generated])
+
+
+class DraftModelDecoder(SpeculativeDecoder):
+    """Speculative decoder proposing the greedy tokens of a draft model."""
+
+    def __init__(
+        self,
+        prefill_config: PrefillConfig,
+        decode_config: DecodeConfig,
+        unified_batcher: BatchingFacade,
+        draft_batcher: BatchingFacade,
+        results_callback: Callable[[List[List[int]]], None],
+        rid,
+        num_speculative_tokens: int,
+        stream_callback: Optional[Callable[[List[int]], Awaitable[None]]] = None,
+        metrics: Optional[SpeculationMetrics] = None,
+        priority: int = 0,
+        tenant: Optional[str] = None,
+    ):
+        super().__init__(
+            prefill_config=prefill_config,
+            decode_config=decode_config,
+            unified_batcher=unified_batcher,
+            results_callback=results_callback,
+            rid=rid,
+            num_speculative_tokens=num_speculative_tokens,
+            stream_callback=stream_callback,
+            metrics=metrics,
+            priority=priority,
+            tenant=tenant,
+        )
+        # The draft model is only run through its decode entrypoints after
+        # the prefill, so it does not need prefill positions.
+        self._draft = LlmDecoder(
+            prefill_config=PrefillConfig(has_prefill_position=False),
+            decode_config=decode_config,
+            unified_batcher=draft_batcher,
+            results_callback=lambda _: None,
+            rid=rid,
+            priority=priority,
+            tenant=tenant,
+        )
+        self._draft_sequence: Optional[_Sequence] = None
+
+    async def _start_proposer(self, input_ids: List[int]):
+        draft = _Sequence(self._draft, input_ids)
+        self._draft_sequence = draft
+        await draft.submit_prefill()
+        await draft.prefill_req.done
+        if draft.prefill_req.result_logits is None:
+            raise RuntimeError("Draft prefill failed")
+        draft.start()
+        self._draft._unified_batcher.reserve_workload(rid=draft.rid, count=1)
+
+    async def _draft_step(self, token: int) -> int:
+        draft = self._draft_sequence
+        req = draft.req
+        req.reset(InferencePhase.DECODE)
+        req.input_token_ids = [token]
+        draft.extend([token])
+        self._draft._unified_batcher.submit(req)
+        await req.done
+        if req.result_logits is None:
+            raise RuntimeError("Draft decode failed")
+        return _result_rows(req, 1)[0]
+
+    async def _propose(self, tokens: List[int], k: int) -> List[int]:
+        # Tokens the draft model has not seen yet are fed to it first.
+        for token in tokens[self._draft_sequence.page_manager.position :]:
+            proposal = await self._draft_step(token)
+        proposals = [proposal]
+        while len(proposals) < k:
+            proposals.append(await self._draft_step(proposals[-1]))
+        return proposals
+
+    def _rollback_proposer(
+        self, tokens: List[int], proposals: List[int], accepted: List[int]
+    ):
+        if not proposals:
+            return
+        # The draft model ran all proposals but the last.
+        draft = self._draft_sequence
+        valid = len(tokens) + min(len(accepted) - 1, len(proposals) - 1)
+        draft.rollback(draft.page_manager.position - valid)
+
+    def _release_proposer(self):
+        draft = self._draft_sequence
+        if draft is None:
+            return
+        if draft.req is not None:
+            self._draft._unified_batcher.reserve_workload(rid=draft.rid, count=0)
+        draft.release()
+
+
+class PromptLookupDecoder(SpeculativeDecoder):
+    """Speculative decoder proposing continuations found without a draft model.
+
+    The prefix cache is searched first for tokens that followed the whole
+    sequence in an earlier request, then the sequence itself for tokens that
+    followed an earlier occurrence of its last n-gram. This pays off where
+    outputs copy spans of their prompt, as in code edits or summaries.
+    """
+
+    def __init__(
+        self,
+        prefill_config: PrefillConfig,
+        decode_config: DecodeConfig,
+        unified_batcher: BatchingFacade,
+        results_callback: Callable[[List[List[int]]], None],
+        rid,
+        num_speculative_tokens: int,
+        max_ngram_size: int,
+        stream_callback: Optional[Callable[[List[int]], Awaitable[None]]] = None,
+        metrics: Optional[SpeculationMetrics] = None,
+        priority: int = 0,
+        tenant: Optional[str] = None,
+    ):
+        super().__init__(
+            prefill_config=prefill_config,
+            decode_config=decode_config,
+            unified_batcher=unified_batcher,
+            results_callback=results_callback,
+            rid=rid,
+            num_speculative_tokens=num_speculative_tokens,
+            stream_callback=stream_callback,
+            metrics=metrics,
+            priority=priority,
+            tenant=tenant,
+        )
+        self._max_ngram_size = max_ngram_size
+
+    async def _propose(self, tokens: List[int], k: int) -> List[int]:
+        proposals = self._page_cache.lookup_continuation(tokens, k)
+        if not proposals:
+            proposals = propose_ngram_tokens(tokens, self._max_ngram_size, k)
+        return proposals
@@ -4,10 +4,16 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
+import logging
 import threading
 
+from dataclasses import dataclass, replace
+from typing import Dict, List, Sequence, Tuple
+
 import shortfin.array as sfnp
 
+logger = logging.getLogger(__name__)
+
 
 class Allocation:
     def __init__(self, *, device, host, cache, key):
@@ -162,3 +168,112 @@ class DeviceArrayCache:
         with self._cache_lock:
             del self._cache
             self._cache = {}
+
+
+@dataclass
+class ArgumentArenaStats:
+    """Counters of an `ArgumentArena`.
+
+    Attributes:
+        allocations: Number of `allocate` calls
+        reuses: Allocations served by a buffer already held by the arena
+        stalls: Allocations that had to allocate a new buffer
+        allocated_bytes: Total bytes held by the arena on each of host and device
+    """
+
+    allocations: int = 0
+    reuses: int = 0
+    stalls: int = 0
+    allocated_bytes: int = 0
+
+    @property
+    def reuse_rate(self) -> float:
+        return self.reuses / self.allocations if self.allocations else 0.0
+
+
+class ArgumentArena:
+    """Persistent device/host buffer pairs for invocation arguments.
+
+    Buffers are bucketed by power-of-two byte size. `allocate` returns arrays
+    of the requested shape viewing a free buffer pair of the smallest bucket
+    that fits, or of a slightly larger bucket if that one is empty, so varying
+    batch sequence lengths keep reusing the same buffers. A new buffer pair is
+    only allocated (an allocation stall) when no suitable one is free. Buffers
+    are kept until `free`.
+
+    It is a drop-in replacement for `DeviceArrayCache`.
+    """
+
+    MIN_BUCKET_BYTES = 256
+
+    # How many buckets above the best fitting one may serve an allocation.
+    MAX_BUCKET_UPSIZE = 2
+
+    def __init__(self, device):
+        self._device = device
+        self._lock = threading.Lock()
+        self._free: Dict[int, List[Tuple[sfnp.storage, sfnp.storage]]] = {}
+        self.stats = ArgumentArenaStats()
+
+    def _bucket_bytes(self, byte_count: int) -> int:
+        return max(self.MIN_BUCKET_BYTES, 1 << (byte_count - 1).bit_length())
+
+    def _allocate_buffers(self, bucket_bytes: int) -> Tuple[sfnp.storage, sfnp.storage]:
+        self.stats.allocated_bytes += bucket_bytes
+        return (
+            sfnp.storage.allocate_device(self._device, bucket_bytes),
+            sfnp.storage.allocate_host(self._device, bucket_bytes),
+        )
+
+    def preallocate(
+        self, shapes: Sequence[Sequence[int]], dtype: sfnp.DType, count: int = 1
+    ) -> None:
+        """Allocate `count` buffer pairs for each of `shapes` ahead of time."""
+        with self._lock:
+            for shape in shapes:
+                bucket_bytes = self._bucket_bytes(dtype.compute_dense_nd_size(shape))
+                free = self._free.setdefault(bucket_bytes, [])
+                for _ in range(count):
+                    free.append(self._allocate_buffers(bucket_bytes))
+
+    def allocate(self, shape, dtype) -> Allocation:
+        shape = list(shape)
+        bucket_bytes = self._bucket_bytes(dtype.compute_dense_nd_size(shape))
+        with self._lock:
+            stats = self.stats
+            stats.allocations += 1
+            for upsize in range(self.MAX_BUCKET_UPSIZE + 1):
+                key = bucket_bytes << upsize
+                free = self._free.get(key)
+                if free:
+                    buffers = free.pop()
+                    stats.reuses += 1
+                    break
+            else:
+                key = bucket_bytes
+                buffers = self._allocate_buffers(bucket_bytes)
+                stats.stalls += 1
+                logger.debug(
+                    "Argument arena stall: allocated %d bytes for %r", key, shape
+                )
+
+        device_storage, host_storage = buffers
+        return Allocation(
+            device=sfnp.device_array(device_storage, shape, dtype),
+            host=sfnp.device_array(host_storage, shape, dtype),
+            cache=self,
+            key=(key, buffers),
+        )
+
+    def release(self, allocation: Allocation):
+        key, buffers = allocation.key
+        with self._lock:
+            self._free.setdefault(key, []).append(buffers)
+
+    def get_stats(self) -> ArgumentArenaStats:
+        with self._lock:
+            return replace(self.stats)
+
+    def free(self):
+        with self._lock:
+            self._free = {}
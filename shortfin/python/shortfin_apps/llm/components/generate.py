@@ -9,10 +9,11 @@ import dataclasses
 import io
 import json
 import logging
+import time
 import traceback
 
 from copy import deepcopy
-from typing import List
+from typing import List, Optional
 
 import shortfin as sf
 import threading
@@ -20,6 +21,10 @@ import threading
 # TODO: Have a generic "Responder" interface vs just the concrete impl.
 from shortfin.support.responder import AbstractResponder, ResponderErrorCodes
 from shortfin_apps.llm.components.decoder.decoder import LlmDecoder, LogitsNormalization
+from shortfin_apps.llm.components.decoder.speculative_decoder import (
+    DraftModelDecoder,
+    PromptLookupDecoder,
+)
 
 from .config_struct import DecodeConfig
 from .io_struct import (
@@ -31,11 +36,92 @@ from .io_struct import (
 from .prefill_config import PrefillConfig
 from .service import LlmGenerateService
 
-from .tokenizer import Encoding
+from .tokenizer import Encoding, Tokenizer
 
 logger = logging.getLogger(__name__)
 
 
+# Decode steps that may wait to be sent before a streaming decoder blocks.
+STREAM_QUEUE_SIZE = 32
+
+
+class TokenStreamer:
+    """Streams the tokens of one generation to a responder as they are selected.
+
+    The decoder pushes the tokens of each step into a bounded queue, which a
+    separate task drains, detokenizes and sends as server-sent events. Both
+    run on the same fiber, so detokenizing still takes time from decoding;
+    the queue only lets the decoder go on while parts wait for the client.
+    After each part, the task waits until the responder has room for more,
+    so a slow client fills the queue and the decoder blocks once
+    `max_pending_steps` steps are waiting to be sent.
+    Without a tokenizer, the token ids of each step are sent as a JSON list.
+    """
+
+    def __init__(
+        self,
+        responder: AbstractResponder,
+        tokenizer: Optional[Tokenizer],
+        max_pending_steps: int = STREAM_QUEUE_SIZE,
+    ):
+        self._responder = responder
+        self._tokenizer = tokenizer
+        self._queue = asyncio.Queue(maxsize=max_pending_steps)
+        self._token_ids: list[int] = []
+        self._prefix_offset = 0
+        self._read_offset = 0
+        self._stopped = False
+
+    async def put(self, tokens: list[int]):
+        if not self._stopped:
+            await self._queue.put(tokens)
+
+    async def close(self):
+        if not self._stopped:
+            await self._queue.put(None)
+
+    def _detokenize(self, tokens: list[int]) -> str:
+        """Returns the text added by `tokens`.
+
+        Only the last few tokens are decoded, together with the tokens before
+        them, so that tokenizers joining or merging tokens produce the same
+        text as when decoding the whole sequence.
+        """
+        self._token_ids.extend(tokens)
+        prefix_text, text = self._tokenizer.decode(
+            [
+                self._token_ids[self._prefix_offset : self._read_offset],
+                self._token_ids[self._prefix_offset :],
+            ]
+        )
+        # Hold back text ending in an incomplete multi-byte character.
+        if len(text) <= len(prefix_text) or text.endswith("\ufffd"):
+            return ""
+
+        self._prefix_offset = self._read_offset
+        self._read_offset = len(self._token_ids)
+        return text[len(prefix_text) :]
+
+    async def run(self):
+        try:
+            while (tokens := await self._queue.get()) is not None:
+                if self._tokenizer is None:
+                    content = json.dumps(tokens)
+                else:
+                    content = self._detokenize(tokens)
+                    if not content:
+                        continue
+                self._responder.stream_part(f"data: {content}\n\n".encode())
+                await self._responder.wait_for_stream_capacity()
+        except Exception:
+            # Stop accepting tokens and empty the queue, so that the decoder
+            # never blocks on a queue that is no longer drained.
+            logger.error(traceback.format_exc())
+            self._stopped = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+
+
 class GenerateItemProcess(sf.Process):
     def __init__(
         self,
@@ -49,6 +135,13 @@ class GenerateItemProcess(sf.Process):
         decode_config: DecodeConfig,
         fiber: sf.Fiber,
         use_native_impls: bool = False,
+        streamer: Optional[TokenStreamer] = None,
+        draft_batcher=None,
+        num_speculative_tokens: int = 0,
+        prompt_lookup_ngram_size: int = 0,
+        speculation_metrics=None,
+        priority: int = 0,
+        tenant: Optional[str] = None,
     ):
         super().__init__(fiber=fiber)
         self.rid = rid
@@ -58,24 +151,64 @@ class GenerateItemProcess(sf.Process):
         self._prefill_config = prefill_config
         self.decode_config = decode_config
         self.cache = page_cache
-        self.decoder = LlmDecoder(
-            prefill_config=prefill_config,
-            decode_config=decode_config,
-            unified_batcher=unified_batcher,
-            results_callback=self.results_callback,
-            rid=self.rid,
-            use_native_impls=use_native_impls,
-        )
+        self.streamer = streamer
+        stream_callback = streamer.put if streamer is not None else None
+        if draft_batcher is not None and decode_config.num_beams == 1:
+            self.decoder = DraftModelDecoder(
+                prefill_config=prefill_config,
+                decode_config=decode_config,
+                unified_batcher=unified_batcher,
+                draft_batcher=draft_batcher,
+                results_callback=self.results_callback,
+                rid=self.rid,
+                num_speculative_tokens=num_speculative_tokens,
+                stream_callback=stream_callback,
+                metrics=speculation_metrics,
+                priority=priority,
+                tenant=tenant,
+            )
+        elif prompt_lookup_ngram_size > 0 and decode_config.num_beams == 1:
+            self.decoder = PromptLookupDecoder(
+                prefill_config=prefill_config,
+                decode_config=decode_config,
+                unified_batcher=unified_batcher,
+                results_callback=self.results_callback,
+                rid=self.rid,
+                num_speculative_tokens=num_speculative_tokens,
+                max_ngram_size=prompt_lookup_ngram_size,
+                stream_callback=stream_callback,
+                metrics=speculation_metrics,
+                priority=priority,
+                tenant=tenant,
+            )
+        else:
+            self.decoder = LlmDecoder(
+                prefill_config=prefill_config,
+                decode_config=decode_config,
+                unified_batcher=unified_batcher,
+                results_callback=self.results_callback,
+                rid=self.rid,
+                use_native_impls=use_native_impls,
+                stream_callback=stream_callback,
+                priority=priority,
+                tenant=tenant,
+            )
 
     def cancel(self):
         self.decoder.cancel()
 
     async def run(self):
+        stream_task = None
+        if self.streamer is not None:
+            stream_task = asyncio.create_task(self.streamer.run())
         try:
             await self.decoder.run(input_ids=self.input_token_ids)
         except Exception:
             logger.error(traceback.format_exc())
         finally:
+            if stream_task is not None:
+                await self.streamer.close()
+                await stream_task
             self.decoder.release()
 
     def results_callback(self, result: list[list[int]]):
@@ -99,6 +232,7 @@ class ClientGenerateBatchProcess(sf.Process):
         "unified_batcher",
         "responder",
         "tokenizer",
+        "tokenization_pool",
         "decode_config",
         "service",
     ]
@@ -115,6 +249,7 @@ class ClientGenerateBatchProcess(sf.Process):
         self.gen_req = gen_req
         self.responder = responder
         self.tokenizer = service.tokenizer
+        self.tokenization_pool = service.tokenization_pool
         self.unified_batcher = self.service.unified_batcher
         self.complete_infeed = self.system.create_queue()
         self.active_processes = []
@@ -135,7 +270,7 @@ class ClientGenerateBatchProcess(sf.Process):
     def get_decode_configs(self) -> List[DecodeConfig]:
         """Calculate the total number of beams requested in the generation request."""
         gen_req = self.gen_req
-        base_config = self.service.server_params.decode_config
+        base_config = self.service.decode_config
         eos_token_id = self.tokenizer.eos_token_id
 
         sampling_params_list = (
@@ -168,17 +303,17 @@ class ClientGenerateBatchProcess(sf.Process):
 
     async def run(self):
         logger.debug("Started ClientBatchGenerateProcess: %r", self)
+        start = time.monotonic()
 
         prefill_config = self.get_prefill_config()
         decode_configs = self.get_decode_configs()
 
         input_ids = self.gen_req.input_ids
         is_pretokenized = input_ids is not None
-        # TODO: We should send this to an executor and await the results.
         if is_pretokenized:
             input_batch = [input_ids] if self.gen_req.is_single else input_ids
         else:
-            input_batch = self.tokenize()
+            input_batch = await self.tokenize()
 
         for config in decode_configs:
             if not self.validate_decode_config(self.responder, config):
@@ -186,15 +321,27 @@ class ClientGenerateBatchProcess(sf.Process):
 
         # Try to add request to queue
         # TODO(@zphoenixrises): Add load testing and integration tests for this.
-        run_request = self.service.queue_manager.add_to_queue(
+        run_request = await self.service.queue_manager.wait_for_admission(
             decode_configs=decode_configs,
             input_batch=input_batch,
             is_pretokenized=is_pretokenized,
             responder=self.responder,
+            priority=self.gen_req.priority,
         )
         if run_request is None:
             return
+        admission_wait_s = time.monotonic() - start
+
+        # Tokens are streamed for single prompts without beam search.
+        streaming = (
+            self.gen_req.stream
+            and self.gen_req.is_single
+            and decode_configs[0].num_beams == 1
+        )
+        if streaming:
+            self.responder.stream_start(media_type="text/event-stream")
 
+        completion_tokens = None
         try:
             indices = []
             # Launch all individual generate processes and wait for them to finish.
@@ -227,6 +374,20 @@ class ClientGenerateBatchProcess(sf.Process):
                     decode_config=decode_config,
                     fiber=fiber,
                     use_native_impls=self.service.server_params.use_native_impls,
+                    draft_batcher=self.service.draft_batcher,
+                    num_speculative_tokens=self.service.server_params.num_speculative_tokens,
+                    prompt_lookup_ngram_size=self.service.server_params.prompt_lookup_ngram_size,
+                    speculation_metrics=self.service.speculation_metrics,
+                    priority=self.gen_req.priority,
+                    tenant=self.gen_req.tenant,
+                    streamer=(
+                        TokenStreamer(
+                            self.responder,
+                            None if self.gen_req.return_input_ids else self.tokenizer,
+                        )
+                        if streaming
+                        else None
+                    ),
                 )
 
                 gen_processes.append(gen_process)
@@ -240,22 +401,37 @@ class ClientGenerateBatchProcess(sf.Process):
                 self.active_processes = gen_processes
 
             await asyncio.gather(*gen_processes)
-            if self.cancelled:
+            if not self.cancelled:
+                completion_tokens = [
+                    max((len(beam) for beam in p.result_token_ids), default=0)
+                    for p in gen_processes
+                ]
+            if streaming:
+                self.responder.stream_part(None)
+            elif self.cancelled:
                 self.responder.send_error(
                     error_message="Request cancelled",
                     code=ResponderErrorCodes.CANCELLED,
                     extra_fields={},
                 )
             else:
-                self.generate_response(gen_processes)
+                await self.generate_response(gen_processes)
         except Exception:
             logger.error(traceback.format_exc())
         finally:
             self.service.main_fiber_pool.return_fiber(indices)
             self.responder.ensure_response()
-            self.service.queue_manager.remove_from_queue(run_request)
+            self.service.queue_manager.remove_from_queue(
+                run_request, completion_tokens=completion_tokens
+            )
+            self.service.latency_metrics.record(
+                priority=self.gen_req.priority,
+                tenant=self.gen_req.tenant,
+                admission_wait_s=admission_wait_s,
+                end_to_end_s=time.monotonic() - start,
+            )
 
-    def generate_response(
+    async def generate_response(
         self,
         gen_processes: List[GenerateItemProcess],
     ):
@@ -267,12 +443,18 @@ class ClientGenerateBatchProcess(sf.Process):
             self.responder.send_response(result_tokens)
             return
 
-        response_map = {p.input_text: [] for p in gen_processes}
+        # Detokenization and serialization run on the tokenization pool.
+        results = [(p.input_text, p.result_token_ids) for p in gen_processes]
+        response = await self.tokenization_pool.run(self.encode_response, results)
+        self.responder.send_response(response)
+
+    def encode_response(self, results: List[tuple[str, list[list[int]]]]) -> bytes:
+        response_map = {input_text: [] for input_text, _ in results}
 
-        for p in gen_processes:
-            decoded = self.tokenizer.decode(p.result_token_ids)
+        for input_text, result_token_ids in results:
+            decoded = self.tokenizer.decode(result_token_ids)
             rs = [GeneratedResponse(d) for d in decoded]
-            response_map[p.input_text] += rs
+            response_map[input_text] += rs
 
         responses = []
         for k in response_map:
@@ -285,9 +467,9 @@ class ClientGenerateBatchProcess(sf.Process):
         response = json.dumps(response)
         out = io.BytesIO()
         out.write(response.encode())
-        self.responder.send_response(out.getvalue())
+        return out.getvalue()
 
-    def tokenize(self) -> list[Encoding]:
+    async def tokenize(self) -> list[Encoding]:
         gen_req = self.gen_req
         if gen_req.text is not None:
             if self.gen_req.is_single:
@@ -296,7 +478,7 @@ class ClientGenerateBatchProcess(sf.Process):
             else:
                 texts = self.gen_req.text
                 logger.debug("Encoding batch of %d", len(texts))
-            encodings = self.tokenizer.encode(texts)
+            encodings = await self.tokenization_pool.encode(texts)
             logger.debug("Generated encodings: %r", encodings)
             return encodings
         else:
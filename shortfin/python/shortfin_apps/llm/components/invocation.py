@@ -6,10 +6,9 @@ import shortfin.array as sfnp
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from itertools import chain
 from typing import List, Optional, Tuple, Union
 
-from .buffers import copy_buffers_to_host, create_argument_buffers
+from .buffers import copy_buffers_to_host, pack_argument_buffers
 from .device_array_cache import Allocation, DeviceArrayCache, WrappedAllocation
 from .messages import LlmInferenceExecRequest
 
@@ -26,6 +25,9 @@ class LlmTaskInput:
     input_tokens: Tuple[int, ...] = field(default_factory=tuple)
     page_ids: Tuple[int, ...] = field(default_factory=tuple)
     start_position: Optional[int] = None
+    # Scheduling class of the request, see `scheduler.WeightedFairQueue`.
+    priority: int = 0
+    tenant: Optional[str] = None
 
 
 class LlmTaskResponder(ABC):
@@ -178,12 +180,10 @@ class PrefillTask(LlmTask):
         max_start_position = max(
             task_input.start_position for task_input in task_inputs
         )
-        # Number of blocks we're writing to
-        write_block_span = batch_seq_len // seq_stride
-        # Calculate block offset based on the maximum start position
-        max_block_start = max_start_position // seq_stride
-        # Prevent overflow in write page ids
-        block_count = max_block_start + write_block_span
+        # Prevent overflow in write page ids. The start position is not
+        # necessarily page aligned (e.g. after a sub-page prefix match), in
+        # which case the written span can reach into one extra block.
+        block_count = math.ceil((max_start_position + batch_seq_len) / seq_stride)
         return block_count
 
     async def prepare_args(
@@ -206,9 +206,6 @@ class PrefillTask(LlmTask):
         """
         task_inputs = self._task_inputs
 
-        tokens = [list(task_input.input_tokens) for task_input in task_inputs]
-        page_ids = [list(task_input.page_ids) for task_input in task_inputs]
-
         batch_seq_len = self._get_batch_seq_len(task_inputs)
         block_count = self._get_block_count(batch_seq_len, task_inputs)
 
@@ -233,18 +230,13 @@ class PrefillTask(LlmTask):
             logger.error(error_msg)
             raise RuntimeError(error_msg) from e
 
-        # Prepare data for argument buffers
-        tokens_data = list(
-            chain.from_iterable(_pad_list(t, batch_seq_len) for t in tokens)
-        )
+        # Prepare data for argument buffers. Token and page id rows are padded
+        # in place by `pack_argument_buffers`.
+        tokens_data = [task_input.input_tokens for task_input in task_inputs]
 
         seq_lens_data = [task_input.seq_len for task_input in task_inputs]
 
-        seq_block_ids_data = list(
-            chain.from_iterable(
-                _pad_list(pages, target_length=block_count) for pages in page_ids
-            )
-        )
+        seq_block_ids_data = [task_input.page_ids for task_input in task_inputs]
 
         buffers = [tokens_allocation]
         data = [tokens_data]
@@ -272,7 +264,7 @@ class PrefillTask(LlmTask):
         data.extend([seq_lens_data, seq_block_ids_data])
         defaults.extend([1, 0])
 
-        args = create_argument_buffers(
+        args = pack_argument_buffers(
             buffers=buffers,
             data=data,
             defaults=defaults,
@@ -327,9 +319,7 @@ class DecodeTask(LlmTask):
         # up to the seq_stride.
         task_inputs = self._task_inputs
 
-        tokens = [list(task_input.input_tokens) for task_input in task_inputs]
         start_positions = [task_input.start_position for task_input in task_inputs]
-        page_ids = [list(task_input.page_ids) for task_input in task_inputs]
 
         block_count = max(task_input.block_count for task_input in task_inputs)
         logger.debug("Decode bs=%d", self.req_count)
@@ -351,15 +341,13 @@ class DecodeTask(LlmTask):
             raise RuntimeError(error_msg) from e
 
         # Prepare data for argument buffers
-        tokens_data = list(chain.from_iterable(t[-1:] for t in tokens))
+        tokens_data = [task_input.input_tokens[-1:] for task_input in task_inputs]
 
         seq_lens_data = [task_input.seq_len for task_input in task_inputs]
 
-        seq_block_ids_data = list(
-            chain.from_iterable(_pad_list(pages, block_count) for pages in page_ids)
-        )
+        seq_block_ids_data = [task_input.page_ids for task_input in task_inputs]
 
-        args = create_argument_buffers(
+        args = pack_argument_buffers(
             buffers=[
                 tokens_allocation,
                 seq_lens_allocation,
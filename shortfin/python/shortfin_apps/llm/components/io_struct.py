@@ -94,6 +94,12 @@ class GenerateReqInput:
     stream: bool = False
     # The modalities of the image data [image, multi-images, video]
     modalities: Optional[List[str]] = None
+    # The model to generate with, see `--models`. The default model if not set.
+    model: Optional[str] = None
+    # The priority class. Lower values are scheduled first.
+    priority: int = 0
+    # The tenant whose share of the server the request is scheduled in.
+    tenant: Optional[str] = None
 
     is_single: bool = True
 
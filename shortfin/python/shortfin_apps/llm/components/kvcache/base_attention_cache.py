@@ -68,6 +68,14 @@ class BasePagedAttentionCache:
     def free_pages(self, pages: List[PageInfo]):
         self.page_pool.free_pages(pages)
 
+    async def complete_spills(self) -> int:
+        """Release evicted pages once the copies made of them completed.
+
+        Returns:
+            The number of pages released to the pool.
+        """
+        return 0
+
     def lookup(self, tokens: List[int]) -> CacheInfo:
         return CacheInfo(
             num_tokens=0,
@@ -77,6 +85,14 @@ class BasePagedAttentionCache:
             last_cached_node=None,
         )
 
+    def cached_prefix_length(self, tokens: List[int]) -> int:
+        """Returns how many leading `tokens` are held by cached pages."""
+        return 0
+
+    def lookup_continuation(self, tokens: List[int], max_tokens: int) -> List[int]:
+        """Returns up to `max_tokens` cached tokens that followed `tokens`."""
+        return []
+
     def get_allocated_pages(self, page_ids: List[int]) -> List[PageInfo]:
         pages = []
         for page in self._allocated_pages:
@@ -103,7 +119,7 @@ class BasePagedAttentionCache:
         if pages is None:
             msg = (
                 f"FATAL CacheAllocationFailure: Failed to allocate {pages_needed} pages from `PagePool`.\n"
-                f"Required pages: {pages_needed}, Available pages: {len(self.page_pool.available_pages)}, Total pages: {self.page_pool.config.alloc_page_count}\n"
+                f"Required pages: {pages_needed}, Available pages: {self.page_pool.available_page_count()}, Total pages: {self.page_pool.config.alloc_page_count}\n"
                 f"Consider re-exporting the model with a higher `--device-block-count` value."
             )
             logger.error(msg)
@@ -0,0 +1,135 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Prefix cache keyed by a hash chain over token blocks.
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .host_page_store import HostPageStore
+from .page_pool import PageInfo, PagePool
+from .trie_attention_cache import TrieNode, TriePagedAttentionCache
+
+logger = logging.getLogger(__name__)
+
+
+# Hash of the (empty) prefix that every chain starts from.
+ROOT_BLOCK_HASH = 0
+
+
+def block_hash(parent_hash: int, tokens: Tuple[int, ...]) -> int:
+    """Hash of a token block chained to the hash of the prefix before it.
+
+    Hashes of ints and tuples of ints are not randomized per process, so the
+    same prefix produces the same chain of hashes across services.
+    """
+    return hash((parent_hash, tokens))
+
+
+def compute_block_hashes(tokens: List[int], tokens_per_page: int) -> List[int]:
+    """Compute the chained hash of every page-sized block of `tokens`.
+
+    A trailing partial block is hashed as well.
+    """
+    tokens = tuple(tokens)
+    hashes = []
+    parent_hash = ROOT_BLOCK_HASH
+    for i in range(0, len(tokens), tokens_per_page):
+        parent_hash = block_hash(parent_hash, tokens[i : i + tokens_per_page])
+        hashes.append(parent_hash)
+    return hashes
+
+
+class HashedPagedAttentionCache(TriePagedAttentionCache):
+    """Prefix cache that finds pages through a flat hash table.
+
+    Every published page is keyed by `block_hash(parent_hash, tokens)`, where
+    `parent_hash` is the key of the page before it. All keys live in a single
+    dict, so matching a prefix costs one hash and one dict probe per page, and
+    a page can be found from its key alone without walking from the root.
+    Each probed page's tokens are compared too, so a hash collision falls
+    back to the trie children instead of matching another prompt's page.
+
+    The trie nodes are kept alongside the table; they carry the reference
+    counts and LRU state used for allocation, publishing and eviction, which
+    are inherited unchanged from `TriePagedAttentionCache`.
+    """
+
+    def __init__(
+        self,
+        page_pool: PagePool,
+        tokens_per_page: int,
+        host_store: Optional[HostPageStore] = None,
+    ):
+        super().__init__(page_pool, tokens_per_page, host_store)
+        self._blocks: Dict[int, TrieNode] = {}
+        self._node_hashes: Dict[TrieNode, int] = {}
+
+    def _create_child(
+        self, parent: TrieNode, tokens: Tuple[int, ...], page: PageInfo
+    ) -> TrieNode:
+        node = super()._create_child(parent, tokens, page)
+        if node not in self._node_hashes:
+            parent_hash = self._node_hashes.get(parent, ROOT_BLOCK_HASH)
+            node_hash = block_hash(parent_hash, tokens)
+            self._node_hashes[node] = node_hash
+            # On a (very unlikely) hash collision the first node keeps the
+            # slot; `match` falls back to the trie edge for the other one.
+            self._blocks.setdefault(node_hash, node)
+        return node
+
+    def _unlink_node(self, node: TrieNode) -> None:
+        node_hash = self._node_hashes.pop(node, None)
+        if node_hash is not None and self._blocks.get(node_hash) is node:
+            del self._blocks[node_hash]
+        super()._unlink_node(node)
+
+    def find_block(self, node_hash: int) -> Optional[PageInfo]:
+        """Return the cached page for a block hash, if present."""
+        with self._lock:
+            node = self._blocks.get(node_hash)
+            return node.page if node is not None else None
+
+    def match(self, tokens: List[int]) -> Tuple[TrieNode, List[PageInfo]]:
+        """
+        Find the longest prefix match through the block hash table.
+
+        Args:
+            tokens: Sequence of tokens to match
+
+        Returns:
+            Tuple of (last matched node, list of matched pages)
+        """
+        tokens = tuple(tokens)
+        matched_pages = []
+        cur = self.root
+        blocks = self._blocks
+        parent_hash = ROOT_BLOCK_HASH
+        access_time = time.monotonic()
+
+        for i in range(0, len(tokens), self.tokens_per_page):
+            token_block = tokens[i : i + self.tokens_per_page]
+            parent_hash = block_hash(parent_hash, token_block)
+            node = blocks.get(parent_hash)
+            if node is None:
+                break
+            if node.parent is not cur or node.tokens != token_block:
+                node = cur.children.get(token_block)
+                if node is None:
+                    break
+            if node.host_slot is not None and not self._promote_node(node):
+                break
+            cur = node
+            cur.access_time = access_time
+            matched_pages.append(cur.page)
+
+        if cur is not self.root:
+            self._push_eviction_candidate(cur)
+
+        return cur, matched_pages
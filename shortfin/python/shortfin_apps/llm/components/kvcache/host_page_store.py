@@ -0,0 +1,129 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Host memory tier for KV cache pages.
+"""
+
+import logging
+import threading
+from typing import List, Optional
+
+import shortfin as sf
+import shortfin.array as sfnp
+
+from .page_pool import PageInfo, PagePool, human_size
+
+logger = logging.getLogger(__name__)
+
+
+class HostPageStore:
+    """Pinned host slots holding copies of pages spilled from a `PagePool`.
+
+    One host table of `[page_count, block_size]` is allocated per device page
+    table, using the same device visible host allocation that
+    `device_array.for_transfer` makes, so spills and promotions are plain
+    `copy_from` transfers between a page table row and a host table row.
+
+    Transfers are enqueued and not awaited. A promoted page is read by later
+    invocations on the same device queue, after the copy. A spilled device
+    page may be written by invocations on another queue though, so it is held
+    back until `complete_spills` has awaited the spill transfers.
+    """
+
+    def __init__(self, page_pool: PagePool, page_count: int):
+        if page_count <= 0:
+            raise ValueError("page_count must be positive")
+        self._lock = threading.Lock()
+        self.page_pool = page_pool
+        self.page_count = page_count
+        self.host_tables: List[sfnp.device_array] = []
+
+        for page_table in page_pool.page_tables:
+            host_table_shape = [page_count, page_table.shape[1]]
+            logger.info(
+                "Allocating host page table (shape=%r, dtype=%r, size=%s) on %r",
+                host_table_shape,
+                page_table.dtype,
+                human_size(page_table.dtype.compute_dense_nd_size(host_table_shape)),
+                page_table.device,
+            )
+            self.host_tables.append(
+                sfnp.device_array.for_host(
+                    page_table.device, host_table_shape, page_table.dtype
+                )
+            )
+
+        self._free_slots: List[int] = list(range(page_count))
+        # Device pages spilled and not yet released to the pool.
+        self._spilled_pages: List[PageInfo] = []
+
+    def available_slot_count(self) -> int:
+        with self._lock:
+            return len(self._free_slots)
+
+    def spilled_page_count(self) -> int:
+        with self._lock:
+            return len(self._spilled_pages)
+
+    def spill(self, page: PageInfo) -> Optional[int]:
+        """Copy a device page into a free host slot.
+
+        The device page is taken over by the store and released to the pool
+        by `complete_spills`.
+
+        Returns:
+            The host slot holding the page, or None if no slot is free.
+        """
+        with self._lock:
+            if not self._free_slots:
+                return None
+            slot = self._free_slots.pop()
+            self._spilled_pages.append(page)
+        for page_table, host_table in zip(self.page_pool.page_tables, self.host_tables):
+            host_table.view(slot).copy_from(page_table.view(page.index))
+        return slot
+
+    def take_spilled_pages(self) -> List[PageInfo]:
+        """Hand over the spilled device pages without waiting for their copies.
+
+        Only safe once no invocation can write the pages, e.g. at shutdown.
+        """
+        with self._lock:
+            pages = self._spilled_pages
+            self._spilled_pages = []
+            return pages
+
+    async def complete_spills(self) -> int:
+        """Await the spill transfers and release the spilled device pages.
+
+        Returns:
+            The number of pages released to the pool.
+        """
+        pages = self.take_spilled_pages()
+        if not pages:
+            return 0
+        for page_table in self.page_pool.page_tables:
+            await page_table.device
+        self.page_pool.free_pages(pages)
+        return len(pages)
+
+    def promote(self, slot: int, page: PageInfo) -> None:
+        """Copy a host slot back into a device page and release the slot."""
+        for page_table, host_table in zip(self.page_pool.page_tables, self.host_tables):
+            page_table.view(page.index).copy_from(host_table.view(slot))
+        self.release(slot)
+
+    def release(self, slot: int) -> None:
+        with self._lock:
+            self._free_slots.append(slot)
+
+    def __repr__(self):
+        free_slots = len(self._free_slots)
+        return (
+            f"HostPageStore({self.page_count - free_slots}/{self.page_count} "
+            f"slots in use)"
+        )
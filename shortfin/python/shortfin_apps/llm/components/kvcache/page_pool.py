@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Tuple, Optional, Sequence
+from typing import Iterable, List, Tuple, Optional, Sequence
 import threading
 import logging
 import shortfin as sf
@@ -88,7 +88,11 @@ class PagePool(CacheStoreAbstract):
             for i in range(self.config.alloc_page_count)
         ]
 
-        self.available_pages = list(self.attn_page_entries)
+        # Free pages are tracked by index: a LIFO stack hands out pages and a
+        # bitmap (1 == free) answers membership queries, so that acquire, free
+        # and double-free detection are all O(1) per page.
+        self._free_stack: list[int] = list(range(self.config.alloc_page_count))
+        self._free_bitmap = bytearray(b"\x01") * self.config.alloc_page_count
 
         # Initialize a page table on each device.
         for device, paged_kv_block_size_elements in zip(
@@ -116,26 +120,63 @@ class PagePool(CacheStoreAbstract):
 
     def available_page_count(self):
         with self._lock:
-            return len(self.available_pages)
+            return len(self._free_stack)
 
     def total_page_count(self):
         with self._lock:
             return len(self.attn_page_entries)
 
-    def acquire_free_pages(self, count: int) -> list[PageInfo] | None:
+    def is_page_free(self, index: int) -> bool:
+        return bool(self._free_bitmap[index])
+
+    def acquire_free_page_indices(self, count: int) -> list[int] | None:
+        """Acquire `count` free pages, returning their indices.
+
+        Returns None (and acquires nothing) if fewer than `count` pages are free.
+        """
         with self._lock:
-            available = len(self.available_pages)
-            if count > available:
+            free_stack = self._free_stack
+            if count > len(free_stack):
                 return None
-            return [self.available_pages.pop() for _ in range(count)]
+            if count == 0:
+                return []
+            indices = free_stack[: -count - 1 : -1]
+            del free_stack[-count:]
+            free_bitmap = self._free_bitmap
+            for index in indices:
+                free_bitmap[index] = 0
+            return indices
 
-    def free_pages(self, pages: list[PageInfo]):
+    def free_page_indices(self, indices: Iterable[int]) -> int:
+        """Return pages to the pool by index.
+
+        Indices that are already free are ignored, so releasing the same page
+        twice is harmless.
+
+        Returns:
+            Number of pages that were actually returned to the pool.
+        """
+        freed = 0
         with self._lock:
-            available_page_indicies = [p.index for p in self.available_pages]
-            for p in pages:
-                if p.index not in available_page_indicies:
-                    self.available_pages.append(p)
-                    available_page_indicies.append(p.index)
+            free_bitmap = self._free_bitmap
+            free_stack = self._free_stack
+            for index in indices:
+                if free_bitmap[index]:
+                    continue
+                free_bitmap[index] = 1
+                free_stack.append(index)
+                freed += 1
+        return freed
+
+    def acquire_free_pages(self, count: int) -> list[PageInfo] | None:
+        indices = self.acquire_free_page_indices(count)
+        if indices is None:
+            return None
+        entries = self.attn_page_entries
+        return [entries[index] for index in indices]
+
+    def free_pages(self, pages: list[PageInfo]):
+        self.free_page_indices(p.index for p in pages)
 
     def copy_page_index(self, src_page: int, dst_page: int):
         # Copy the data on each device
@@ -171,7 +212,7 @@ class PagePool(CacheStoreAbstract):
 
     def __repr__(self):
         # No need to lock for repr (list is internally synchronized).
-        free_pages = len(self.available_pages)
+        free_pages = len(self._free_stack)
         total_pages = len(self.attn_page_entries)
         return (
             f"PagePool({total_pages - free_pages}/{total_pages} pages in use: "
@@ -0,0 +1,167 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Radix attention cache with token-level prefix matching.
+"""
+
+import logging
+import time
+from typing import List, Optional, Tuple
+
+from .base_attention_cache import CacheAllocationFailure
+from .page_pool import PageInfo
+from .trie_attention_cache import (
+    TrieCacheInfo,
+    TrieNode,
+    TriePagedAttentionCache,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _common_prefix_length(a: Tuple[int, ...], b: Tuple[int, ...]) -> int:
+    n = min(len(a), len(b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return i
+    return n
+
+
+class RadixPagedAttentionCache(TriePagedAttentionCache):
+    """Trie cache that matches prefixes down to the token.
+
+    Full pages are shared exactly as in `TriePagedAttentionCache`. When the
+    token sequence diverges in the middle of a page, the cached page that
+    shares the longest common prefix with the remaining tokens is copied
+    (copy-on-write) into a freshly acquired page. The copy is private to the
+    allocation, so the request can write its own tokens into the rest of the
+    page while reusing the KV entries of the matched tokens.
+
+    The returned `TrieCacheInfo` has `num_tokens` set to the exact number of
+    matched tokens and `partial_page_tokens` set to the number of matched
+    tokens held in the copied page.
+    """
+
+    def _match_partial(
+        self, node: TrieNode, tokens: Tuple[int, ...]
+    ) -> Tuple[Optional[TrieNode], int]:
+        """Find the child of `node` sharing the longest token prefix with `tokens`.
+
+        Args:
+            node: Node whose children are searched
+            tokens: Remaining tokens, at most one page worth
+
+        Returns:
+            Tuple of (best matching child or None, number of matched tokens)
+        """
+        best_child = None
+        best_length = 0
+        if not tokens:
+            return best_child, best_length
+
+        first_token = tokens[0]
+        for child_tokens, child in node.children.items():
+            if (
+                not child_tokens
+                or child_tokens[0] != first_token
+                or child.host_slot is not None
+            ):
+                continue
+            length = _common_prefix_length(child_tokens, tokens)
+            if length > best_length:
+                best_child = child
+                best_length = length
+        return best_child, best_length
+
+    def _copy_partial_page(self, src_page: PageInfo) -> Optional[PageInfo]:
+        dst_page = self.page_pool.copy_page(src_page)
+        if dst_page is None:
+            # Make room for the copy by evicting a cold leaf, but never the
+            # page we are about to copy from. The victim is dropped rather than
+            # spilled, as a spilled page is not freed until its copy completed.
+            self.evict_pages(1, offload=False)
+            dst_page = self.page_pool.copy_page(src_page)
+        return dst_page
+
+    def lookup(self, tokens: List[int]) -> TrieCacheInfo:
+        """Lookup the cache for the given token sequence.
+
+        Fully matched pages are shared. If the tokens following them partially
+        match a cached page, that page is copied and returned as the last page
+        of the allocation.
+
+        Args:
+            tokens: Sequence of tokens to look up
+            returns: TrieCacheInfo with matched tokens and pages
+        """
+        with self._lock:
+            tokens = tuple(tokens)
+            page_aligned_token_len = (
+                len(tokens) // self.tokens_per_page
+            ) * self.tokens_per_page
+            cur_node, matched_pages = self.match(tokens[:page_aligned_token_len])
+            num_full_tokens = len(matched_pages) * self.tokens_per_page
+
+            pages = list(matched_pages)
+            partial_page_tokens = 0
+            remaining = tokens[num_full_tokens : num_full_tokens + self.tokens_per_page]
+            partial_node, match_length = self._match_partial(cur_node, remaining)
+            if partial_node is not None:
+                # Keep the source page from being evicted while it is copied.
+                partial_node.ref_count.increment()
+                copied_page = self._copy_partial_page(partial_node.page)
+                partial_node.ref_count.decrement()
+                if copied_page is not None:
+                    partial_node.access_time = time.monotonic()
+                    self._push_eviction_candidate(partial_node)
+                    self._allocated_pages.append(copied_page)
+                    pages.append(copied_page)
+                    partial_page_tokens = match_length
+                else:
+                    logger.debug(
+                        "No free page to copy partial match of %d tokens",
+                        match_length,
+                    )
+
+            num_matched_tokens = num_full_tokens + partial_page_tokens
+            self._record_lookup(len(tokens), num_matched_tokens)
+            return TrieCacheInfo(
+                num_tokens=num_matched_tokens,
+                tokens=list(tokens[:num_matched_tokens]),
+                pages=pages,
+                last_cached_node=cur_node,
+                number_of_published_pages=len(matched_pages),
+                pool=self.page_pool,
+                partial_page_tokens=partial_page_tokens,
+            )
+
+    def allocate(
+        self,
+        tokens: List[int],
+        cache_info: TrieCacheInfo = None,
+        allocation_block_size: int = 0,
+        evict: bool = True,
+    ) -> TrieCacheInfo:
+        """Acquire pages for a sequence of tokens, see `TriePagedAttentionCache.allocate`.
+
+        If the allocation fails, the page copied by `lookup` is freed, as no
+        other allocation refers to it.
+        """
+        try:
+            return super().allocate(
+                tokens,
+                cache_info,
+                allocation_block_size=allocation_block_size,
+                evict=evict,
+            )
+        except CacheAllocationFailure:
+            if cache_info is not None and cache_info.partial_page_tokens > 0:
+                copied_page = cache_info.pages[-1]
+                with self._lock:
+                    self._allocated_pages.remove(copied_page)
+                self.page_pool.free_pages([copied_page])
+            raise
@@ -1,3 +1,4 @@
+from collections import OrderedDict, deque
 from typing import Dict, Set, List, Tuple, Optional
 from dataclasses import dataclass
 from threading import Lock
@@ -6,6 +7,7 @@ import math
 import heapq
 from copy import deepcopy
 from .page_pool import PagePool, PageInfo
+from .host_page_store import HostPageStore
 from .base_attention_cache import BasePagedAttentionCache, CacheAllocationFailure
 from .kvcache_utils import RefCount
 from .attention_cache_abstract import CacheInfo
@@ -30,6 +32,8 @@ class TrieNode:
         parent: Parent node in the trie (None for root)
         ref_count: Number of active references to this node
         access_time: Last access timestamp for LRU eviction
+        host_slot: Slot in the host page store while the page is offloaded
+            (in which case `page` is None)
     """
 
     tokens: Tuple[int, ...]
@@ -38,6 +42,7 @@ class TrieNode:
     parent: Optional["TrieNode"] = None
     ref_count: RefCount = None
     access_time: float = 0.0
+    host_slot: Optional[int] = None
 
     def __post_init__(self) -> None:
         """Initialize children dict and access time if not provided."""
@@ -94,6 +99,39 @@ class TrieNode:
         return id(self) < id(other)
 
 
+@dataclass
+class TrieCacheStats:
+    """Counters describing the effectiveness of the trie cache.
+
+    Attributes:
+        lookups: Number of lookups performed
+        hits: Number of lookups that matched at least one token
+        misses: Number of lookups that matched nothing
+        lookup_tokens: Total number of tokens looked up
+        matched_tokens: Total number of tokens served from the cache
+        evicted_pages: Number of pages evicted to satisfy allocations
+        offloaded_pages: Number of evicted pages spilled to the host tier
+        promoted_pages: Number of pages brought back from the host tier
+    """
+
+    lookups: int = 0
+    hits: int = 0
+    misses: int = 0
+    lookup_tokens: int = 0
+    matched_tokens: int = 0
+    evicted_pages: int = 0
+    offloaded_pages: int = 0
+    promoted_pages: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def token_hit_rate(self) -> float:
+        return self.matched_tokens / self.lookup_tokens if self.lookup_tokens else 0.0
+
+
 @dataclass
 class TrieCacheInfo(CacheInfo):
     """Metadata about the trie-based cache allocation.
@@ -103,10 +141,13 @@ class TrieCacheInfo(CacheInfo):
     Attributes:
         last_cached_node: Last node in the trie that was cached
         number_of_published_pages: Number of pages that have been published to the cache
+        partial_page_tokens: Number of matched tokens held in a private copy of a
+            partially matching page that follows the published pages (0 if none)
     """
 
     number_of_published_pages: int
     last_cached_node: TrieNode
+    partial_page_tokens: int = 0
 
 
 class TriePagedAttentionCache(BasePagedAttentionCache):
@@ -116,19 +157,39 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
     represents a page of tokens. Common prefixes between sequences share
     the same nodes/pages, reducing memory usage.
 
+    Leaves that are candidates for eviction are kept in a lazily invalidated
+    min-heap keyed on access time. Entries are pushed whenever a leaf may have
+    become evictable or its access time changed, and stale entries are
+    discarded when popped, so eviction cost scales with the number of pages
+    evicted rather than with the size of the trie.
+
+    If a `HostPageStore` is given, evicted pages are spilled to host memory
+    instead of being dropped: the node stays in the trie without a device page
+    and is promoted back to a fresh device page when a lookup matches it. A
+    node is only offloaded once none of its children are resident, so
+    `leaves` holds the resident nodes without resident children. When the host
+    store is full, the oldest offloaded node without children is dropped.
+
     Attributes:
         root: Root node of the trie
         leaves: Set of leaf nodes for efficient eviction
         page_pool: Pool providing page allocations
         tokens_per_page: Number of tokens that fit in each page
+        stats: Hit/miss/eviction counters
     """
 
-    def __init__(self, page_pool: PagePool, tokens_per_page: int):
+    def __init__(
+        self,
+        page_pool: PagePool,
+        tokens_per_page: int,
+        host_store: Optional[HostPageStore] = None,
+    ):
         """Initialize the trie cache.
 
         Args:
             page_pool: Pool to allocate pages from
             tokens_per_page: Number of tokens per page
+            host_store: Optional host tier that evicted pages are spilled to
 
         Raises:
             ValueError: If tokens_per_page <= 0
@@ -145,6 +206,11 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
         )
         self.root = TrieNode(tokens=tuple(), page=dummy_page)
         self.leaves: Set[TrieNode] = set()
+        self._eviction_heap: List[Tuple[float, TrieNode]] = []
+        self._host_store = host_store
+        # Offloaded nodes, oldest first.
+        self._offloaded: "OrderedDict[TrieNode, None]" = OrderedDict()
+        self.stats = TrieCacheStats()
         self._lock: Lock = Lock()
         self._duplicated_pages: List[
             PageInfo
@@ -152,6 +218,136 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
             []
         )  # pages that are duplicated from existing pages in Trie tree. These pages can be safely freed when calling release_pages.
 
+    def _is_evictable(self, node: TrieNode) -> bool:
+        return node in self.leaves and node.ref_count.is_empty()
+
+    def _push_eviction_candidate(self, node: TrieNode) -> None:
+        """Record `node` in the eviction heap if it is currently evictable."""
+        if not self._is_evictable(node):
+            return
+        heap = self._eviction_heap
+        # Stale entries are only dropped when popped; rebuild the heap once they
+        # dominate so it stays proportional to the number of leaves.
+        if len(heap) > 2 * len(self.leaves) + 64:
+            heap[:] = [
+                (leaf.access_time, leaf)
+                for leaf in self.leaves
+                if leaf.ref_count.is_empty()
+            ]
+            heapq.heapify(heap)
+            return
+        heapq.heappush(heap, (node.access_time, node))
+
+    def _record_lookup(self, num_tokens: int, num_matched_tokens: int) -> None:
+        stats = self.stats
+        stats.lookups += 1
+        stats.lookup_tokens += num_tokens
+        stats.matched_tokens += num_matched_tokens
+        if num_matched_tokens > 0:
+            stats.hits += 1
+        else:
+            stats.misses += 1
+
+    def get_stats(self) -> TrieCacheStats:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return deepcopy(self.stats)
+
+    def _create_child(
+        self, parent: TrieNode, tokens: Tuple[int, ...], page: PageInfo
+    ) -> TrieNode:
+        """Create (or return the existing) child of `parent` for `tokens`."""
+        existing = parent.children.get(tokens)
+        if existing is not None and existing.host_slot is not None:
+            # The freshly written page supersedes the offloaded copy.
+            self._release_host_slot(existing)
+            existing.page = page
+            return existing
+        return parent.create_child(tokens, page)
+
+    def _unlink_node(self, node: TrieNode) -> None:
+        """Detach `node` from the trie."""
+        node.unlink()
+
+    def _has_resident_children(self, node: TrieNode) -> bool:
+        if self._host_store is None:
+            return bool(node.children)
+        return any(child.host_slot is None for child in node.children.values())
+
+    def _release_host_slot(self, node: TrieNode) -> None:
+        del self._offloaded[node]
+        self._host_store.release(node.host_slot)
+        node.host_slot = None
+
+    def _drop_offloaded_node(self) -> bool:
+        """Drop the oldest offloaded node without children to free a host slot."""
+        for node in self._offloaded:
+            if not node.children:
+                break
+        else:
+            return False
+        self._release_host_slot(node)
+        self._unlink_node(node)
+        return True
+
+    def _drop_offloaded_subtree(self, node: TrieNode) -> None:
+        for child in list(node.children.values()):
+            self._drop_offloaded_subtree(child)
+        self._release_host_slot(node)
+        self._unlink_node(node)
+
+    def _offload_node(self, node: TrieNode) -> bool:
+        """Spill the page of an evicted leaf to the host tier.
+
+        Returns:
+            True if the node was kept in the trie with its page on the host.
+        """
+        if self._host_store is None:
+            return False
+        slot = self._host_store.spill(node.page)
+        if slot is None and self._drop_offloaded_node():
+            slot = self._host_store.spill(node.page)
+        if slot is None:
+            return False
+        node.host_slot = slot
+        node.page = None
+        self._offloaded[node] = None
+        self.stats.offloaded_pages += 1
+        return True
+
+    def _promote_node(self, node: TrieNode) -> bool:
+        """Copy an offloaded node's page back into a newly acquired device page.
+
+        Returns:
+            True if the node is resident again.
+        """
+        # Neither the node nor its resident parent may be evicted or dropped
+        # while we make room for it.
+        del self._offloaded[node]
+        parent = node.parent
+        pages = self.page_pool.acquire_free_pages(1)
+        if pages is None:
+            # Drop the victim outright: a spilled page would only be freed
+            # after its copy completed, too late for this promotion.
+            parent.ref_count.increment()
+            self.evict_pages(1, offload=False)
+            parent.ref_count.decrement()
+            pages = self.page_pool.acquire_free_pages(1)
+        if pages is None:
+            self._offloaded[node] = None
+            self._push_eviction_candidate(parent)
+            return False
+
+        (page,) = pages
+        self._host_store.promote(node.host_slot, page)
+        node.host_slot = None
+        node.page = page
+        self.leaves.discard(parent)
+        if not self._has_resident_children(node):
+            self.leaves.add(node)
+        self.stats.promoted_pages += 1
+        return True
+
     def match(self, tokens: List[int]) -> Tuple[TrieNode, List[PageInfo]]:
         """
         Find the longest prefix match in the trie.
@@ -174,10 +370,17 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
 
             if token_block not in cur.children:
                 break
-            cur = cur.children[token_block]
+            node = cur.children[token_block]
+            if node.host_slot is not None and not self._promote_node(node):
+                break
+            cur = node
             cur.access_time = time.monotonic()
             matched_pages.append(cur.page)
 
+        # Only the last matched node can be a leaf.
+        if cur is not self.root:
+            self._push_eviction_candidate(cur)
+
         return cur, matched_pages
 
     def lookup(self, tokens: List[int]) -> TrieCacheInfo:
@@ -195,6 +398,7 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
             cur_node, matched_pages = self.match(page_aligned_tokens)
             num_matched_tokens = len(matched_pages) * self.tokens_per_page
             matched_tokens = page_aligned_tokens[:num_matched_tokens]
+            self._record_lookup(len(tokens), num_matched_tokens)
             return TrieCacheInfo(
                 num_tokens=num_matched_tokens,
                 tokens=matched_tokens,
@@ -204,7 +408,60 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
                 pool=self.page_pool,
             )
 
-    def evict_pages(self, max_pages: int) -> int:
+    def cached_prefix_length(self, tokens: List[int]) -> int:
+        """Returns how many leading `tokens` are held by cached pages.
+
+        Like `lookup_continuation`, this neither records stats nor touches
+        nodes. Offloaded pages count as cached.
+        """
+        with self._lock:
+            cur = self.root
+            matched = 0
+            while matched + self.tokens_per_page <= len(tokens):
+                cur = cur.children.get(
+                    tuple(tokens[matched : matched + self.tokens_per_page])
+                )
+                if cur is None:
+                    break
+                matched += self.tokens_per_page
+            return matched
+
+    def lookup_continuation(self, tokens: List[int], max_tokens: int) -> List[int]:
+        """Returns up to `max_tokens` cached tokens that followed `tokens`.
+
+        Where the trie branches, the most recently used branch is followed.
+        Unlike `lookup`, this neither records stats nor touches nodes, so
+        speculative lookups do not affect eviction order.
+        """
+        with self._lock:
+            page_aligned_token_len = (
+                len(tokens) // self.tokens_per_page
+            ) * self.tokens_per_page
+            cur = self.root
+            for i in range(0, page_aligned_token_len, self.tokens_per_page):
+                cur = cur.children.get(tuple(tokens[i : i + self.tokens_per_page]))
+                if cur is None:
+                    return []
+
+            partial = tuple(tokens[page_aligned_token_len:])
+            continuation = []
+            while len(continuation) < max_tokens:
+                children = [
+                    child
+                    for child_tokens, child in cur.children.items()
+                    if len(child_tokens) > len(partial)
+                    and child_tokens[: len(partial)] == partial
+                ]
+                if not children:
+                    break
+                cur = max(children, key=lambda node: node.access_time)
+                continuation.extend(cur.tokens[len(partial) :])
+                if len(cur.tokens) < self.tokens_per_page:
+                    break
+                partial = ()
+            return continuation[:max_tokens]
+
+    def evict_pages(self, max_pages: int, offload: bool = True) -> int:
         """Evict up to max_pages pages using LRU strategy.
 
         Evicts from unreferenced leaf nodes first, working up the trie
@@ -212,44 +469,53 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
 
         Args:
             max_pages: Maximum number of pages to evict
+            offload: Whether evicted pages may be spilled to the host tier.
+                Spilled pages are only freed once their copy completed, so
+                callers that need a free page right away pass False.
 
         Returns:
             Number of pages actually evicted
         """
         pages_to_evict = []
-        # Initialize heap with unreferenced leaves
-        unused_leaf_heap = [
-            (leaf.access_time, leaf)
-            for leaf in self.leaves
-            if leaf.ref_count.is_empty()
-        ]
-        heapq.heapify(unused_leaf_heap)
+        unused_leaf_heap = self._eviction_heap
+
+        num_offloaded = 0
 
         # Evict least recently used nodes
-        while unused_leaf_heap and len(pages_to_evict) < max_pages:
-            _, leaf = heapq.heappop(unused_leaf_heap)
-            if leaf.page in pages_to_evict:
+        while unused_leaf_heap and len(pages_to_evict) + num_offloaded < max_pages:
+            access_time, leaf = heapq.heappop(unused_leaf_heap)
+            # Skip entries invalidated by a later access, a new reference, or an
+            # earlier eviction of the same node.
+            if access_time != leaf.access_time or not self._is_evictable(leaf):
                 continue
-            pages_to_evict.append(leaf.page)
+            page = leaf.page
             parent = leaf.parent
 
-            leaf.unlink()
             self.leaves.remove(leaf)
-
-            # If parent becomes childless, it becomes a leaf
+            if offload and self._offload_node(leaf):
+                # The host store releases the page once its copy completed.
+                num_offloaded += 1
+            else:
+                pages_to_evict.append(page)
+                # Any children left are offloaded and unreachable without it.
+                for child in list(leaf.children.values()):
+                    self._drop_offloaded_subtree(child)
+                self._unlink_node(leaf)
+
+            # If parent has no resident children left, it becomes a leaf
             if (
                 parent is not self.root
-                and not parent.children
                 and parent not in self.leaves
+                and not self._has_resident_children(parent)
             ):
                 self.leaves.add(parent)
-                if parent.ref_count.is_empty():
-                    heapq.heappush(unused_leaf_heap, (parent.access_time, parent))
+                self._push_eviction_candidate(parent)
 
         if pages_to_evict:
             self.page_pool.free_pages(pages_to_evict)
+        self.stats.evicted_pages += len(pages_to_evict) + num_offloaded
 
-        return len(pages_to_evict)
+        return len(pages_to_evict) + num_offloaded
 
     def allocate(
         self,
@@ -285,7 +551,14 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
 
             cur_node = cache_info.last_cached_node
 
-            n_empty_pages = math.ceil(len(tokens) / self.tokens_per_page)
+            # A copied partial page already holds the first `partial_page_tokens`
+            # positions, so only the remainder of that page is free for `tokens`.
+            partial_page_tokens = cache_info.partial_page_tokens
+            n_empty_pages = math.ceil(
+                (len(tokens) + partial_page_tokens) / self.tokens_per_page
+            )
+            if partial_page_tokens > 0:
+                n_empty_pages -= 1
 
             if allocation_block_size > 0:
                 n_empty_pages = max(n_empty_pages, allocation_block_size)
@@ -295,7 +568,7 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
             if new_pages is None and evict:
                 # Try eviction
                 number_evicted_pages = self.evict_pages(
-                    n_empty_pages - len(self.page_pool.available_pages)
+                    n_empty_pages - self.page_pool.available_page_count()
                 )
                 new_pages = self.page_pool.acquire_free_pages(n_empty_pages)
 
@@ -312,9 +585,10 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
             if len(new_pages) > 0:
                 # some new pages are allocated and will be used to create children of cur_node, hence increment ref_count of cur_node.
                 # do not increment last_cached_node ref_count when we allocate along the same branch again
-                if len(cache_info.pages) == 0 or (
-                    len(cache_info.pages) > 0
-                    and cur_node.page.index == cache_info.pages[-1].index
+                if (
+                    len(cache_info.pages) == 0
+                    or partial_page_tokens > 0
+                    or cur_node.page.index == cache_info.pages[-1].index
                 ):
                     cur_node.register_allocation()
 
@@ -399,7 +673,7 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
                 if not publish_incomplete_page and len(token_block) < tokens_per_page:
                     # Do not publish incomplete page
                     break
-                new_node = cur_node.create_child(token_block, page)
+                new_node = self._create_child(cur_node, token_block, page)
                 if new_node.page.index != page.index:
                     if page not in self._duplicated_pages:
                         self._duplicated_pages.append(page)
@@ -412,6 +686,7 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
 
                 if cur_node is not self.root and cur_node not in self.leaves:
                     self.leaves.add(cur_node)
+                    self._push_eviction_candidate(cur_node)
 
                 # we create a new node for each token block, but we only publish full pages, hence last_cached_node is updated only when a full page is published.
                 if len(token_block) == tokens_per_page:
@@ -421,6 +696,7 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
             # Update reference counts only when we have unpublished tokens
             if unpublished_tokens:
                 cache_info.last_cached_node.publish_descendant(last_cached_node)
+                self._push_eviction_candidate(cache_info.last_cached_node)
 
             # Remove published pages from _allocated_pages
             for page in pages:
@@ -443,6 +719,13 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
 
         """Free all pages that have zero references."""
 
+        # Offloaded pages hold no device memory; drop them so that their
+        # resident parents become childless.
+        while self._offloaded:
+            node = next(iter(self._offloaded))
+            self._release_host_slot(node)
+            self._unlink_node(node)
+
         pages_to_free = []
         # Initialize heap with unreferenced leaves
         unused_leaf_heap = [
@@ -457,7 +740,7 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
             pages_to_free.append(leaf.page)
             parent = leaf.parent
 
-            leaf.unlink()
+            self._unlink_node(leaf)
             self.leaves.remove(leaf)
 
             # If parent becomes childless, it becomes a leaf
@@ -475,6 +758,7 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
 
         self.page_pool.free_pages(self._allocated_pages)
         self._allocated_pages = []
+        self._eviction_heap = []
 
     def free_allocated_pages(self, page_ids: List[int]):
         page_id_set = set(page_ids)
@@ -494,13 +778,86 @@ class TriePagedAttentionCache(BasePagedAttentionCache):
         last_cached_node = cache_info.last_cached_node
         if not last_cached_node.ref_count.is_empty():
             last_cached_node.ref_count.decrement()
+            self._push_eviction_candidate(last_cached_node)
 
         # free duplicated pages
         self.page_pool.free_pages(self._duplicated_pages)
         self._duplicated_pages = []
 
+    def resident_nodes(self) -> List[TrieNode]:
+        """Return the resident nodes, each parent before its children.
+
+        The nodes are not referenced, so they may be evicted before their pages
+        are read; see `pin_nodes`.
+        """
+        with self._lock:
+            nodes = []
+            pending = deque(self.root.children.values())
+            while pending:
+                node = pending.popleft()
+                if node.host_slot is not None:
+                    continue
+                nodes.append(node)
+                pending.extend(node.children.values())
+            return nodes
+
+    def pin_nodes(self, nodes: List[TrieNode]) -> List[TrieNode]:
+        """Reference the nodes that are still resident so they are not evicted.
+
+        Returns:
+            The pinned nodes. They must be passed to `unpin_nodes` once their
+            pages have been read.
+        """
+        with self._lock:
+            pinned = []
+            for node in nodes:
+                if node.page is None or node.parent is None:
+                    continue
+                node.ref_count.increment()
+                pinned.append(node)
+            return pinned
+
+    def unpin_nodes(self, nodes: List[TrieNode]) -> None:
+        """Drop the references taken by `pin_nodes`."""
+        with self._lock:
+            for node in nodes:
+                node.ref_count.decrement()
+                self._push_eviction_candidate(node)
+
+    def restore_nodes(
+        self, nodes: List[Tuple[int, Tuple[int, ...]]], pages: List[PageInfo]
+    ) -> None:
+        """Publish pages that already hold the KV entries of known token blocks.
+
+        Args:
+            nodes: `(parent, tokens)` per page, where `parent` is the position
+                of the parent in `nodes` (parents first) or -1 for the root
+            pages: Pages holding the KV entries of each node
+        """
+        with self._lock:
+            restored = []
+            for (parent_index, tokens), page in zip(nodes, pages):
+                parent = self.root if parent_index < 0 else restored[parent_index]
+                node = self._create_child(parent, tokens, page)
+                if node.page is not page:
+                    # Already cached; keep the existing page.
+                    self.page_pool.free_pages([page])
+                restored.append(node)
+                self.leaves.discard(parent)
+                if not self._has_resident_children(node):
+                    self.leaves.add(node)
+                    self._push_eviction_candidate(node)
+
+    async def complete_spills(self) -> int:
+        if self._host_store is None:
+            return 0
+        return await self._host_store.complete_spills()
+
     def shutdown(self):
+        logger.info("Trie cache stats at shutdown: %r", self.stats)
         self.free_cache_pages()
+        if self._host_store is not None:
+            self.page_pool.free_pages(self._host_store.take_spilled_pages())
 
         available = self.page_pool.available_page_count()
         total = self.page_pool.total_page_count()
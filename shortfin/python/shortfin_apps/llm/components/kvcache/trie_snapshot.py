@@ -0,0 +1,271 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+On-disk snapshots of the trie prefix cache.
+
+A snapshot is a directory holding `trie.json`, which describes the cached token
+blocks, and one `pages_<i>.npy` file per page table with the raw bytes of the
+cached pages, one row per node. The page files are memory mapped, so saving and
+loading stream through the page cache instead of materializing whole tables.
+"""
+
+import asyncio
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+import shortfin as sf
+import shortfin.array as sfnp
+
+from .page_pool import PagePool
+from .trie_attention_cache import TriePagedAttentionCache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+_METADATA_FILE = "trie.json"
+
+# Number of pages staged through host memory per transfer.
+_TRANSFER_PAGES = 64
+
+
+def _page_bytes(page_pool: PagePool) -> List[int]:
+    return [
+        page_table.dtype.compute_dense_nd_size([page_table.shape[1]])
+        for page_table in page_pool.page_tables
+    ]
+
+
+def _staging_array(page_table: sfnp.device_array) -> sfnp.device_array:
+    return sfnp.device_array.for_host(
+        page_table.device, [_TRANSFER_PAGES, page_table.shape[1]], page_table.dtype
+    )
+
+
+async def _read_pages(
+    page_table: sfnp.device_array, indices: List[int], out: np.ndarray
+) -> None:
+    device = page_table.device
+    staging = _staging_array(page_table)
+    for start in range(0, len(indices), _TRANSFER_PAGES):
+        chunk = indices[start : start + _TRANSFER_PAGES]
+        for i, index in enumerate(chunk):
+            staging.view(i).copy_from(page_table.view(index))
+        await device
+        with staging.map(read=True) as m:
+            rows = np.frombuffer(m, dtype=np.uint8).reshape(_TRANSFER_PAGES, -1)
+            out[start : start + len(chunk)] = rows[: len(chunk)]
+
+
+async def _write_pages(
+    page_table: sfnp.device_array, indices: List[int], data: np.ndarray
+) -> None:
+    device = page_table.device
+    staging = _staging_array(page_table)
+    for start in range(0, len(indices), _TRANSFER_PAGES):
+        chunk = indices[start : start + _TRANSFER_PAGES]
+        with staging.map(write=True, discard=True) as m:
+            rows = np.frombuffer(m, dtype=np.uint8).reshape(_TRANSFER_PAGES, -1)
+            rows[: len(chunk)] = data[start : start + len(chunk)]
+        for i, index in enumerate(chunk):
+            page_table.view(index).copy_from(staging.view(i))
+        # The staging rows are overwritten by the next chunk.
+        await device
+
+
+async def save_trie_snapshot(
+    cache: TriePagedAttentionCache, path: Path, fingerprint: str
+) -> int:
+    """Write the resident pages of `cache` to a snapshot directory.
+
+    Pages are read in slices of `_TRANSFER_PAGES`, and only the nodes of the
+    slice being read are pinned, so the cache keeps evicting meanwhile. Nodes
+    evicted before their slice is read are left out, with their descendants.
+
+    The snapshot is written next to `path` and moved into place once complete,
+    so an interrupted save leaves the previous snapshot intact.
+
+    Returns:
+        Number of pages saved.
+    """
+    path = Path(path)
+    page_pool = cache.page_pool
+    candidates = cache.resident_nodes()
+    tmp_path = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    page_bytes = _page_bytes(page_pool)
+    # Rows of nodes left out stay unused at the end of the page files.
+    page_files = []
+    if candidates:
+        page_files = [
+            np.lib.format.open_memmap(
+                tmp_path / f"pages_{i}.npy",
+                mode="w+",
+                dtype=np.uint8,
+                shape=(len(candidates), page_bytes[i]),
+            )
+            for i in range(len(page_pool.page_tables))
+        ]
+
+    positions = {cache.root: -1}
+    nodes = []
+    for start in range(0, len(candidates), _TRANSFER_PAGES):
+        pinned = cache.pin_nodes(candidates[start : start + _TRANSFER_PAGES])
+        try:
+            # Parents precede their children, so the parent of a node is
+            # either saved already or left out.
+            saved = []
+            for node in pinned:
+                if node.parent in positions:
+                    positions[node] = len(nodes) + len(saved)
+                    saved.append(node)
+            page_indices = [node.page.index for node in saved]
+            for page_table, pages in zip(page_pool.page_tables, page_files):
+                await _read_pages(
+                    page_table,
+                    page_indices,
+                    pages[len(nodes) : len(nodes) + len(saved)],
+                )
+        finally:
+            cache.unpin_nodes(pinned)
+        nodes.extend(saved)
+
+    for pages in page_files:
+        pages.flush()
+    del page_files
+
+    metadata = {
+        "version": SNAPSHOT_VERSION,
+        "fingerprint": fingerprint,
+        "tokens_per_page": cache.tokens_per_page,
+        "page_bytes": page_bytes,
+        "nodes": [[positions[node.parent], list(node.tokens)] for node in nodes],
+    }
+    with open(tmp_path / _METADATA_FILE, "wt") as f:
+        json.dump(metadata, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    tmp_path.rename(path)
+    logger.info("Saved %d prefix cache pages to %s", len(nodes), path)
+    return len(nodes)
+
+
+async def load_trie_snapshot(
+    cache: TriePagedAttentionCache, path: Path, fingerprint: str
+) -> int:
+    """Restore the pages of a snapshot directory into `cache`.
+
+    Snapshots written for a different model, page size or page layout are
+    ignored. If the pool has fewer free pages than the snapshot, the nodes
+    closest to the root are restored.
+
+    Returns:
+        Number of pages restored.
+    """
+    path = Path(path)
+    metadata_path = path / _METADATA_FILE
+    if not metadata_path.exists():
+        logger.info("No prefix cache snapshot at %s", path)
+        return 0
+    with open(metadata_path, "rt") as f:
+        metadata = json.load(f)
+
+    page_pool = cache.page_pool
+    expected = {
+        "version": SNAPSHOT_VERSION,
+        "fingerprint": fingerprint,
+        "tokens_per_page": cache.tokens_per_page,
+        "page_bytes": _page_bytes(page_pool),
+    }
+    for key, value in expected.items():
+        if metadata.get(key) != value:
+            logger.warning(
+                "Ignoring prefix cache snapshot at %s: %s does not match (%r != %r)",
+                path,
+                key,
+                metadata.get(key),
+                value,
+            )
+            return 0
+
+    nodes = metadata["nodes"][: page_pool.available_page_count()]
+    if not nodes:
+        return 0
+    pages = page_pool.acquire_free_pages(len(nodes))
+    if pages is None:
+        return 0
+    try:
+        page_indices = [page.index for page in pages]
+        for i, page_table in enumerate(page_pool.page_tables):
+            data = np.load(path / f"pages_{i}.npy", mmap_mode="r")
+            await _write_pages(page_table, page_indices, data)
+    except Exception:
+        page_pool.free_pages(pages)
+        raise
+
+    cache.restore_nodes(
+        [(parent, tuple(tokens)) for parent, tokens in nodes],
+        pages,
+    )
+    logger.info("Restored %d prefix cache pages from %s", len(nodes), path)
+    return len(nodes)
+
+
+class TrieSnapshotter:
+    """Saves and restores a trie cache snapshot for a service.
+
+    Transfers are awaited on `worker`, which must be able to wait on the
+    devices of the page pool. The snapshot is loaded by `start`, written by
+    `shutdown` and, if `interval_s` is given, rewritten periodically.
+    """
+
+    def __init__(
+        self,
+        cache: TriePagedAttentionCache,
+        path: Path,
+        fingerprint: str,
+        worker: sf.Worker,
+        interval_s: Optional[float] = None,
+    ):
+        self.cache = cache
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.worker = worker
+        self.interval_s = interval_s
+        self._stopped = False
+        self._save_lock = asyncio.Lock()
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.worker.loop).result()
+
+    async def save(self) -> int:
+        async with self._save_lock:
+            return await save_trie_snapshot(self.cache, self.path, self.fingerprint)
+
+    async def _save_periodically(self):
+        while not self._stopped:
+            await asyncio.sleep(self.interval_s)
+            if not self._stopped:
+                await self.save()
+
+    def start(self):
+        self._run(load_trie_snapshot(self.cache, self.path, self.fingerprint))
+        if self.interval_s:
+            asyncio.run_coroutine_threadsafe(
+                self._save_periodically(), self.worker.loop
+            )
+
+    def shutdown(self):
+        self._stopped = True
+        self._run(self.save())
@@ -0,0 +1,97 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Latency histograms per scheduling class.
+
+Requests are grouped by their `(priority, tenant)` class so that fair
+scheduling can be checked against what each class actually observes.
+"""
+
+import bisect
+import threading
+
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds in seconds of the histogram buckets. Latencies above the last
+# bound are counted in an overflow bucket.
+LATENCY_BUCKETS_S = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class LatencyHistogram:
+    """Bucketed latencies.
+
+    Attributes:
+        counts: Number of latencies per bucket of `LATENCY_BUCKETS_S`, plus
+            the overflow bucket
+        total_s: Sum of all latencies
+    """
+
+    counts: List[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS_S) + 1)
+    )
+    total_s: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.count if self.count else 0.0
+
+    def record(self, latency_s: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_S, latency_s)] += 1
+        self.total_s += latency_s
+
+    def quantile_s(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile."""
+        remaining = q * self.count
+        for bound, count in zip(LATENCY_BUCKETS_S, self.counts):
+            remaining -= count
+            if remaining <= 0:
+                return bound
+        return float("inf")
+
+
+@dataclass
+class ClassLatencyStats:
+    """Latencies observed by one scheduling class.
+
+    Attributes:
+        admission_wait: Time from arrival until admission
+        end_to_end: Time from arrival until the response
+    """
+
+    admission_wait: LatencyHistogram = field(default_factory=LatencyHistogram)
+    end_to_end: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+
+class ClassLatencyMetrics:
+    """Latency histograms of each scheduling class, shared by the requests of a service."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[int, Optional[str]], ClassLatencyStats] = {}
+
+    def record(
+        self,
+        priority: int,
+        tenant: Optional[str],
+        admission_wait_s: float,
+        end_to_end_s: float,
+    ):
+        with self._lock:
+            stats = self._stats.setdefault((priority, tenant), ClassLatencyStats())
+            stats.admission_wait.record(admission_wait_s)
+            stats.end_to_end.record(end_to_end_s)
+
+    def get_stats(self) -> Dict[Tuple[int, Optional[str]], ClassLatencyStats]:
+        with self._lock:
+            return deepcopy(self._stats)
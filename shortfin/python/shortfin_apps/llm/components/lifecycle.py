@@ -18,7 +18,7 @@ import logging
 
 from contextlib import asynccontextmanager
 
-from .config_struct import ModelParams, ServerParams
+from .config_struct import ModelParams, ServedModelConfig, ServerParams
 from .decode_config import DecodeConfig
 from .manager import LlmSystemManager
 from .service import LlmGenerateService
@@ -77,13 +77,20 @@ class ShortfinLlmLifecycleManager:
         server_params.update_from_args(args)
 
         if server_params.decode_config is None:
-            decode_config = DecodeConfig(
-                num_beams=args.num_beams,
-                logits_normalization=model_params.logits_normalization,
-            )
-            server_params.decode_config = decode_config
+            # Each service normalizes logits the way its own model was
+            # exported, see `LlmGenerateService.decode_config`.
+            server_params.decode_config = DecodeConfig(num_beams=args.num_beams)
 
-        self._validate_initialization_args(server_params, model_params)
+        draft_vmfb = getattr(args, "draft_vmfb", None)
+        draft_model_params = None
+        if draft_vmfb is not None:
+            if getattr(args, "draft_model_config", None) is None:
+                raise ValueError("`draft_vmfb` requires a `draft_model_config`.")
+            draft_model_params = ModelParams.load_json(args.draft_model_config)
+
+        self._validate_initialization_args(
+            server_params, model_params, draft_model_params
+        )
 
         # Setup system (configure devices, etc).
         sysman = LlmSystemManager(
@@ -100,18 +107,79 @@ class ShortfinLlmLifecycleManager:
         tokenizer = Tokenizer.from_tokenizer_json_file(
             args.tokenizer_json, eos_token=eos_token
         )
+        service = self._create_service(
+            "default",
+            sysman,
+            tokenizer,
+            model_params,
+            server_params,
+            args.vmfb,
+            args.parameters,
+        )
+        if draft_model_params is not None:
+            service.load_draft_model(
+                draft_model_params, draft_vmfb, *args.draft_parameters
+            )
+        self.sysman = sysman
+        self.services = {"default": service}
+
+        models_path = getattr(args, "models", None)
+        for model in ServedModelConfig.load_list(models_path) if models_path else []:
+            if model.name in self.services:
+                raise ValueError(f"Duplicate model name '{model.name}'.")
+            self.services[model.name] = self._create_served_model_service(
+                model, sysman, tokenizer, server_params
+            )
+
+    def _create_service(
+        self,
+        name: str,
+        sysman: LlmSystemManager,
+        tokenizer: Tokenizer,
+        model_params: ModelParams,
+        server_params: ServerParams,
+        vmfb,
+        parameters,
+    ) -> LlmGenerateService:
         service = LlmGenerateService(
-            name="default",
+            name=name,
             sysman=sysman,
             tokenizer=tokenizer,
             model_params=model_params,
             server_params=server_params,
             program_isolation=server_params.program_isolation,
         )
-        service.load_inference_module(args.vmfb)
-        service.load_inference_parameters(*args.parameters, parameter_scope="model")
-        self.sysman = sysman
-        self.services = {"default": service}
+        service.load_inference_module(vmfb)
+        service.load_inference_parameters(*parameters, parameter_scope="model")
+        return service
+
+    def _create_served_model_service(
+        self,
+        model: ServedModelConfig,
+        sysman: LlmSystemManager,
+        default_tokenizer: Tokenizer,
+        server_params: ServerParams,
+    ) -> LlmGenerateService:
+        model_params = ModelParams.load_json(model.model_config)
+        if model.page_budget is not None:
+            model_params.paged_kv_cache.device_block_count = model.page_budget
+        self._validate_initialization_args(server_params, model_params)
+
+        tokenizer = default_tokenizer
+        if model.tokenizer_json is not None:
+            tokenizer = Tokenizer.from_tokenizer_json_file(
+                model.tokenizer_json,
+                eos_token=get_eos_from_tokenizer_config(model.tokenizer_config_json),
+            )
+        return self._create_service(
+            model.name,
+            sysman,
+            tokenizer,
+            model_params,
+            server_params,
+            model.vmfb,
+            model.parameters,
+        )
 
     def __enter__(self):
         self.sysman.start()
@@ -128,7 +196,10 @@ class ShortfinLlmLifecycleManager:
         return False
 
     def _validate_initialization_args(
-        self, server_params: ServerParams, model_params: ModelParams
+        self,
+        server_params: ServerParams,
+        model_params: ModelParams,
+        draft_model_params: ModelParams | None = None,
     ):
         chunk_block_size = server_params.chunk_block_size
         has_prefill_position = model_params.has_prefill_position
@@ -143,12 +214,73 @@ class ShortfinLlmLifecycleManager:
                 "Chunked prefill requested, but model not exported with `--has-prefill-position`."
             )
 
+        if (
+            server_params.token_budget is not None
+            and server_params.batch_mode != "continuous"
+        ):
+            raise ValueError(
+                "Incompatible server configuration. "
+                "`token_budget` is only used with the 'continuous' batch mode."
+            )
+
+        if server_params.prompt_lookup_ngram_size < 0:
+            raise ValueError(
+                "Incompatible server configuration. "
+                "`prompt_lookup_ngram_size` must not be negative."
+            )
+        if (
+            server_params.prompt_lookup_ngram_size > 0
+            and draft_model_params is not None
+        ):
+            raise ValueError(
+                "Incompatible server configuration. "
+                "`prompt_lookup_ngram_size` cannot be combined with a draft model."
+            )
+        if draft_model_params is not None or server_params.prompt_lookup_ngram_size > 0:
+            if not has_prefill_position:
+                raise ValueError(
+                    "Incompatible server configuration. "
+                    "Speculative decoding requires a model exported with `--has-prefill-position`."
+                )
+            if server_params.num_speculative_tokens < 1:
+                raise ValueError(
+                    "Incompatible server configuration. "
+                    "`num_speculative_tokens` must be at least 1."
+                )
+
+        if server_params.tenant_shares is not None and any(
+            share <= 0 for share in server_params.tenant_shares.values()
+        ):
+            raise ValueError(
+                "Incompatible server configuration. "
+                "`tenant_shares` must be positive."
+            )
+
         prefix_sharing_algorithm = server_params.prefix_sharing_algorithm
-        if prefix_sharing_algorithm == "trie" and not has_prefill_position:
+        if (
+            server_params.host_offload_page_count > 0
+            and prefix_sharing_algorithm == "none"
+        ):
+            raise ValueError(
+                "Incompatible server configuration. "
+                "`host_offload_page_count` requires a prefix sharing algorithm other than 'none'."
+            )
+        if (
+            server_params.prefix_cache_snapshot_path is not None
+            and prefix_sharing_algorithm == "none"
+        ):
+            raise ValueError(
+                "Incompatible server configuration. "
+                "`prefix_cache_snapshot_path` requires a prefix sharing algorithm other than 'none'."
+            )
+        if (
+            prefix_sharing_algorithm in ("trie", "radix", "hashed")
+            and not has_prefill_position
+        ):
             logger.warning(
-                "Prefix sharing algorithm 'trie' is enabled, but the model was not exported with `--has-prefill-position`.\n"
-                "Computational benefits of `trie` prefix sharing will not be realized.\n"
-                "Export from `sharktank` with `--has-prefill-position` for full trie prefix sharing benefits."
+                f"Prefix sharing algorithm '{prefix_sharing_algorithm}' is enabled, but the model was not exported with `--has-prefill-position`.\n"
+                f"Computational benefits of `{prefix_sharing_algorithm}` prefix sharing will not be realized.\n"
+                f"Export from `sharktank` with `--has-prefill-position` for full {prefix_sharing_algorithm} prefix sharing benefits."
             )
 
     @asynccontextmanager
@@ -4,6 +4,8 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
+import shortfin as sf
+
 from shortfin_apps.utils import SystemManager
 
 
@@ -27,3 +29,12 @@ class LlmSystemManager(SystemManager):
             logger_name=__name__,
             shutdown_system=False,
         )
+        self._workers: dict[str, sf.Worker] = {}
+
+    def get_worker(self, name: str) -> sf.Worker:
+        """Returns the worker of this name, shared by all services of the system."""
+        worker = self._workers.get(name)
+        if worker is None:
+            worker = self.ls.create_worker(name)
+            self._workers[name] = worker
+        return worker
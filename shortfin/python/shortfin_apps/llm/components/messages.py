@@ -7,12 +7,16 @@
 from enum import Enum
 from uuid import uuid4
 
+import numpy as np
+
 import shortfin as sf
 import shortfin.array as sfnp
 from shortfin.interop.fastapi import RequestStatusTracker
 
 from ...utils import InferenceExecRequest
 
+from .decode_config import DecodeConfig
+
 
 class InferencePhase(Enum):
     PREFILL = 1
@@ -55,12 +59,26 @@ class LlmInferenceExecRequest(InferenceExecRequest):
         self.result_logits: sfnp.device_array | None = None
         self.result_indices: sfnp.device_array | None = None
 
+        # Return the prefill logits of all positions as [1, bsl, d], e.g. to
+        # verify speculated tokens.
+        self.return_all_logits: bool = False
+
         # Current running score of the decode req
         self.score: float = 0.0
 
+        # Decode config of the req. If set, tokens are selected for the whole
+        # decode batch at once and the best `num_beams` (tokens, scores) of the
+        # req are returned in `result_candidates`.
+        self.decode_config: DecodeConfig | None = None
+        self.result_candidates: tuple[np.ndarray, np.ndarray] | None = None
+
         # Cache pages that have been locked for this request.
         self.page_ids = page_ids
 
+        # Scheduling class of the request. Lower priorities are served first.
+        self.priority: int = 0
+        self.tenant: str | None = None
+
     @property
     def block_count(self):
         if self.page_ids:
@@ -74,6 +92,7 @@ class LlmInferenceExecRequest(InferenceExecRequest):
         self.done = sf.VoidFuture()
         self.return_host_array = True
         self.result_logits = None
+        self.result_candidates = None
 
     def cache_page_indices(self, max_len: int) -> list[int]:
         if self.page_ids:
@@ -4,12 +4,17 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
+import asyncio
+import heapq
+import itertools
 import threading
 import logging
 import math
+from dataclasses import dataclass, field
 from .config_struct import ModelParams, PagedKVCacheParams
-from typing import Optional
+from typing import List, Optional
 from .decode_config import DecodeConfig
+from .kvcache.base_attention_cache import BasePagedAttentionCache
 from shortfin.interop.fastapi import FastAPIResponder
 from shortfin.support.responder import ResponderErrorCodes
 from .tokenizer import Encoding
@@ -17,18 +22,50 @@ from .tokenizer import Encoding
 logger = logging.getLogger(__name__)
 
 
+@dataclass(order=True)
+class _PendingAdmission:
+    """A request waiting for capacity, ordered by priority, then arrival."""
+
+    priority: int
+    arrival: int
+    needed_pages: int = field(compare=False)
+    request_size: int = field(compare=False)
+    completion_limits: List[int] = field(compare=False)
+    loop: asyncio.AbstractEventLoop = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    request_id: Optional[int] = field(default=None, compare=False)
+
+
 class RequestQueueManager:
     """
     Manages a thread-safe request queue with memory availability checks.
+
+    In the default "reserve" admission mode, each request reserves the pages
+    of its prompt and of `max_completion_tokens` for every beam, and requests
+    that do not fit are rejected. In "overcommit" mode, prompt pages already
+    held by the prefix cache are not reserved, completions reserve the pages
+    of their expected length, learned from finished requests, and requests
+    that do not fit yet wait in a priority queue for capacity.
     """
 
     DEFAULT_MAX_QUEUE_SIZE = 3
 
+    DEFAULT_MAX_WAITING_REQUESTS = 256
+
+    # Weight of the latest finished request in the running completion ratio.
+    COMPLETION_RATIO_DECAY = 0.1
+
+    # Factor over the expected completion length reserved in overcommit mode.
+    OVERCOMMIT_HEADROOM = 1.25
+
     def __init__(
         self,
         *,
         model_params: ModelParams,
         max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        page_cache: Optional[BasePagedAttentionCache] = None,
+        admission_mode: str = "reserve",
+        max_waiting_requests: int = DEFAULT_MAX_WAITING_REQUESTS,
     ):
         # Use model_params.decode_batch_sizes to decide actual _max_queue_size
         self._max_queue_size = (
@@ -41,9 +78,20 @@ class RequestQueueManager:
         self._current_id = 0
         self._current_tasks = {}
         self._request_pages = {}
+        self._request_completion_limits = {}
+
+        self._page_cache = page_cache
+        self._admission_mode = admission_mode
+        self._max_waiting_requests = max_waiting_requests
+        self._waiting: List[_PendingAdmission] = []
+        self._arrivals = itertools.count()
+        # Running average of completion tokens over `max_completion_tokens`.
+        # It starts at the worst case until requests finish.
+        self._completion_ratio = 1.0
 
         self.model_params = model_params
-        self.available_page_count = self.model_params.paged_kv_cache.device_block_count
+        self.total_page_count = self.model_params.paged_kv_cache.device_block_count
+        self.available_page_count = self.total_page_count
 
         logger.debug(
             f"Initialized with max queue size: {self._max_queue_size}, "
@@ -90,6 +138,15 @@ class RequestQueueManager:
 
         return True
 
+    def _expected_completion_tokens(self, decode_config: DecodeConfig) -> int:
+        max_tokens = decode_config.max_completion_tokens
+        if self._admission_mode != "overcommit":
+            return max_tokens
+        expected = math.ceil(
+            max_tokens * self._completion_ratio * self.OVERCOMMIT_HEADROOM
+        )
+        return max(1, min(max_tokens, expected))
+
     def _calculate_needed_pages(
         self,
         decode_configs: list[DecodeConfig],
@@ -104,15 +161,66 @@ class RequestQueueManager:
             input_token_ids = input_tokens if is_pretokenized else input_tokens.ids
 
             input_pages = math.ceil(len(input_token_ids) / stride)
+            if self._admission_mode == "overcommit" and self._page_cache is not None:
+                cached_tokens = self._page_cache.cached_prefix_length(input_token_ids)
+                input_pages -= cached_tokens // stride
             copy_pages = decode_config.num_beams - 1
             output_pages = decode_config.num_beams * math.ceil(
-                decode_config.max_completion_tokens / stride
+                self._expected_completion_tokens(decode_config) / stride
             )
 
             total_needed_pages += input_pages + copy_pages + output_pages
 
         return total_needed_pages
 
+    def _reject_pages_full(self, responder: FastAPIResponder, needed_pages: int):
+        responder.send_error(
+            error_message="Not enough memory pages available.",
+            code=ResponderErrorCodes.KVCACHE_PAGES_FULL,
+            extra_fields={
+                "available_page": self.available_page_count,
+                "requested_page": needed_pages,
+            },
+        )
+        logger.debug(
+            f"Request rejected: needed pages {needed_pages} > available pages {self.available_page_count}."
+        )
+
+    def _reject_queue_full(self, responder: FastAPIResponder, request_size: int):
+        responder.send_error(
+            error_message="Server queue is full. Please try again later.",
+            code=ResponderErrorCodes.QUEUE_FULL,
+            extra_fields={
+                "current_size": self._current_queue_size,
+                "max_size": self._max_queue_size,
+            },
+        )
+        logger.debug(
+            f"Request rejected: {self._current_queue_size} (current) + {request_size} (new) > {self._max_queue_size} (max)."
+        )
+
+    def _fits(self, needed_pages: int, request_size: int) -> bool:
+        return (
+            needed_pages <= self.available_page_count
+            and self._current_queue_size + request_size <= self._max_queue_size
+        )
+
+    def _admit(
+        self, needed_pages: int, request_size: int, completion_limits: List[int]
+    ) -> int:
+        self._current_id += 1
+        self._current_queue_size += request_size
+        assert self._current_id not in self._current_tasks
+        self._current_tasks[self._current_id] = request_size
+        self._request_pages[self._current_id] = needed_pages
+        self._request_completion_limits[self._current_id] = completion_limits
+        self.available_page_count -= needed_pages
+
+        logger.debug(
+            f"Request added: id={self._current_id}, new queue size={self._current_queue_size}"
+        )
+        return self._current_id
+
     def add_to_queue(
         self,
         *,
@@ -137,53 +245,137 @@ class RequestQueueManager:
         # Check if total memory fits
         with self._lock:
             if total_needed_pages > self.available_page_count:
-                responder.send_error(
-                    error_message="Not enough memory pages available.",
-                    code=ResponderErrorCodes.KVCACHE_PAGES_FULL,
-                    extra_fields={
-                        "available_page": self.available_page_count,
-                        "requested_page": total_needed_pages,
-                    },
-                )
-                logger.debug(
-                    f"Request rejected: needed pages {total_needed_pages} > available pages {self.available_page_count}."
-                )
+                self._reject_pages_full(responder, total_needed_pages)
                 return None
 
             request_size = sum(config.num_beams for config in decode_configs)
             if self._current_queue_size + request_size > self._max_queue_size:
-                responder.send_error(
-                    error_message="Server queue is full. Please try again later.",
-                    code=ResponderErrorCodes.QUEUE_FULL,
-                    extra_fields={
-                        "current_size": self._current_queue_size,
-                        "max_size": self._max_queue_size,
-                    },
-                )
+                self._reject_queue_full(responder, request_size)
+                return None
 
-                logger.debug(
-                    f"Request rejected: {self._current_queue_size} (current) + {request_size} (new) > {self._max_queue_size} (max)."
-                )
+            return self._admit(
+                total_needed_pages,
+                request_size,
+                [config.max_completion_tokens for config in decode_configs],
+            )
+
+    async def wait_for_admission(
+        self,
+        *,
+        decode_configs: list[DecodeConfig],
+        input_batch: list[Encoding],
+        is_pretokenized: bool,
+        responder: FastAPIResponder,
+        priority: int = 0,
+    ) -> Optional[int]:
+        """
+        Adds a request to the queue, waiting for capacity in overcommit mode.
+
+        Waiting requests are admitted in order of `priority`, lowest first,
+        then arrival. Requests are only rejected if they can never fit or too
+        many requests are waiting. In reserve mode this is `add_to_queue`.
+
+        Returns: Request ID if successful, None otherwise.
+        """
+        if self._admission_mode != "overcommit":
+            return self.add_to_queue(
+                decode_configs=decode_configs,
+                input_batch=input_batch,
+                is_pretokenized=is_pretokenized,
+                responder=responder,
+            )
+
+        if not self._check_topk_params(decode_configs, responder):
+            return None
+
+        needed_pages = self._calculate_needed_pages(
+            decode_configs, input_batch, is_pretokenized
+        )
+        request_size = sum(config.num_beams for config in decode_configs)
+        completion_limits = [config.max_completion_tokens for config in decode_configs]
+
+        with self._lock:
+            if needed_pages > self.total_page_count:
+                self._reject_pages_full(responder, needed_pages)
+                return None
+            if request_size > self._max_queue_size:
+                self._reject_queue_full(responder, request_size)
                 return None
 
-            self._current_id += 1
-            self._current_queue_size += request_size
-            assert self._current_id not in self._current_tasks
-            self._current_tasks[self._current_id] = request_size
-            self._request_pages[self._current_id] = total_needed_pages
-            self.available_page_count -= total_needed_pages
+            if not self._waiting and self._fits(needed_pages, request_size):
+                return self._admit(needed_pages, request_size, completion_limits)
+
+            if len(self._waiting) >= self._max_waiting_requests:
+                self._reject_queue_full(responder, request_size)
+                return None
 
+            loop = asyncio.get_running_loop()
+            pending = _PendingAdmission(
+                priority=priority,
+                arrival=next(self._arrivals),
+                needed_pages=needed_pages,
+                request_size=request_size,
+                completion_limits=completion_limits,
+                loop=loop,
+                future=loop.create_future(),
+            )
+            heapq.heappush(self._waiting, pending)
             logger.debug(
-                f"Request added: id={self._current_id}, new queue size={self._current_queue_size}"
+                f"Request waiting: needed pages {needed_pages}, "
+                f"{len(self._waiting)} waiting."
+            )
+
+        try:
+            return await pending.future
+        except asyncio.CancelledError:
+            with self._lock:
+                request_id = pending.request_id
+                if request_id is None:
+                    self._waiting.remove(pending)
+                    heapq.heapify(self._waiting)
+            if request_id is not None:
+                self.remove_from_queue(request_id)
+            raise
+
+    @staticmethod
+    def _resolve_admission(pending: _PendingAdmission):
+        if not pending.future.done():
+            pending.future.set_result(pending.request_id)
+
+    def _admit_waiting(self):
+        """Admits waiting requests in order while they fit."""
+        while self._waiting:
+            pending = self._waiting[0]
+            if not self._fits(pending.needed_pages, pending.request_size):
+                break
+            heapq.heappop(self._waiting)
+            pending.request_id = self._admit(
+                pending.needed_pages, pending.request_size, pending.completion_limits
+            )
+            pending.loop.call_soon_threadsafe(self._resolve_admission, pending)
+
+    def _record_completions(
+        self, completion_limits: List[int], completion_tokens: List[int]
+    ):
+        for limit, tokens in zip(completion_limits, completion_tokens):
+            if limit <= 0:
+                continue
+            ratio = min(1.0, tokens / limit)
+            self._completion_ratio += self.COMPLETION_RATIO_DECAY * (
+                ratio - self._completion_ratio
             )
-            return self._current_id
 
-    def remove_from_queue(self, id: Optional[int]) -> None:
+    def remove_from_queue(
+        self, id: Optional[int], completion_tokens: Optional[List[int]] = None
+    ) -> None:
         """
         Remove a request from the queue.
 
         Args:
             id: The ID of the request to remove
+            completion_tokens: Number of tokens generated for each prompt of
+                the request, if it finished. Used to estimate completion
+                lengths in overcommit mode.
         Raises:
             RuntimeError: If the queue does not have the request ID.
         """
@@ -200,6 +392,10 @@ class RequestQueueManager:
             self._current_queue_size -= request_size
             released_pages = self._request_pages.pop(id, 0)
             self.available_page_count += released_pages
+            completion_limits = self._request_completion_limits.pop(id, [])
+            if completion_tokens is not None:
+                self._record_completions(completion_limits, completion_tokens)
             logger.debug(
                 f"Request removed: id={id}, new queue size={self._current_queue_size}"
             )
+            self._admit_waiting()
@@ -5,12 +5,16 @@
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
 from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, field
 import itertools
 import logging
-from typing import Dict, List
+import time
+from typing import Dict, Iterable, List, Optional
 import shortfin as sf
 
 from .invocation import LlmTaskInput
+from ...utils import BoardingPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -82,9 +86,10 @@ class Workgroup:
 
 
 class WorkloadBuilder:
-    def __init__(self, *, ideal_batch_size):
+    def __init__(self, *, ideal_batch_size, merge_jobs: bool = True):
         self._queues = []
         self._ideal_batch_size = ideal_batch_size
+        self._merge_jobs = merge_jobs
         self._occupancy = 0
 
     def add_work(self, job):
@@ -95,7 +100,7 @@ class WorkloadBuilder:
             job = job[self._ideal_batch_size :]
 
         # Place into existing jobs if here is available space:
-        if len(job) <= self.available():
+        if self._merge_jobs and len(job) <= self.available():
             for queue in self._queues:
                 available = self._ideal_batch_size - len(queue)
                 if available > 0:
@@ -122,12 +127,83 @@ class WorkloadBuilder:
         return len(self._queues) * self._ideal_batch_size - self._occupancy
 
 
+class WeightedFairQueue:
+    """Orders the work of tenants by start-time fair queueing.
+
+    Each task is tagged when first seen with a virtual start time, the later
+    of the virtual clock and the finish time of its tenant's previous task.
+    The tenant's finish time then advances by the task's token count divided
+    by the tenant's share. Serving tasks in tag order gives every backlogged
+    tenant a token rate proportional to its share, so a tenant queueing bulk
+    work cannot starve the others. Tasks of lower `priority` values are
+    served first, regardless of tags.
+
+    Only tasks still waiting keep their tag, and only tenants whose finish
+    time is ahead of the virtual clock keep it, so the state is bounded by
+    the pending work rather than by every task and tenant ever seen.
+    """
+
+    def __init__(self, shares: Dict[str, float], default_share: float = 1.0):
+        self._shares = shares
+        self._default_share = default_share
+        self._virtual_time = 0.0
+        self._finish_times: Dict[Optional[str], float] = {}
+        self._tags: Dict[LlmTaskInput, float] = {}
+
+    def _tag(self, task: LlmTaskInput) -> float:
+        tag = self._tags.get(task)
+        if tag is None:
+            share = self._shares.get(task.tenant, self._default_share)
+            tag = max(self._virtual_time, self._finish_times.get(task.tenant, 0.0))
+            self._finish_times[task.tenant] = tag + max(len(task.input_tokens), 1) / (
+                share
+            )
+            self._tags[task] = tag
+        return tag
+
+    def order(self, tasks: List[LlmTaskInput]) -> List[LlmTaskInput]:
+        """Returns `tasks` in the order they should be served."""
+        return sorted(tasks, key=lambda task: (task.priority, self._tag(task)))
+
+    def served(self, tasks, pending: Iterable[LlmTaskInput]):
+        """Advances the virtual clock past dispatched `tasks`.
+
+        Tags of tasks that were neither dispatched nor are in `pending` are
+        dropped, as are finish times the virtual clock has caught up with;
+        `_tag` would start those tenants at the virtual clock anyway.
+        """
+        for task in tasks:
+            tag = self._tags.pop(task, None)
+            if tag is not None:
+                self._virtual_time = max(self._virtual_time, tag)
+
+        pending = set(pending)
+        self._tags = {task: tag for task, tag in self._tags.items() if task in pending}
+        self._finish_times = {
+            tenant: finish_time
+            for tenant, finish_time in self._finish_times.items()
+            if finish_time > self._virtual_time
+        }
+
+
 class AbstractScheduler(ABC):
     def __init__(self, *, ideal_batch_size: int) -> None:
         self._ideal_batch_size = ideal_batch_size
         self._unreserved_strobe = None
         self._wid = 0
         self._preferred_groups = 1
+        # Whether ready workgroups may share a batch.
+        self._merge_workgroups = True
+
+        # When set, unreserved work waits for the policy's deadline instead
+        # of two strobes.
+        self.boarding_policy: Optional[BoardingPolicy] = None
+        self._unreserved_since: Optional[float] = None
+        self._unreserved_count = 0
+
+        # When set, ready work is ordered by priority and tenant shares
+        # instead of arrival.
+        self.fair_queue: Optional[WeightedFairQueue] = None
 
         self.pending: List[LlmTaskInput] = []
 
@@ -157,10 +233,33 @@ class AbstractScheduler(ABC):
     def handle_completed(self, rid: str) -> bool:
         pass
 
+    def is_reserved(self, rid) -> bool:
+        return rid in self._workgroup_placement
+
+    def _fair_order(self, tasks: List[LlmTaskInput]) -> List[LlmTaskInput]:
+        if self.fair_queue is None:
+            return tasks
+        return self.fair_queue.order(tasks)
+
+    def _fair_served(self, tasks, pending: Iterable[LlmTaskInput]):
+        if self.fair_queue is not None:
+            self.fair_queue.served(tasks, pending)
+
+    def boarding_deadline(self) -> Optional[float]:
+        """Time at which waiting unreserved work is boarded, if any."""
+        if self.boarding_policy is None or self._unreserved_since is None:
+            return None
+        return self.boarding_policy.deadline(
+            self._unreserved_count, self._unreserved_since
+        )
+
     def _group_jobs(
         self, rid_map: Dict[str, List[LlmTaskInput]], strobe
     ) -> WorkloadBuilder:
-        workload_builder = WorkloadBuilder(ideal_batch_size=self._ideal_batch_size)
+        workload_builder = WorkloadBuilder(
+            ideal_batch_size=self._ideal_batch_size,
+            merge_jobs=self._merge_workgroups,
+        )
 
         # Split out reserved and unreserved jobs:
         reserved = {
@@ -195,9 +294,25 @@ class AbstractScheduler(ABC):
             unreserved = unreserved[self._ideal_batch_size :]
             workload_builder.add_work(new_job)
             self._unreserved_strobe = None
+            self._unreserved_since = None
+
+        # If we have remaining unreserved jobs, board them at the deadline of
+        # the boarding policy:
+        self._unreserved_count = len(unreserved)
+        if len(unreserved) == 0:
+            self._unreserved_since = None
+        elif self.boarding_policy is not None:
+            if self._unreserved_since is None:
+                self._unreserved_since = time.monotonic()
+            if self.boarding_policy.should_board(
+                len(unreserved), self._unreserved_since
+            ):
+                self._unreserved_since = None
+                self._unreserved_count = 0
+                workload_builder.add_work(unreserved)
 
-        # If we have remaining unreserved jobs
-        if len(unreserved) > 0:
+        # Or after two strobes:
+        else:
             # Schedule the strobe for a future follow up:
             if self._unreserved_strobe is None:
                 self._unreserved_strobe = strobe
@@ -282,24 +397,21 @@ class Scheduler(AbstractScheduler):
         self._ready.append(task)
 
     def should_execute(self, strobe) -> List[List[LlmTaskInput]]:
-        pending = self._ready
+        pending = self._fair_order(self._ready)
         self._ready = []
         if len(pending) == 0:
             return []
 
-        # Determine the requested requests these jobs are for
-        rids = set([j.rid for j in pending])
-
-        # Group jobs together under their rid
-        rid_map = {rid: [] for rid in rids}
+        # Group jobs together under their rid, in serving order
+        rid_map = {}
         for j in pending:
-            rid_map[j.rid].append(j)
+            rid_map.setdefault(j.rid, []).append(j)
 
         workload_builder = self._group_jobs(rid_map=rid_map, strobe=strobe)
 
-        pending = [
-            item for item in pending if item not in workload_builder.get_scheduled()
-        ]
+        scheduled = workload_builder.get_scheduled()
+        pending = [item for item in pending if item not in scheduled]
+        self._fair_served(scheduled, pending)
         self._ready = pending
 
         return workload_builder.get_jobs()
@@ -322,6 +434,43 @@ class Scheduler(AbstractScheduler):
         return True
 
 
+class PipelinedScheduler(Scheduler):
+    """Scheduler that keeps requests in `pipeline_depth` separate batches.
+
+    Reserved requests are spread over `pipeline_depth` workgroups, placing
+    each new request in the least loaded one, and every workgroup is
+    dispatched as its own batch. The workgroups therefore complete at
+    different times: while one batch executes on device, the results of the
+    previous one are consumed and the next batch is prepared on the host.
+    """
+
+    def __init__(self, *, ideal_batch_size, pipeline_depth: int = 2):
+        super().__init__(ideal_batch_size=ideal_batch_size)
+        self._preferred_groups = pipeline_depth
+        self._merge_workgroups = False
+
+    def _schedule_reservation(self, *, rid, count):
+        if (
+            rid in self._workgroup_placement
+            or len(self._workgroups) < self._preferred_groups
+        ):
+            super()._schedule_reservation(rid=rid, count=count)
+            return
+
+        candidates = [
+            workgroup
+            for workgroup in self._workgroups.values()
+            if workgroup.can_add(count)
+        ]
+        if not candidates:
+            super()._schedule_reservation(rid=rid, count=count)
+            return
+
+        workgroup = min(candidates, key=lambda workgroup: workgroup.size)
+        workgroup.resize(rid=rid, count=count)
+        self._workgroup_placement[rid] = workgroup.wid
+
+
 class ChunkScheduler(AbstractScheduler):
     def __init__(self, *, ideal_batch_size):
         self._pending: Dict[str, List[LlmTaskInput]] = {}
@@ -336,22 +485,21 @@ class ChunkScheduler(AbstractScheduler):
             self._pending[task.rid].append(task)
 
     def should_execute(self, strobe) -> List[List[LlmTaskInput]]:
-        jobs = self._ready
+        jobs = self._fair_order(self._ready)
         self._ready = []
         if len(jobs) == 0:
             return []
 
-        # Determine the requested requests these jobs are for
-        rids = set([j.rid for j in jobs])
-
-        # Group jobs together under their rid
-        rid_map = {rid: [] for rid in rids}
+        # Group jobs together under their rid, in serving order
+        rid_map = {}
         for j in jobs:
-            rid_map[j.rid].append(j)
+            rid_map.setdefault(j.rid, []).append(j)
 
         workload_builder = self._group_jobs(rid_map=rid_map, strobe=strobe)
 
-        jobs = [item for item in jobs if item not in workload_builder.get_scheduled()]
+        scheduled = workload_builder.get_scheduled()
+        jobs = [item for item in jobs if item not in scheduled]
+        self._fair_served(scheduled, jobs)
         self._ready = jobs
 
         return workload_builder.get_jobs()
@@ -378,3 +526,124 @@ class ChunkScheduler(AbstractScheduler):
         next_chunk = self._pending[rid].pop(0)
         self._ready.append(next_chunk)
         return False
+
+
+@dataclass
+class IterationBatch:
+    """Work selected for one continuous batching iteration."""
+
+    prefill: List[LlmTaskInput] = field(default_factory=list)
+    decode: List[LlmTaskInput] = field(default_factory=list)
+
+    @property
+    def token_count(self) -> int:
+        return sum(len(task.input_tokens) for task in self.prefill) + len(self.decode)
+
+
+class ContinuousScheduler(AbstractScheduler):
+    """Iteration-level scheduler for continuous batching.
+
+    Every iteration is composed from scratch out of the ready work, within a
+    budget of `token_budget` tokens. Decode steps of the running sequences are
+    taken first, one token each, and prefill work fills the rest of the budget
+    in arrival order, or in the order of the `fair_queue` if one is set. A
+    prefill that exceeds the budget on its own still runs when nothing else
+    is scheduled, so long prompts cannot starve.
+
+    Reservations describe the running sequences: an iteration waits until all
+    of them have submitted their next decode step, or for one strobe at most.
+    Chunked prefills are scheduled one chunk at a time, so each chunk of a
+    long prompt joins a separate iteration.
+    """
+
+    def __init__(
+        self,
+        *,
+        token_budget: int,
+        max_prefill_batch_size: int,
+        max_decode_batch_size: int,
+    ):
+        if token_budget < 1:
+            raise ValueError(f"Token budget must be positive, got {token_budget}")
+        super().__init__(ideal_batch_size=max_decode_batch_size)
+        self._token_budget = token_budget
+        self._max_prefill_batch_size = max_prefill_batch_size
+        self._prefill_ready: List[LlmTaskInput] = []
+        self._prefill_pending: Dict[str, List[LlmTaskInput]] = {}
+        self._decode_ready: List[LlmTaskInput] = []
+        self._reservations: Dict[str, int] = {}
+        self._decode_strobe = None
+
+    def schedule_job(self, task: LlmTaskInput, *, prefill: bool = False):
+        if not prefill:
+            self._decode_ready.append(task)
+        elif task.rid in self._prefill_pending:
+            self._prefill_pending[task.rid].append(task)
+        else:
+            self._prefill_pending[task.rid] = []
+            self._prefill_ready.append(task)
+
+    @property
+    def waiting_for_decode(self) -> bool:
+        """Whether an iteration is held up by a running sequence."""
+        return self._decode_strobe is not None
+
+    def _decode_complete(self) -> bool:
+        """Whether every running sequence has its next decode step ready."""
+        ready = Counter(task.rid for task in self._decode_ready)
+        return all(ready[rid] >= count for rid, count in self._reservations.items())
+
+    def should_execute(self, strobe) -> Optional[IterationBatch]:
+        if not self._decode_ready and not self._prefill_ready:
+            return None
+
+        if not self._decode_complete():
+            if self._decode_strobe is None:
+                self._decode_strobe = strobe
+            if strobe == self._decode_strobe:
+                return None
+        self._decode_strobe = None
+
+        self._decode_ready = self._fair_order(self._decode_ready)
+        self._prefill_ready = self._fair_order(self._prefill_ready)
+
+        budget = self._token_budget
+        decode_count = min(len(self._decode_ready), self._ideal_batch_size, budget)
+        decode = self._decode_ready[:decode_count]
+        self._decode_ready = self._decode_ready[decode_count:]
+        budget -= decode_count
+
+        prefill = []
+        while self._prefill_ready and len(prefill) < self._max_prefill_batch_size:
+            cost = len(self._prefill_ready[0].input_tokens)
+            if cost > budget and (prefill or decode):
+                break
+            prefill.append(self._prefill_ready.pop(0))
+            budget -= cost
+
+        self._fair_served(decode + prefill, self._decode_ready + self._prefill_ready)
+        return IterationBatch(prefill=prefill, decode=decode)
+
+    def handle_scheduler(self, msg) -> bool:
+        if isinstance(msg, UpdateWorkload):
+            if msg.count == 0:
+                self._reservations.pop(msg.rid, None)
+            else:
+                self._reservations[msg.rid] = msg.count
+            return True
+
+        return False
+
+    def reserve_workload(self, *, batcher, count, rid):
+        batcher.submit(UpdateWorkload(count=count, rid=rid))
+
+    def handle_completed(self, rid: str) -> bool:
+        if rid not in self._prefill_pending:
+            return True
+
+        if len(self._prefill_pending[rid]) == 0:
+            del self._prefill_pending[rid]
+            return True
+
+        self._prefill_ready.append(self._prefill_pending[rid].pop(0))
+        return False
@@ -5,19 +5,30 @@
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
 import logging
+from pathlib import Path
+from typing import Optional
+
 import shortfin as sf
 
 
 from .batching.facade import BatchingFacade
 from .batching.config import BatchConfig, BatchMode
+from .batching.preemption import PreemptionPolicy
 from .config_struct import ModelParams, ServerParams
+from .decode_config import DecodeConfig
+from .decoder.speculative_decoder import SpeculationMetrics
+from .latency_metrics import ClassLatencyMetrics
 from .kvcache.base_attention_cache import (
     BasePagedAttentionCache,
 )
 from .kvcache.trie_attention_cache import TriePagedAttentionCache
+from .kvcache.radix_attention_cache import RadixPagedAttentionCache
+from .kvcache.hashed_attention_cache import HashedPagedAttentionCache
+from .kvcache.host_page_store import HostPageStore
+from .kvcache.trie_snapshot import TrieSnapshotter
 from .kvcache.page_pool import PagePoolConfig, PagePool
 from .manager import LlmSystemManager
-from .tokenizer import Tokenizer
+from .tokenizer import TokenizationPool, Tokenizer
 
 from ...utils import GenerateService
 from .request_queue_manager import RequestQueueManager
@@ -49,40 +60,63 @@ class LlmGenerateService(GenerateService):
 
         self.model_params = model_params
         self.server_params = server_params
+        # Decode defaults of the server with the logits normalization this
+        # model was exported with, as models may differ in it.
+        self.decode_config = (server_params.decode_config or DecodeConfig()).copy()
+        self.decode_config.logits_normalization = model_params.logits_normalization
+        self.tokenization_pool = TokenizationPool(
+            tokenizer,
+            max_workers=server_params.tokenizer_workers,
+            cache_size=server_params.tokenizer_cache_size,
+        )
+        # Files the model is loaded from, part of the prefix cache fingerprint.
+        self.model_artifacts: list[Path] = []
+        self.cache_snapshotter = None
+
+        # Draft model for speculative decoding, see `load_draft_model`.
+        self.draft_model_params: Optional[ModelParams] = None
+        self.draft_batcher: Optional[BatchingFacade] = None
+        self.speculation_metrics = SpeculationMetrics()
+        self.latency_metrics = ClassLatencyMetrics()
 
         self.set_isolation(program_isolation)
         self._initialize_worker_and_fiber()
         self._initialize_page_cache()
-        self.queue_manager = RequestQueueManager(model_params=self.model_params)
+        self.queue_manager = RequestQueueManager(
+            model_params=self.model_params,
+            page_cache=self.page_cache,
+            admission_mode=self.server_params.admission_mode,
+        )
 
+        # Named after the service, as services share the workers namespace.
         self.main_fiber_pool = FiberPool(
-            self.sysman, self.queue_manager.get_max_queue_size(), resizable=True
+            self.sysman,
+            self.queue_manager.get_max_queue_size(),
+            resizable=True,
+            name=f"{name}-fiber-pool",
         )
 
     def _initialize_worker_and_fiber(self):
-        self.main_worker = self.sysman.ls.create_worker(f"{self.name}-inference-main-0")
+        # Workers are shared by the services of all models, each service runs
+        # its batchers on fibers of its own.
+        self.main_worker = self.sysman.get_worker("inference-main-0")
         self.main_fiber = self.sysman.ls.create_fiber(self.main_worker)
 
-        self.prefill_worker = self.sysman.ls.create_worker(
-            f"{self.name}-inference-prefill-0"
-        )
+        self.prefill_worker = self.sysman.get_worker("inference-prefill-0")
         self.prefill_fiber = self.sysman.ls.create_fiber(self.prefill_worker)
 
-        self.decode_worker = self.sysman.ls.create_worker(
-            f"{self.name}-inference-decode-0"
-        )
+        self.decode_worker = self.sysman.get_worker("inference-decode-0")
         self.decode_fiber = self.sysman.ls.create_fiber(self.decode_worker)
 
         self.devices = self.prefill_fiber.devices_dict.values()
 
-    def _initialize_page_cache(self):
-        """Initialize page pool and attention cache."""
+    def _create_page_pool(self, model_params: ModelParams) -> PagePool:
         paged_kv_block_size_elements_per_device = (
-            self.model_params.paged_kv_cache.paged_kv_block_size_elements_per_device
+            model_params.paged_kv_cache.paged_kv_block_size_elements_per_device
         )
         if paged_kv_block_size_elements_per_device is None:
             paged_kv_block_size_elements_per_device = [
-                self.model_params.paged_kv_block_size_elements // len(self.devices)
+                model_params.paged_kv_block_size_elements // len(self.devices)
             ] * len(self.devices)
             logger.warning(
                 "Using an old model exported without `paged_kv_block_size_elements_per_device`."
@@ -90,16 +124,40 @@ class LlmGenerateService(GenerateService):
                 "Please re-export the model as support for old models without this field is deprecated and will be removed in future releases."
             )
         page_pool_config = PagePoolConfig(
-            dtype=self.model_params.paged_kv_cache.kv_cache_dtype,
-            alloc_page_count=self.model_params.paged_kv_cache.device_block_count,
+            dtype=model_params.paged_kv_cache.kv_cache_dtype,
+            alloc_page_count=model_params.paged_kv_cache.device_block_count,
             paged_kv_block_size_elements_per_device=paged_kv_block_size_elements_per_device,
         )
-        page_pool = PagePool(devices=self.devices, config=page_pool_config)
+        return PagePool(devices=self.devices, config=page_pool_config)
+
+    def _initialize_page_cache(self):
+        """Initialize page pool and attention cache."""
+        page_pool = self._create_page_pool(self.model_params)
+
+        host_store = None
+        if self.server_params.host_offload_page_count > 0:
+            host_store = HostPageStore(
+                page_pool=page_pool,
+                page_count=self.server_params.host_offload_page_count,
+            )
 
         if self.server_params.prefix_sharing_algorithm == "trie":
             self.page_cache = TriePagedAttentionCache(
                 page_pool=page_pool,
                 tokens_per_page=self.model_params.paged_kv_cache.block_seq_stride,
+                host_store=host_store,
+            )
+        elif self.server_params.prefix_sharing_algorithm == "radix":
+            self.page_cache = RadixPagedAttentionCache(
+                page_pool=page_pool,
+                tokens_per_page=self.model_params.paged_kv_cache.block_seq_stride,
+                host_store=host_store,
+            )
+        elif self.server_params.prefix_sharing_algorithm == "hashed":
+            self.page_cache = HashedPagedAttentionCache(
+                page_pool=page_pool,
+                tokens_per_page=self.model_params.paged_kv_cache.block_seq_stride,
+                host_store=host_store,
             )
         elif self.server_params.prefix_sharing_algorithm == "none":
             self.page_cache = BasePagedAttentionCache(
@@ -108,45 +166,146 @@ class LlmGenerateService(GenerateService):
             )
         else:
             raise ValueError(
-                f"Unknown prefix_sharing_algorithm {self.server_params.prefix_sharing_algorithm}. Currently only supporting 'trie' and 'none'."
+                f"Unknown prefix_sharing_algorithm {self.server_params.prefix_sharing_algorithm}. Currently only supporting 'trie', 'radix', 'hashed' and 'none'."
             )
 
+    def load_inference_module(self, vmfb_path: Path, *args, **kwargs):
+        self.model_artifacts.append(Path(vmfb_path))
+        super().load_inference_module(vmfb_path, *args, **kwargs)
+
+    def load_inference_parameters(self, *paths: Path, **kwargs):
+        self.model_artifacts.extend(Path(path) for path in paths)
+        super().load_inference_parameters(*paths, **kwargs)
+
+    def load_draft_model(
+        self, model_params: ModelParams, vmfb_path: Path, *parameter_paths: Path
+    ):
+        """Loads a draft model to speculate tokens for the main model.
+
+        The draft model gets its own program, KV cache and batcher, running on
+        the fibers of the main model.
+        """
+        self.draft_model_params = model_params
+        super().load_inference_module(vmfb_path, component="draft")
+        super().load_inference_parameters(
+            *parameter_paths, parameter_scope="model", component="draft"
+        )
+
+    def _start_draft_model(self):
+        model_params = self.draft_model_params
+        program = self.create_program(
+            modules=self.initialize_program_modules("draft"),
+            devices=self.sysman.ls.devices,
+        )
+        prefill_functions, decode_functions = self._function_references(
+            program, model_params
+        )
+        self.draft_page_cache = BasePagedAttentionCache(
+            page_pool=self._create_page_pool(model_params),
+            tokens_per_page=model_params.paged_kv_cache.block_seq_stride,
+        )
+        batch_cfg = BatchConfig(
+            BatchMode.DEFAULT,
+            model_params,
+            prefill_functions,
+            decode_functions,
+            self.prog_isolation,
+        )
+        self.draft_batcher = BatchingFacade.build_batcher(
+            batch_cfg, self.draft_page_cache, self.prefill_fiber, self.decode_fiber
+        )
+        self.draft_batcher.launch()
+
     def start(self):
+        if self.server_params.prefix_cache_snapshot_path is not None:
+            snapshot_path = Path(self.server_params.prefix_cache_snapshot_path)
+            if self.name != "default":
+                snapshot_path = snapshot_path / self.name
+            self.cache_snapshotter = TrieSnapshotter(
+                cache=self.page_cache,
+                path=snapshot_path,
+                fingerprint=self.model_params.fingerprint(
+                    *self.model_artifacts,
+                    weights_version=self.server_params.prefix_cache_snapshot_weights_version,
+                ),
+                worker=self.prefill_worker,
+                interval_s=self.server_params.prefix_cache_snapshot_interval_s,
+            )
+            self.cache_snapshotter.start()
+
         component_modules = self.initialize_program_modules("main")
         self.inference_program = self.create_program(
             modules=component_modules, devices=self.sysman.ls.devices
         )
         self.initialize_function_references()
         batch_cfg = BatchConfig(
-            BatchMode.DEFAULT,
+            BatchMode[self.server_params.batch_mode.upper()],
             self.model_params,
             self.prefill_functions,
             self.decode_functions,
             self.prog_isolation,
             self.server_params.chunk_block_size,
+            self.server_params.token_budget,
+            self.server_params.batch_boarding_deadline_s,
+            preemption_policy=(
+                PreemptionPolicy(self.server_params.preemption_policy)
+                if self.server_params.preemption_policy is not None
+                else None
+            ),
+            tenant_shares=self.server_params.tenant_shares,
         )
         self.unified_batcher = BatchingFacade.build_batcher(
             batch_cfg, self.page_cache, self.prefill_fiber, self.decode_fiber
         )
         self.unified_batcher.launch()
+        if self.draft_model_params is not None:
+            self._start_draft_model()
 
     def shutdown(self):
         super().shutdown()
         self.unified_batcher.shutdown()
+        if self.draft_batcher is not None:
+            self.draft_batcher.shutdown()
+            self.draft_page_cache.shutdown()
+        if self.cache_snapshotter is not None:
+            self.cache_snapshotter.shutdown()
         self.page_cache.shutdown()
+        self.tokenization_pool.shutdown()
+        if (
+            self.draft_batcher is not None
+            or self.server_params.prompt_lookup_ngram_size > 0
+        ):
+            logger.info(
+                "Speculative decoding stats at shutdown: %r",
+                self.speculation_metrics.get_stats(),
+            )
+        for (priority, tenant), stats in self.latency_metrics.get_stats().items():
+            logger.info(
+                "Latency of priority %d, tenant %r at shutdown: %r",
+                priority,
+                tenant,
+                stats,
+            )
 
     def initialize_function_references(self):
-        self.prefill_functions = {}
-        for bs in self.model_params.prefill_batch_sizes:
-            self.prefill_functions[bs] = self.inference_program[
-                f"{self.model_params.module_name}.prefill_bs{bs}"
+        self.prefill_functions, self.decode_functions = self._function_references(
+            self.inference_program, self.model_params
+        )
+
+    @staticmethod
+    def _function_references(
+        program: sf.Program, model_params: ModelParams
+    ) -> tuple[dict[int, sf.ProgramFunction], dict[int, sf.ProgramFunction]]:
+        prefill_functions = {}
+        for bs in model_params.prefill_batch_sizes:
+            prefill_functions[bs] = program[
+                f"{model_params.module_name}.prefill_bs{bs}"
             ]
         # Resolve decode entrypoints.
-        self.decode_functions = {}
-        for bs in self.model_params.decode_batch_sizes:
-            self.decode_functions[bs] = self.inference_program[
-                f"{self.model_params.module_name}.decode_bs{bs}"
-            ]
+        decode_functions = {}
+        for bs in model_params.decode_batch_sizes:
+            decode_functions[bs] = program[f"{model_params.module_name}.decode_bs{bs}"]
+        return prefill_functions, decode_functions
 
     def __repr__(self):
         return (
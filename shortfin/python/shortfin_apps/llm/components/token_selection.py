@@ -0,0 +1,154 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Batch-level token selection.
+
+A decode invocation returns the logits of every request in the batch as one
+`[bs, 1, d]` host buffer. Rather than having each decoder normalize and search
+its own row of the vocabulary, the responder selects the candidate tokens of
+all rows in a single NumPy pass and hands each request only the `num_beams`
+best candidates of its row. The decoder then finishes the beam bookkeeping on
+those few candidates, see `TokenSelector.step_candidates`.
+
+Since a beam's best continuations are among the `num_beams` best of its own
+row, this selects the same tokens as searching all rows of a request at once.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import shortfin.array as sfnp
+
+from .decode_config import DecodeConfig, LogitsNormalization
+from .messages import LlmInferenceExecRequest
+
+
+def _combine_scores_null(
+    logits: np.ndarray, scores: np.ndarray, temperatures: np.ndarray
+) -> np.ndarray:
+    logits = logits / temperatures
+    peak = np.max(logits, axis=-1, keepdims=True)
+    log_sum = np.log(np.sum(np.exp(logits - peak), axis=-1, keepdims=True))
+    return scores + logits - (peak + log_sum)
+
+
+def _combine_scores_softmax(
+    logits: np.ndarray, scores: np.ndarray, temperatures: np.ndarray
+) -> np.ndarray:
+    return scores * logits
+
+
+def _combine_scores_log_softmax(
+    logits: np.ndarray, scores: np.ndarray, temperatures: np.ndarray
+) -> np.ndarray:
+    return scores + logits
+
+
+_combine_functions = {
+    LogitsNormalization.NONE: _combine_scores_null,
+    LogitsNormalization.SOFTMAX: _combine_scores_softmax,
+    LogitsNormalization.LOG_SOFTMAX: _combine_scores_log_softmax,
+}
+
+
+def normalize_scores(
+    scores: np.ndarray, norm: float, normalization: LogitsNormalization
+) -> np.ndarray:
+    """Normalizes candidate scores against the best running score of a request."""
+    if normalization == LogitsNormalization.SOFTMAX:
+        return scores / max(norm, 0.1)
+    return scores - norm
+
+
+def select_batch_candidates(
+    logits: np.ndarray,
+    indices: Optional[np.ndarray],
+    decode_configs: Sequence[DecodeConfig],
+    scores: Sequence[float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Selects the best tokens of each row of a batch of logits.
+
+    Args:
+        logits: `[n, d]` logits, one row per request beam.
+        indices: Optional `[n, d]` token ids of `logits`, for models that only
+            return their top logits.
+        decode_configs: Decode config of the request of each row.
+        scores: Running score of the beam of each row.
+
+    Returns:
+        `[n, k]` tokens and scores, best first, where `k` is the largest
+        `num_beams` of the batch. The scores are not normalized yet, see
+        `normalize_scores`.
+    """
+    logits = logits.astype(np.float32)
+    scores = np.asarray(scores, dtype=np.float32)[:, None]
+    temperatures = np.array(
+        [
+            [1.0 if config.temperature is None else config.temperature]
+            for config in decode_configs
+        ],
+        dtype=np.float32,
+    )
+
+    normalizations = np.array(
+        [config.logits_normalization.value for config in decode_configs]
+    )
+    combined = np.empty_like(logits)
+    for normalization, combine in _combine_functions.items():
+        rows = normalizations == normalization.value
+        if np.any(rows):
+            combined[rows] = combine(logits[rows], scores[rows], temperatures[rows])
+
+    token_options = combined.shape[-1]
+    k = min(max(config.num_beams for config in decode_configs), token_options)
+    if k == 1:
+        positions = np.argmax(combined, axis=-1)[:, None]
+    else:
+        positions = np.argpartition(combined, token_options - k, axis=-1)
+        positions = positions[:, token_options - k :]
+        order = np.argsort(-np.take_along_axis(combined, positions, axis=-1), axis=-1)
+        positions = np.take_along_axis(positions, order, axis=-1)
+
+    tokens = positions
+    if indices is not None:
+        tokens = np.take_along_axis(indices, positions, axis=-1)
+    return tokens, np.take_along_axis(combined, positions, axis=-1)
+
+
+def assign_batch_candidates(
+    exec_requests: List[LlmInferenceExecRequest],
+    logits: sfnp.device_array,
+    indices: Optional[sfnp.device_array],
+):
+    """Sets `result_candidates` of the requests of a decode batch.
+
+    Only requests with a `decode_config` take part in batch selection.
+
+    Args:
+        exec_requests: Requests of the batch, in batch order.
+        logits: `[bs, 1, d]` host logits of the batch.
+        indices: Optional `[bs, 1, d]` host token ids of the logits.
+    """
+    rows = [i for i, req in enumerate(exec_requests) if req.decode_config is not None]
+    if not rows:
+        return
+
+    logits = np.asarray(logits)[rows, 0]
+    if indices is not None:
+        indices = np.asarray(indices)[rows, 0]
+    requests = [exec_requests[i] for i in rows]
+    tokens, scores = select_batch_candidates(
+        logits,
+        indices,
+        [req.decode_config for req in requests],
+        [req.score for req in requests],
+    )
+
+    for i, req in enumerate(requests):
+        num_beams = req.decode_config.num_beams
+        req.result_candidates = (tokens[i, :num_beams], scores[i, :num_beams])
@@ -4,16 +4,24 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, TypeVar
 
 import tokenizers
 
 import shortfin as sf
 import shortfin.array as sfnp
 
+from ...utils import wrap_future
+
 # Type alias from the backing library.
 Encoding = tokenizers.Encoding
 
+T = TypeVar("T")
+
 
 class Tokenizer:
     def __init__(
@@ -90,3 +98,85 @@ class Tokenizer:
         for i, enc in enumerate(encs):
             ary.view(i).items = enc.attention_mask
         return ary
+
+
+class TokenizationPool:
+    """Runs tokenizer work on a thread pool, off the calling event loop.
+
+    The `tokenizers` library releases the GIL while encoding and decoding, so
+    the pool threads run in parallel with the shortfin workers. Texts submitted
+    by concurrent requests while the pool is busy are encoded together in a
+    single `encode_batch` call. Encodings of the `cache_size` most recent
+    distinct texts are kept in an LRU cache; cached encodings are shared
+    between requests and must not be modified.
+
+    The coroutines may be awaited from any event loop.
+    """
+
+    def __init__(self, tokenizer: Tokenizer, max_workers: int, cache_size: int):
+        self.tokenizer = tokenizer
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tokenizer"
+        )
+        self._cache_size = cache_size
+        self._cache: OrderedDict[str, Encoding] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending: list[tuple[str, Future]] = []
+        self._flush_scheduled = False
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """Runs `fn(*args)` on the pool."""
+        return await wrap_future(self._executor.submit(fn, *args))
+
+    async def decode(self, sequences) -> list[str]:
+        """Decodes a batch of sequences to text."""
+        return await self.run(self.tokenizer.decode, sequences)
+
+    async def encode(self, texts: list[str]) -> list[Encoding]:
+        """Encodes a batch of texts, applying no padding."""
+        futures = []
+        with self._lock:
+            for text in texts:
+                future = Future()
+                encoding = self._cache.get(text)
+                if encoding is not None:
+                    self._cache.move_to_end(text)
+                    future.set_result(encoding)
+                else:
+                    self._pending.append((text, future))
+                futures.append(future)
+
+            if self._pending and not self._flush_scheduled:
+                self._flush_scheduled = True
+                self._executor.submit(self._flush)
+
+        return [await wrap_future(future) for future in futures]
+
+    def _flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+            self._flush_scheduled = False
+
+        # Texts repeated within the batch are encoded once.
+        texts = list(dict.fromkeys(text for text, _ in pending))
+        try:
+            encodings = dict(zip(texts, self.tokenizer.encode(texts)))
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            if self._cache_size > 0:
+                self._cache.update(encodings)
+                for text in encodings:
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        for text, future in pending:
+            future.set_result(encodings[text])
@@ -0,0 +1,154 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Host-side microbenchmark of invocation argument packing.
+
+Builds prefill and decode batches of random requests and reports the host time
+spent in `prepare_args` per batch, i.e. the work between two invocations. Every
+iteration uses a fresh batch, so batch sequence lengths vary as in serving:
+
+    python -m shortfin_apps.llm.invocation_benchmark --batch_size 64
+
+`--array_cache` selects how argument buffers are allocated.
+"""
+
+import argparse
+import logging
+import math
+import random
+import sys
+import time
+
+import shortfin as sf
+import shortfin.array as sfnp
+
+from .components.device_array_cache import ArgumentArena, DeviceArrayCache
+from .components.invocation import DecodeTask, LlmTaskInput, PrefillTask
+
+logger = logging.getLogger(__name__)
+
+
+def make_task_inputs(
+    batch_size: int, prompt_len: int, seq_stride: int, vocab_size: int, seed: int
+) -> list[LlmTaskInput]:
+    rng = random.Random(seed)
+    task_inputs = []
+    for i in range(batch_size):
+        seq_len = rng.randint(prompt_len // 2, prompt_len)
+        block_count = math.ceil(seq_len / seq_stride)
+        task_inputs.append(
+            LlmTaskInput(
+                rid=str(i),
+                instance_id=str(i),
+                block_count=block_count,
+                seq_len=seq_len,
+                input_tokens=tuple(rng.randrange(vocab_size) for _ in range(seq_len)),
+                page_ids=tuple(range(i * block_count, (i + 1) * block_count)),
+                start_position=0,
+            )
+        )
+    return task_inputs
+
+
+def make_decode_inputs(task_inputs: list[LlmTaskInput]) -> list[LlmTaskInput]:
+    return [
+        LlmTaskInput(
+            rid=task_input.rid,
+            instance_id=task_input.instance_id,
+            block_count=task_input.block_count,
+            seq_len=task_input.seq_len,
+            input_tokens=task_input.input_tokens[-1:],
+            page_ids=task_input.page_ids,
+            start_position=task_input.seq_len - 1,
+        )
+        for task_input in task_inputs
+    ]
+
+
+async def time_prepare_args(tasks, batch_size: int, device) -> float:
+    total = 0.0
+    for task in tasks:
+        start = time.perf_counter()
+        args = await task.prepare_args(batch_size)
+        total += time.perf_counter() - start
+        await device
+        for arg in args:
+            if not arg.wrapped:
+                arg.release()
+    return total / len(tasks)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--prompt_len", type=int, default=2048)
+    parser.add_argument("--seq_stride", type=int, default=32)
+    parser.add_argument("--vocab_size", type=int, default=32000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--array_cache", choices=["arena", "device_array_cache"], default="arena"
+    )
+    args = parser.parse_args(argv)
+
+    batches = [
+        make_task_inputs(
+            args.batch_size,
+            args.prompt_len,
+            args.seq_stride,
+            args.vocab_size,
+            args.seed + i,
+        )
+        for i in range(args.iterations)
+    ]
+
+    sc = sf.host.CPUSystemBuilder()
+    with sc.create_system() as ls:
+        fiber = ls.create_fiber(ls.create_worker("benchmark-worker"))
+        device = fiber.device(0)
+        if args.array_cache == "arena":
+            array_cache = ArgumentArena(device)
+        else:
+            array_cache = DeviceArrayCache(device)
+        page_table = sfnp.device_array.for_device(device, [1, 8], sfnp.float16)
+
+        tasks = {
+            "prefill": [
+                PrefillTask(
+                    task_inputs=task_inputs,
+                    array_cache=array_cache,
+                    page_tables=[page_table],
+                    seq_stride=args.seq_stride,
+                    has_prefill_position=True,
+                )
+                for task_inputs in batches
+            ],
+            "decode": [
+                DecodeTask(
+                    task_inputs=make_decode_inputs(task_inputs),
+                    array_cache=array_cache,
+                    page_tables=[page_table],
+                    seq_stride=args.seq_stride,
+                )
+                for task_inputs in batches
+            ],
+        }
+
+        async def run():
+            for name, name_tasks in tasks.items():
+                duration = await time_prepare_args(name_tasks, args.batch_size, device)
+                print(f"{name:>8}: {duration * 1e6:10.1f} us/batch")
+            if isinstance(array_cache, ArgumentArena):
+                print(f"   arena: {array_cache.get_stats()}")
+
+        ls.run(run())
+        array_cache.free()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main(sys.argv[1:])
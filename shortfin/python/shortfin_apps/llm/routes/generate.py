@@ -7,6 +7,7 @@
 from fastapi import APIRouter, Request
 
 from shortfin.interop.fastapi import FastAPIResponder, RequestStatusTracker
+from shortfin.support.responder import ResponderErrorCodes
 
 from ..components.generate import ClientGenerateBatchProcess
 from ..components.io_struct import GenerateReqInput
@@ -20,10 +21,22 @@ generation_router = APIRouter()
 async def generate_request(gen_req: GenerateReqInput, request: Request):
     # app.state.services is populated by the ShortfinLlmLifecycleManager
     # see shortfin/python/shortfin_apps/llm/components/lifecycle.py
-    service: GenerateService = request.app.state.services["default"]
+    service: GenerateService = request.app.state.services.get(
+        gen_req.model or "default"
+    )
+    responder = FastAPIResponder(request)
+    if service is None:
+        responder.send_error(
+            error_message=f"Unknown model '{gen_req.model}'.",
+            code=ResponderErrorCodes.INVALID_REQUEST_ARGS,
+            extra_fields={},
+        )
+        response = await responder.response
+        responder.close()
+        return response
+
     gen_req.post_init()
     tracker = RequestStatusTracker(request)
-    responder = FastAPIResponder(request)
     process = ClientGenerateBatchProcess(
         service, gen_req, responder, fiber=service.main_fiber
     ).launch()
@@ -5,6 +5,7 @@
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
 import argparse
+import json
 import logging
 from pathlib import Path
 import sys
@@ -83,6 +84,12 @@ def add_service_args(parser: argparse.ArgumentParser):
         help="Parameter archives to load (supports: gguf, irpa, safetensors).",
         metavar="FILE",
     )
+    parser.add_argument(
+        "--models",
+        type=Path,
+        default=None,
+        help="Path to a json file listing additional models to serve from this process, selected by the `model` field of requests. Each entry has a `name`, `model_config`, `vmfb`, `parameters` and optionally its own `tokenizer_json`, `tokenizer_config_json` and KV cache `page_budget`.",
+    )
     parser.add_argument(
         "--program_isolation",
         type=str,
@@ -98,9 +105,33 @@ def add_service_args(parser: argparse.ArgumentParser):
     parser.add_argument(
         "--prefix_sharing_algorithm",
         type=str,
-        choices=["none", "trie"],
+        choices=["none", "trie", "radix", "hashed"],
         help="Algorithm to use for prefix sharing in KV cache",
     )
+    parser.add_argument(
+        "--host_offload_page_count",
+        type=int,
+        default=None,
+        help="Number of KV cache pages to keep in host memory when they are evicted from the device prefix cache (0 disables)",
+    )
+    parser.add_argument(
+        "--prefix_cache_snapshot_path",
+        type=str,
+        default=None,
+        help="Directory to restore the prefix cache from on startup and save it to on shutdown",
+    )
+    parser.add_argument(
+        "--prefix_cache_snapshot_interval_s",
+        type=float,
+        default=None,
+        help="Interval in seconds at which the prefix cache snapshot is also saved while serving",
+    )
+    parser.add_argument(
+        "--prefix_cache_snapshot_weights_version",
+        type=str,
+        default=None,
+        help="Version of the model weights, e.g. a checksum, that prefix cache snapshots are only restored for. Defaults to the size and modification time of the model files",
+    )
     parser.add_argument(
         "--num_beams",
         type=int,
@@ -119,6 +150,89 @@ def add_service_args(parser: argparse.ArgumentParser):
         default=None,
         help="*Block-aligned* Chunk size to use for chunked prefill.",
     )
+    parser.add_argument(
+        "--batch_mode",
+        type=str,
+        choices=["default", "pipelined", "continuous"],
+        default=None,
+        help="Batching mode. `pipelined` alternates two decode batches so host preparation of one overlaps device execution of the other. `continuous` reschedules prefill and decode work at every iteration.",
+    )
+    parser.add_argument(
+        "--token_budget",
+        type=int,
+        default=None,
+        help="Maximum number of tokens per iteration in continuous batching mode.",
+    )
+    parser.add_argument(
+        "--batch_boarding_deadline_s",
+        type=float,
+        default=None,
+        help="Board batches when full or at most this many seconds after the oldest pending request, instead of on strobe timers.",
+    )
+    parser.add_argument(
+        "--preemption_policy",
+        type=str,
+        choices=["newest_first", "lowest_priority"],
+        default=None,
+        help="Preempt greedy decodes when the KV cache runs out of pages, picking victims by this policy. Preempted requests resume by re-prefilling from the prefix cache.",
+    )
+    parser.add_argument(
+        "--tenant_shares",
+        type=json.loads,
+        default=None,
+        help='Fair scheduling across tenants, as a JSON object of token rate shares, e.g. \'{"a": 2, "b": 1}\'. Requests carry their `tenant` and `priority`.',
+    )
+    parser.add_argument(
+        "--admission_mode",
+        type=str,
+        choices=["reserve", "overcommit"],
+        default=None,
+        help="Request admission. `reserve` reserves the worst case KV cache pages of each request and rejects requests that do not fit. `overcommit` counts prefix cache hits, reserves pages for the expected completion length and queues requests until they fit.",
+    )
+    parser.add_argument(
+        "--draft_model_config",
+        type=Path,
+        default=None,
+        help="Path to the config file of a draft model for speculative decoding",
+    )
+    parser.add_argument(
+        "--draft_vmfb",
+        type=Path,
+        default=None,
+        help="Draft model VMFB to load for speculative decoding",
+    )
+    parser.add_argument(
+        "--draft_parameters",
+        type=Path,
+        nargs="*",
+        default=[],
+        help="Parameter archives of the draft model (supports: gguf, irpa, safetensors).",
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--num_speculative_tokens",
+        type=int,
+        default=None,
+        help="Maximum number of tokens proposed per target model invocation in speculative decoding.",
+    )
+    parser.add_argument(
+        "--prompt_lookup_ngram_size",
+        type=int,
+        default=None,
+        help="Enables speculative decoding without a draft model, proposing continuations of n-grams of up to this size found in the prompt and prefix cache.",
+    )
+    parser.add_argument(
+        "--tokenizer_workers",
+        type=int,
+        default=None,
+        help="Number of threads encoding prompts and decoding responses.",
+    )
+    parser.add_argument(
+        "--tokenizer_cache_size",
+        type=int,
+        default=None,
+        help="Number of prompt encodings cached for repeated prompts (0 disables).",
+    )
 
 
 def parse_args(argv):
@@ -185,6 +185,13 @@ class MicroSDXLExecutor(sf.Process):
         )
 
         self.exec.phases[InferencePhase.POSTPROCESS]["required"] = False
+        if self.args.use_batcher:
+            # Let the batcher combine concurrent samples into flights.
+            self.service.batcher.submit(self.exec)
+            await self.exec.done
+            self.imgs = [self.exec.image_array]
+            return
+
         while len(self.service.idle_meta_fibers) == 0:
             time.sleep(0.5)
             print("All fibers busy...")
@@ -371,7 +378,9 @@ async def run_benchmark(
                 imgs.append(results)
                 print(f"{len(imgs)} samples received, of a total {samples}")
 
-    print(f"Completed {samples} samples in {time.time() - start} seconds.")
+    elapsed = time.time() - start
+    print(f"Completed {samples} samples in {elapsed} seconds.")
+    print(f"Throughput: {samples / elapsed:.3f} images/s")
     return
 
 
@@ -569,6 +578,11 @@ def main():
         default=16,
         help="Maximum number of executor threads to run at any given time.",
     )
+    parser.add_argument(
+        "--use_batcher",
+        action="store_true",
+        help="Submit samples through the service batcher, which combines concurrent samples into batched invocations, instead of launching one executor per sample.",
+    )
     parser.add_argument(
         "--batch_size",
         type=int,
@@ -83,6 +83,20 @@ class ModelParams:
         union = set.union(*[set(list) for list in bs_lists])
         return union
 
+    @property
+    def flight_batch_sizes(self) -> list[int]:
+        """Batch sizes for which the text encoder and all denoise submodels are compiled.
+
+        Requests are packed into flights of these sizes. The VAE falls back to
+        batch size 1 for sizes it is not compiled for.
+        """
+        denoise = [
+            set(sizes)
+            for submodel, sizes in self.batch_sizes.items()
+            if submodel in ("unet", "scheduled_unet", "scheduler")
+        ]
+        return sorted(set(self.batch_sizes.get("clip", [1])).intersection(*denoise))
+
     @staticmethod
     def load_json(path):
         with open(path, "rt") as f:
@@ -8,6 +8,8 @@ from typing import List, Optional, Union
 from dataclasses import dataclass
 import uuid
 
+from shortfin_apps.utilities.image import ImageFormat, validate_compression_level
+
 
 @dataclass
 class GenerateReqInput:
@@ -30,6 +32,11 @@ class GenerateReqInput:
     neg_input_ids: Optional[Union[List[List[int]], List[int]]] = None
     # Output image format. Defaults to base64. One string ("PIL", "base64")
     output_type: Optional[List[str]] = None
+    # Encoding of the output images, e.g. "png", "jpeg" or "raw". Defaults to
+    # the server setting.
+    image_format: Optional[str] = None
+    # PNG zlib level or JPEG/WebP quality. Defaults to the server setting.
+    image_compression_level: Optional[int] = None
     # The request id.
     rid: Optional[Union[List[str], str]] = None
 
@@ -70,6 +77,11 @@ class GenerateReqInput:
                 raise ValueError("The rid should be a list.")
         if self.output_type is None:
             self.output_type = ["base64"] * self.num_output_images
+        # Raises for unknown formats and compression levels out of range.
+        image_format = (
+            ImageFormat(self.image_format) if self.image_format is not None else None
+        )
+        validate_compression_level(image_format, self.image_compression_level)
         # Temporary restrictions
         heights = [self.height] if not isinstance(self.height, list) else self.height
         widths = [self.width] if not isinstance(self.width, list) else self.width
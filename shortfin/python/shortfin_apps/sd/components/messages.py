@@ -61,7 +61,7 @@ class SDXLInferenceExecRequest(InferenceExecRequest):
         | list[sfnp.device_array]
         | None = None,
         sample: sfnp.device_array | None = None,
-        image_array: sfnp.device_array | None = None,
+        image_array: np.ndarray | None = None,
     ):
         super().__init__()
         self.command_buffer = None
@@ -94,6 +94,9 @@ class SDXLInferenceExecRequest(InferenceExecRequest):
 
         self.response_image: Union[Image, None] = None
 
+        # Requests packed into this one by the batcher, see `combine`.
+        self.members: list[SDXLInferenceExecRequest] = []
+
         self.done = sf.VoidFuture()
 
         # Response control.
@@ -148,7 +151,6 @@ class SDXLInferenceExecRequest(InferenceExecRequest):
 
             m.fill(np_arr)
         cb.guidance_scale.copy_from(guidance_host)
-        cb.images_host.fill(np.array(0, dtype="float16"))
         self.command_buffer = cb
         return
 
@@ -183,7 +185,7 @@ class SDXLInferenceExecRequest(InferenceExecRequest):
                 return required, meta
             case InferencePhase.DENOISE:
                 required = True
-                meta = [self.width, self.height, self.steps]
+                meta = [self.width, self.height, self.steps, self.guidance_scale]
                 return required, meta
             case InferencePhase.ENCODE:
                 required = True
@@ -200,6 +202,45 @@ class SDXLInferenceExecRequest(InferenceExecRequest):
         self.done = sf.VoidFuture()
         self.return_host_array = True
 
+    @property
+    def can_combine(self) -> bool:
+        """Whether the request may share a program invocation with other requests."""
+        return (
+            self.batch_size == 1
+            and isinstance(self.prompt, str)
+            and isinstance(self.neg_prompt, str)
+            and self.input_ids is None
+            and self.sample is None
+            and self.image_array is None
+        )
+
+    @staticmethod
+    def combine(
+        requests: list["SDXLInferenceExecRequest"], batch_size: int
+    ) -> "SDXLInferenceExecRequest":
+        """Packs requests of equal denoise metadata into one request of `batch_size`.
+
+        Missing rows are padded with the last request. Each row keeps the
+        prompts and seed of its request, and its images are handed back to the
+        request by the executor.
+        """
+        padded = requests + [requests[-1]] * (batch_size - len(requests))
+        first = requests[0]
+        req = SDXLInferenceExecRequest(
+            prompt=[r.prompt for r in padded],
+            neg_prompt=[r.neg_prompt for r in padded],
+            height=first.height,
+            width=first.width,
+            steps=first.steps,
+            guidance_scale=first.guidance_scale,
+            seed=[r.seed for r in padded],
+        )
+        req.phases[InferencePhase.POSTPROCESS]["required"] = any(
+            r.phases[InferencePhase.POSTPROCESS]["required"] for r in requests
+        )
+        req.members = list(requests)
+        return req
+
     @staticmethod
     def from_batch(gen_req: GenerateReqInput, index: int) -> "SDXLInferenceExecRequest":
         gen_inputs = [
@@ -13,19 +13,30 @@ from tqdm.auto import tqdm
 from pathlib import Path
 from PIL import Image
 from collections import namedtuple
+from typing import Optional
 import base64
 import gc
 
 import shortfin as sf
 import shortfin.array as sfnp
 
-from ...utils import GenerateService, BatcherProcess
+from ...utils import (
+    GenerateService,
+    BatcherProcess,
+    BoardingPolicy,
+    StrobeMessage,
+    copy_device_array,
+    read_device_array,
+)
+from ...utilities.image import ImageEncodingPool, ImageFormat, to_uint8_images
+from ...utilities.prompt_cache import PromptEmbeddingCache
 
 from .config_struct import ModelParams
 from .manager import SDXLSystemManager
 from .messages import SDXLInferenceExecRequest, InferencePhase
 from .tokenizer import Tokenizer
 from .metrics import measure, log_duration_str
+from .step_scheduler import DenoiseStepScheduler
 
 logger = logging.getLogger("shortfin-sd.service")
 
@@ -47,6 +58,12 @@ class SDXLGenerateService(GenerateService):
         trace_execution: bool = False,
         use_batcher: bool = True,
         splat: bool = False,
+        boarding_deadline_s: Optional[float] = None,
+        image_format: ImageFormat = ImageFormat.PNG,
+        image_compression_level: Optional[int] = None,
+        image_encoding_workers: int = 4,
+        requests_per_fiber: int = 1,
+        prompt_cache_bytes: int = 0,
     ):
         super().__init__(sysman, fibers_per_device, workers_per_device)
         self.name = name
@@ -59,11 +76,30 @@ class SDXLGenerateService(GenerateService):
         self.trace_execution = trace_execution
         self.show_progress = show_progress
         self.splat_weights = splat
+        if requests_per_fiber < 1:
+            raise ValueError("requests_per_fiber must be at least 1.")
+        # Requests sharing a fiber interleave their denoise steps.
+        self.requests_per_fiber = requests_per_fiber
+        # Embeddings of recent prompts, reused in place of encoding them.
+        self.prompt_cache = (
+            PromptEmbeddingCache(prompt_cache_bytes) if prompt_cache_bytes > 0 else None
+        )
+        self.prompt_fingerprint = (
+            model_params.module_names.get("clip"),
+            model_params.clip_dtype.name,
+            model_params.max_seq_len,
+            *(tokenizer.fingerprint for tokenizer in tokenizers),
+        )
 
         # Finish initialization
         self.set_isolation(prog_isolation)
         self.initialize_workers_and_fibers()
-        self.batcher = SDXLBatcherProcess(self)
+        self.batcher = SDXLBatcherProcess(self, boarding_deadline_s)
+        # Default encoding of the response images. Images are encoded on a
+        # thread pool, while the fibers run the next batch.
+        self.image_format = image_format
+        self.image_compression_level = image_compression_level
+        self.image_encoder = ImageEncodingPool(image_encoding_workers)
 
     def initialize_workers_and_fibers(self):
         """Initialize workers and fibers for the service."""
@@ -85,7 +121,11 @@ class SDXLGenerateService(GenerateService):
                     raw_fiber, len(self.meta_fibers), worker_idx
                 )
                 self.meta_fibers.append(meta_fiber)
-                self.idle_meta_fibers.append(meta_fiber)
+
+        # A fiber is listed once per request it may run. The slots of all
+        # fibers are listed before any fiber's second one.
+        for _ in range(self.requests_per_fiber):
+            self.idle_meta_fibers.extend(self.meta_fibers)
 
         # Initialize program and function containers
         for idx in range(len(self.workers)):
@@ -95,9 +135,17 @@ class SDXLGenerateService(GenerateService):
     def equip_fiber(self, fiber, idx: int, worker_idx: int):
         """Equip a fiber with additional metadata and command buffers."""
         MetaFiber = namedtuple(
-            "MetaFiber", ["fiber", "idx", "worker_idx", "device", "command_buffers"]
+            "MetaFiber",
+            [
+                "fiber",
+                "idx",
+                "worker_idx",
+                "device",
+                "command_buffers",
+                "denoise_scheduler",
+            ],
         )
-        cbs_per_fiber = 1
+        cbs_per_fiber = self.requests_per_fiber
         cbs = []
         for _ in range(cbs_per_fiber):
             for batch_size in self.model_params.all_batch_sizes:
@@ -105,7 +153,9 @@ class SDXLGenerateService(GenerateService):
                     initialize_command_buffer(fiber, self.model_params, batch_size)
                 )
 
-        return MetaFiber(fiber, idx, worker_idx, fiber.device(0), cbs)
+        return MetaFiber(
+            fiber, idx, worker_idx, fiber.device(0), cbs, DenoiseStepScheduler()
+        )
 
     def load_inference_module(
         self, vmfb_path: Path, component: str = None, batch_size: int = None
@@ -174,6 +224,28 @@ class SDXLGenerateService(GenerateService):
         self.initialize_inference_functions()
         self.batcher.launch()
 
+    def shutdown(self):
+        super().shutdown()
+        self.image_encoder.shutdown()
+        if self.requests_per_fiber > 1:
+            schedulers = [f.denoise_scheduler for f in self.meta_fibers]
+            logger.info(
+                "Denoise steps: %d, of which %d had other requests waiting",
+                sum(s.steps for s in schedulers),
+                sum(s.contended_steps for s in schedulers),
+            )
+        if self.prompt_cache is not None:
+            stats = self.prompt_cache.get_stats()
+            logger.info(
+                "Prompt cache: %d hits, %d misses (%.1f%% hit rate), %d entries of %d bytes, %d evictions",
+                stats.hits,
+                stats.misses,
+                100 * stats.hit_rate,
+                stats.entries,
+                stats.bytes,
+                stats.evictions,
+            )
+
     def initialize_inference_functions(self):
         for worker_idx, worker in enumerate(self.workers):
             self.inference_functions[worker_idx]["encode"] = {}
@@ -213,18 +285,46 @@ class SDXLBatcherProcess(BatcherProcess):
     STROBE_SHORT_DELAY = 0.5
     STROBE_LONG_DELAY = 1
 
-    def __init__(self, service: SDXLGenerateService):
+    def __init__(
+        self,
+        service: SDXLGenerateService,
+        boarding_deadline_s: Optional[float] = None,
+    ):
         super().__init__(fiber=service.meta_fibers[0].fiber)
         self.service = service
         self.batcher_infeed = self.system.create_queue()
-        self.pending_requests: set[InferenceExecRequest] = set()
+        # In order of arrival, so that the oldest requests board first.
+        self.pending_requests: list[InferenceExecRequest] = []
         self.strobe_enabled = True
         self.strobes: int = 0
-        self.ideal_batch_size: int = max(service.model_params.batch_sizes["clip"])
+        self.flight_batch_sizes = service.model_params.flight_batch_sizes or [1]
+        self.ideal_batch_size: int = max(self.flight_batch_sizes)
         self.num_fibers = len(service.meta_fibers)
+        self.boarding_policy = None
+        if boarding_deadline_s is not None:
+            self.boarding_policy = BoardingPolicy(
+                ideal_batch_size=self.ideal_batch_size, max_delay_s=boarding_deadline_s
+            )
+        # Arrival time of each pending request, oldest first.
+        self._arrivals: dict[SDXLInferenceExecRequest, float] = {}
 
     def handle_inference_request(self, request):
-        self.pending_requests.add(request)
+        if self.boarding_policy is not None:
+            now = time.monotonic()
+            self.boarding_policy.record_arrival(now)
+            self._arrivals[request] = now
+        self.pending_requests.append(request)
+
+    def _oldest_arrival(self) -> Optional[float]:
+        return next(iter(self._arrivals.values()), None)
+
+    def next_boarding_deadline(self) -> Optional[float]:
+        # Without an idle fiber, the batcher is woken up when one is released.
+        if not self.pending_requests or not self.service.idle_meta_fibers:
+            return None
+        return self.boarding_policy.deadline(
+            len(self.pending_requests), self._oldest_arrival()
+        )
 
     async def process_batches(self):
         await self.board_flights()
@@ -233,7 +333,13 @@ class SDXLBatcherProcess(BatcherProcess):
         waiting_count = len(self.pending_requests)
         if waiting_count == 0:
             return
-        if waiting_count < self.ideal_batch_size and self.strobes < 2:
+        if self.boarding_policy is not None:
+            if not self.boarding_policy.should_board(
+                waiting_count, self._oldest_arrival()
+            ):
+                logger.info("Waiting a bit longer to fill flight")
+                return
+        elif waiting_count < self.ideal_batch_size and self.strobes < 2:
             logger.info("Waiting a bit longer to fill flight")
             return
         self.strobes = 0
@@ -247,14 +353,44 @@ class SDXLBatcherProcess(BatcherProcess):
             logger.debug(
                 f"Sending batch to fiber {meta_fiber.idx} (worker {meta_fiber.worker_idx})"
             )
-            await self.board(batch["reqs"][0], meta_fiber=meta_fiber)
+            await self.board(self.select_flight(batch["reqs"]), meta_fiber=meta_fiber)
             if self.service.prog_isolation != sf.ProgramIsolation.PER_FIBER:
                 self.service.idle_meta_fibers.append(meta_fiber)
 
-    async def board(self, request, meta_fiber):
+    @staticmethod
+    def select_flight(
+        requests: list[SDXLInferenceExecRequest],
+    ) -> list[SDXLInferenceExecRequest]:
+        """Selects the requests of a batch to launch together.
+
+        The oldest request always boards, with the requests it can be combined
+        with. A request that cannot be combined boards alone, so it is never
+        passed over by newer combinable requests.
+        """
+        oldest = requests[0]
+        if not oldest.can_combine:
+            return [oldest]
+        return [req for req in requests if req.can_combine]
+
+    async def board(self, requests, meta_fiber):
+        """Launches `requests` as one invocation of the smallest flight batch size
+        that holds them, padded as needed."""
         exec_process = InferenceExecutorProcess(self.service, meta_fiber)
-        exec_process.exec_request = request
-        self.pending_requests.remove(request)
+        for request in requests:
+            self.pending_requests.remove(request)
+            self._arrivals.pop(request, None)
+        if len(requests) == 1:
+            exec_process.exec_request = requests[0]
+        else:
+            batch_size = min(
+                bs for bs in self.flight_batch_sizes if bs >= len(requests)
+            )
+            logger.debug(
+                f"Combining {len(requests)} requests into a batch of {batch_size}"
+            )
+            exec_process.exec_request = SDXLInferenceExecRequest.combine(
+                requests, batch_size
+            )
         exec_process.launch()
 
 
@@ -276,6 +412,9 @@ class InferenceExecutorProcess(sf.Process):
         self.meta_fiber = meta_fiber
         self.worker_index = meta_fiber.worker_idx
         self.exec_request: SDXLInferenceExecRequest = None
+        # Set by `_prepare` if the prompt cache is enabled.
+        self.prompt_cache_keys: Optional[list] = None
+        self.cached_prompt_embeds: Optional[list] = None
 
     def assign_command_buffer(self, request: SDXLInferenceExecRequest):
         for cb in self.meta_fiber.command_buffers:
@@ -308,74 +447,113 @@ class InferenceExecutorProcess(sf.Process):
                 await self._decode(device=device)
             if phases[InferencePhase.POSTPROCESS]["required"]:
                 await self._postprocess(device=device)
-            self.exec_request.done.set_success()
+            self._set_done()
 
         except Exception:
             logger.exception("Fatal error in image generation")
             # TODO: Cancel and set error correctly
-            self.exec_request.done.set_success()
+            self._set_done()
 
         self.meta_fiber.command_buffers.append(self.exec_request.command_buffer)
         self.exec_request.command_buffer = None
         if self.service.prog_isolation == sf.ProgramIsolation.PER_FIBER:
             self.service.idle_meta_fibers.append(self.meta_fiber)
+            if self.service.batcher.boarding_policy is not None:
+                self.service.batcher.submit(StrobeMessage())
+
+    def _set_done(self):
+        for request in [self.exec_request, *self.exec_request.members]:
+            request.done.set_success()
 
     async def _prepare(self, device):
         # Tokenize prompts and negative prompts. We tokenize in bs1 for now and join later.
         # Tokenize the prompts if the request does not hold input_ids.
-        batch_ids_lists = []
         cb = self.exec_request.command_buffer
         if isinstance(self.exec_request.prompt, str):
             self.exec_request.prompt = [self.exec_request.prompt]
         if isinstance(self.exec_request.neg_prompt, str):
             self.exec_request.neg_prompt = [self.exec_request.neg_prompt]
-        for i in range(self.exec_request.batch_size):
-            input_ids_list = []
-            neg_ids_list = []
-            for tokenizer in self.service.tokenizers:
-                input_ids = tokenizer.encode(self.exec_request.prompt[i]).input_ids
-                input_ids_list.append(input_ids)
-                neg_ids = tokenizer.encode(self.exec_request.neg_prompt[i]).input_ids
-                neg_ids_list.append(neg_ids)
-            ids_list = [*input_ids_list, *neg_ids_list]
-            batch_ids_lists.append(ids_list)
-
-        # Prepare tokenized input ids for CLIP inference
-        host_arrs = [None] * len(cb.input_ids)
-        for idx, arr in enumerate(cb.input_ids):
-            host_arrs[idx] = arr.for_transfer()
-            for i in range(self.exec_request.batch_size):
-                with host_arrs[idx].view(i).map(write=True, discard=True) as m:
-
-                    # TODO: fix this attr redundancy
-                    np_arr = batch_ids_lists[i][idx]
 
-                    m.fill(np_arr)
-            cb.input_ids[idx].copy_from(host_arrs[idx])
+        # Encoding is skipped if the embeddings of all prompts are cached.
+        self.prompt_cache_keys = self._prompt_cache_keys(device)
+        self.cached_prompt_embeds = None
+        if self.prompt_cache_keys is not None:
+            self.cached_prompt_embeds = self.service.prompt_cache.get(
+                self.prompt_cache_keys
+            )
+        if self.cached_prompt_embeds is None:
+            batch_ids_lists = []
+            for i in range(self.exec_request.batch_size):
+                input_ids_list = []
+                neg_ids_list = []
+                for tokenizer in self.service.tokenizers:
+                    input_ids = tokenizer.encode(self.exec_request.prompt[i]).input_ids
+                    input_ids_list.append(input_ids)
+                    neg_ids = tokenizer.encode(
+                        self.exec_request.neg_prompt[i]
+                    ).input_ids
+                    neg_ids_list.append(neg_ids)
+                ids_list = [*input_ids_list, *neg_ids_list]
+                batch_ids_lists.append(ids_list)
+
+            # Prepare tokenized input ids for CLIP inference
+            host_arrs = [None] * len(cb.input_ids)
+            for idx, arr in enumerate(cb.input_ids):
+                host_arrs[idx] = arr.for_transfer()
+                for i in range(self.exec_request.batch_size):
+                    with host_arrs[idx].view(i).map(write=True, discard=True) as m:
+
+                        # TODO: fix this attr redundancy
+                        np_arr = batch_ids_lists[i][idx]
+
+                        m.fill(np_arr)
+                cb.input_ids[idx].copy_from(host_arrs[idx])
 
         # Generate random sample latents.
         seed = self.exec_request.seed
 
         # Create and populate sample device array.
-        generator = sfnp.RandomGenerator(seed)
-
         sample_host = cb.sample.for_transfer()
         with sample_host.map(discard=True) as m:
             m.fill(bytes(1))
 
-        sfnp.fill_randn(sample_host, generator=generator)
+        if isinstance(seed, list):
+            # Rows of combined requests get the latents of their own seeds.
+            for i, row_seed in enumerate(seed):
+                generator = sfnp.RandomGenerator(row_seed)
+                sfnp.fill_randn(sample_host.view(i), generator=generator)
+        else:
+            generator = sfnp.RandomGenerator(seed)
+            sfnp.fill_randn(sample_host, generator=generator)
 
         cb.sample.copy_from(sample_host)
         return
 
+    def _prompt_cache_keys(self, device) -> Optional[list]:
+        """Cache keys of the negative prompts, then the prompts, in the row
+        order of the encoder outputs."""
+        if self.service.prompt_cache is None or self.exec_request.input_ids is not None:
+            return None
+        return [
+            (device.raw_device.name, self.service.prompt_fingerprint, prompt)
+            for prompt in [*self.exec_request.neg_prompt, *self.exec_request.prompt]
+        ]
+
     async def _encode(self, device):
         req_bs = self.exec_request.batch_size
+        cb = self.exec_request.command_buffer
+        if self.cached_prompt_embeds is not None:
+            for row, (prompt_embeds, text_embeds) in enumerate(
+                self.cached_prompt_embeds
+            ):
+                cb.prompt_embeds.view(row).copy_from(prompt_embeds)
+                cb.text_embeds.view(row).copy_from(text_embeds)
+            return
         entrypoints = self.service.inference_functions[self.worker_index]["encode"]
         assert req_bs in list(entrypoints.keys())
         for bs, fns in entrypoints.items():
             if bs == req_bs:
                 break
-        cb = self.exec_request.command_buffer
         # Encode tokenized inputs.
         logger.debug(
             "INVOKE %r: %s",
@@ -385,8 +563,25 @@ class InferenceExecutorProcess(sf.Process):
         cb.prompt_embeds, cb.text_embeds = await fns["encode_prompts"](
             *cb.input_ids, fiber=self.fiber
         )
+        if self.prompt_cache_keys is not None:
+            await self._cache_prompt_embeds(device)
         return
 
+    async def _cache_prompt_embeds(self, device):
+        # Rows are copied out of the command buffer, which the next request
+        # on this fiber overwrites. Repeated prompts are stored once.
+        cb = self.exec_request.command_buffer
+        copies = {}
+        for row, key in enumerate(self.prompt_cache_keys):
+            if key not in copies:
+                copies[key] = tuple(
+                    copy_device_array(array.view(row), device)
+                    for array in (cb.prompt_embeds, cb.text_embeds)
+                )
+        await device
+        for key, embeddings in copies.items():
+            self.service.prompt_cache.put(key, embeddings)
+
     async def _denoise(self, device):
         req_bs = self.exec_request.batch_size
         entrypoints = self.service.inference_functions[self.worker_index]["denoise"]
@@ -410,52 +605,57 @@ class InferenceExecutorProcess(sf.Process):
             disable=(not self.service.show_progress),
             desc=f"DENOISE (bs{req_bs})",
         ):
-            start = time.time()
-            step = cb.steps_arr.view(i)
-            if self.service.model_params.use_scheduled_unet:
-                logger.debug(
-                    "INVOKE %r",
-                    fns["run_forward"],
-                )
-                (cb.latents,) = await fns["run_forward"](
-                    cb.latents,
-                    cb.prompt_embeds,
-                    cb.text_embeds,
-                    cb.time_ids,
-                    cb.guidance_scale,
-                    step,
-                    cb.timesteps,
-                    cb.sigmas,
-                    fiber=self.fiber,
-                )
-            else:
-                logger.debug(
-                    "INVOKE %r",
-                    fns["run_scale"],
-                )
-                (cb.latent_model_input, cb.t, cb.sigma, cb.next_sigma,) = await fns[
-                    "run_scale"
-                ](cb.latents, step, cb.timesteps, cb.sigmas, fiber=self.fiber)
-                logger.debug(
-                    "INVOKE %r",
-                    fns["main"],
-                )
-                (cb.noise_pred,) = await fns["main"](
-                    cb.latent_model_input,
-                    cb.t,
-                    cb.prompt_embeds,
-                    cb.text_embeds,
-                    cb.time_ids,
-                    cb.guidance_scale,
-                    fiber=self.fiber,
-                )
-                logger.debug(
-                    "INVOKE %r",
-                    fns["run_step"],
-                )
-                (cb.latents,) = await fns["run_step"](
-                    cb.noise_pred, cb.latents, cb.sigma, cb.next_sigma, fiber=self.fiber
-                )
+            # Steps of the requests sharing this fiber are interleaved.
+            async with self.meta_fiber.denoise_scheduler:
+                step = cb.steps_arr.view(i)
+                if self.service.model_params.use_scheduled_unet:
+                    logger.debug(
+                        "INVOKE %r",
+                        fns["run_forward"],
+                    )
+                    (cb.latents,) = await fns["run_forward"](
+                        cb.latents,
+                        cb.prompt_embeds,
+                        cb.text_embeds,
+                        cb.time_ids,
+                        cb.guidance_scale,
+                        step,
+                        cb.timesteps,
+                        cb.sigmas,
+                        fiber=self.fiber,
+                    )
+                else:
+                    logger.debug(
+                        "INVOKE %r",
+                        fns["run_scale"],
+                    )
+                    (cb.latent_model_input, cb.t, cb.sigma, cb.next_sigma,) = await fns[
+                        "run_scale"
+                    ](cb.latents, step, cb.timesteps, cb.sigmas, fiber=self.fiber)
+                    logger.debug(
+                        "INVOKE %r",
+                        fns["main"],
+                    )
+                    (cb.noise_pred,) = await fns["main"](
+                        cb.latent_model_input,
+                        cb.t,
+                        cb.prompt_embeds,
+                        cb.text_embeds,
+                        cb.time_ids,
+                        cb.guidance_scale,
+                        fiber=self.fiber,
+                    )
+                    logger.debug(
+                        "INVOKE %r",
+                        fns["run_step"],
+                    )
+                    (cb.latents,) = await fns["run_step"](
+                        cb.noise_pred,
+                        cb.latents,
+                        cb.sigma,
+                        cb.next_sigma,
+                        fiber=self.fiber,
+                    )
         return
 
     async def _decode(self, device):
@@ -466,10 +666,9 @@ class InferenceExecutorProcess(sf.Process):
         entrypoints = self.service.inference_functions[self.worker_index]["decode"]
         if req_bs not in list(entrypoints.keys()):
             prog_bs = 1
-        for bs, fns in entrypoints.items():
-            if bs == prog_bs:
-                break
+        if prog_bs not in entrypoints:
             raise RuntimeError(f"Decode program batch size {prog_bs} not found.")
+        fns = entrypoints[prog_bs]
         if req_bs != prog_bs:
             for i in range(req_bs):
                 # Decode the denoised latents.
@@ -488,52 +687,25 @@ class InferenceExecutorProcess(sf.Process):
                 "".join([f"\n  0: {cb.latents.shape}"]),
             )
             (cb.images,) = await fns["decode"](cb.latents, fiber=self.fiber)
-        cb.images_host.copy_from(cb.images)
-
-        # Wait for the device-to-host transfer, so that we can read the
-        # data with .items.
-        if self.service.splat_weights:
-            await device
-        else:
-            check_host_array(cb.images_host)
-
-        image_array = cb.images_host.items
-        dtype = image_array.typecode
-        if cb.images_host.dtype == sfnp.float16:
-            dtype = np.float16
-        self.exec_request.image_array = np.frombuffer(image_array, dtype=dtype).reshape(
-            self.exec_request.batch_size,
-            3,
-            self.exec_request.height,
-            self.exec_request.width,
-        )
+        # The images are read through a host array of their own, which
+        # outlives the command buffer returned to the fiber.
+        self.exec_request.image_array = await read_device_array(cb.images, device)
+        # Hand the rows of combined requests back, dropping the padding.
+        for i, member in enumerate(self.exec_request.members):
+            member.image_array = self.exec_request.image_array[i : i + 1]
         return
 
     async def _postprocess(self, device):
-        # Process output images
-        # TODO: reimpl with sfnp
-        permuted = np.transpose(self.exec_request.image_array, (0, 2, 3, 1))[0]
-        cast_image = (permuted * 255).round().astype("uint8")
-        processed_image = Image.fromarray(cast_image)
-        self.exec_request.response_image = processed_image
+        # Process output images. The pixels of the whole batch are converted
+        # at once; encoding is left to the service's encoding pool.
+        images = to_uint8_images(self.exec_request.image_array)
+        for request, image in zip(
+            self.exec_request.members or [self.exec_request], images
+        ):
+            request.response_image = Image.fromarray(image)
         return
 
 
-def check_host_array(host_array):
-    waiting = True
-    while waiting:
-        array = host_array.items
-        if host_array.dtype == sfnp.float16:
-            dtype = np.float16
-        arr = np.frombuffer(array, dtype=dtype)
-        if not np.all(arr == 0):
-            check_1 = arr
-            check_2 = np.frombuffer(array, dtype=dtype)
-            if np.array_equal(check_1, check_2):
-                break
-    return
-
-
 def initialize_command_buffer(fiber, model_params: ModelParams, bs: int = 1):
     device = fiber.device(0)
     h = model_params.dims[0][0]
@@ -594,9 +766,6 @@ def initialize_command_buffer(fiber, model_params: ModelParams, bs: int = 1):
         "images": sfnp.device_array.for_device(
             device, [bs, 3, h, w], model_params.vae_dtype
         ),
-        "images_host": sfnp.device_array.for_host(
-            device, [bs, 3, h, w], model_params.vae_dtype
-        ),
     }
 
     class ServiceCmdBuffer:
@@ -0,0 +1,54 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+Step-level scheduling of the denoise loops sharing a fiber.
+
+Each denoise step is a schedulable unit. A request takes the fiber's turn
+before a step and hands it on after, and turns go round-robin between the
+requests denoising on the fiber. A request of a few steps thus finishes
+after a few rounds instead of waiting for all steps of a long request.
+"""
+
+import asyncio
+
+from collections import deque
+
+
+class DenoiseStepScheduler:
+    """Hands out denoise step turns on one fiber.
+
+    Used as an async context manager around each step. All users run on the
+    loop of the fiber's worker, so no locking is needed.
+    """
+
+    def __init__(self):
+        self._busy = False
+        self._waiters: deque[asyncio.Future] = deque()
+        # Number of steps run and of those run while another request waited.
+        self.steps = 0
+        self.contended_steps = 0
+
+    async def __aenter__(self):
+        if not self._busy and not self._waiters:
+            self._busy = True
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        await future
+
+    async def __aexit__(self, *exc_info):
+        self.steps += 1
+        if self._waiters:
+            self.contended_steps += 1
+        while self._waiters:
+            # The turn passes on without becoming free, so that the request
+            # taking its next step queues behind the waiting ones.
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self._busy = False
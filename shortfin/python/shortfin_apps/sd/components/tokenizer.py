@@ -28,6 +28,11 @@ class Tokenizer:
         raw_tk = CLIPTokenizer.from_pretrained(name, subfolder=subfolder)
         return Tokenizer(raw_tk)
 
+    @property
+    def fingerprint(self) -> tuple:
+        """Identifies the tokenizer and its settings, e.g. in cache keys."""
+        return (self._raw.name_or_path, len(self._raw), self.max_length)
+
     def encode(self, texts: list[str]):
         """Encodes a batch of texts, applying no padding."""
         return self._raw(
@@ -28,6 +28,7 @@ from .components.io_struct import GenerateReqInput
 from .components.manager import SDXLSystemManager
 from .components.service import SDXLGenerateService
 from .components.tokenizer import Tokenizer
+from ..utilities.image import ImageFormat, validate_compression_level
 
 
 logger = logging.getLogger("shortfin-sd")
@@ -144,6 +145,12 @@ def configure_service(args, sysman, model_config, flagfile, tuning_spec):
         show_progress=args.show_progress,
         trace_execution=args.trace_execution,
         splat=args.splat,
+        boarding_deadline_s=args.batch_boarding_deadline_s,
+        image_format=ImageFormat(args.image_format),
+        image_compression_level=args.image_compression_level,
+        image_encoding_workers=args.image_encoding_workers,
+        prompt_cache_bytes=args.prompt_cache_mb * 2**20,
+        requests_per_fiber=args.requests_per_fiber,
     )
     for key, vmfb_dict in vmfbs.items():
         for bs in vmfb_dict.keys():
@@ -369,6 +376,12 @@ def main(argv, log_config=UVICORN_LOG_CONFIG):
         default=1,
         help="Concurrency control -- how many fibers are created per device to run inference.",
     )
+    parser.add_argument(
+        "--requests_per_fiber",
+        type=int,
+        default=1,
+        help="Number of requests run concurrently on each fiber, interleaving their denoise steps.",
+    )
     parser.add_argument(
         "--isolation",
         type=str,
@@ -386,6 +399,37 @@ def main(argv, log_config=UVICORN_LOG_CONFIG):
         action="store_true",
         help="Enable tracing of program modules.",
     )
+    parser.add_argument(
+        "--batch_boarding_deadline_s",
+        type=float,
+        default=None,
+        help="Board batches when full or at most this many seconds after the oldest pending request, instead of on strobe timers.",
+    )
+    parser.add_argument(
+        "--prompt_cache_mb",
+        type=int,
+        default=128,
+        help="Device memory in MiB for caching the embeddings of recent prompts, per service. 0 disables the cache.",
+    )
+    parser.add_argument(
+        "--image_format",
+        type=str,
+        choices=[image_format.value for image_format in ImageFormat],
+        default=ImageFormat.PNG.value,
+        help="Default encoding of the output images. `fast_png` uses the fastest zlib level; `raw` returns the uint8 HWC pixels.",
+    )
+    parser.add_argument(
+        "--image_compression_level",
+        type=int,
+        default=None,
+        help="PNG zlib level (0-9) or JPEG/WebP quality (0-100) of output images in the default format.",
+    )
+    parser.add_argument(
+        "--image_encoding_workers",
+        type=int,
+        default=4,
+        help="Number of threads encoding output images.",
+    )
     parser.add_argument(
         "--amdgpu_async_allocations",
         action="store_true",
@@ -446,6 +490,12 @@ def main(argv, log_config=UVICORN_LOG_CONFIG):
         help="Force update model artifacts starting from the specified build preference.",
     )
     args = parser.parse_args(argv)
+    try:
+        validate_compression_level(
+            ImageFormat(args.image_format), args.image_compression_level
+        )
+    except ValueError as e:
+        parser.error(str(e))
     if not is_port_valid(args.port):
         exit(3)
 
@@ -1,14 +1,19 @@
 import os
 
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
 from io import (
     BytesIO,
 )
+from typing import Optional, Sequence
 
+import numpy as np
 from PIL import Image
 
 from shortfin_apps.types.Base64CharacterEncodedByteSequence import (
     Base64CharacterEncodedByteSequence,
 )
+from shortfin_apps.utils import wrap_future
 
 
 def save_to_file(
@@ -33,3 +38,125 @@ def png_from(given_image: Image.Image) -> Base64CharacterEncodedByteSequence:
 def image_from(given_png: Base64CharacterEncodedByteSequence) -> Image.Image:
     memory_for_png = BytesIO(given_png.as_bytes)
     return Image.open(memory_for_png, formats=["PNG"])
+
+
+class ImageFormat(Enum):
+    PNG = "png"
+    # PNG with the fastest zlib level, trading size for encoding time.
+    FAST_PNG = "fast_png"
+    JPEG = "jpeg"
+    WEBP = "webp"
+    # The uint8 pixels in HWC order, without any container.
+    RAW = "raw"
+
+
+# Compression levels accepted by the formats that take one: the zlib level
+# of PNG images and the quality of JPEG and WebP images.
+COMPRESSION_LEVEL_RANGES = {
+    ImageFormat.PNG: (0, 9),
+    ImageFormat.JPEG: (0, 100),
+    ImageFormat.WEBP: (0, 100),
+}
+
+
+def validate_compression_level(
+    image_format: Optional[ImageFormat], compression_level: Optional[int]
+):
+    """Raises a ValueError unless `compression_level` suits `image_format`.
+
+    Without a format, the level must suit one of the formats that take one.
+    """
+    if compression_level is None:
+        return
+    if image_format is None:
+        low = min(low for low, _ in COMPRESSION_LEVEL_RANGES.values())
+        high = max(high for _, high in COMPRESSION_LEVEL_RANGES.values())
+    elif image_format in COMPRESSION_LEVEL_RANGES:
+        low, high = COMPRESSION_LEVEL_RANGES[image_format]
+    else:
+        raise ValueError(
+            f"Image format {image_format.value} does not take a compression level."
+        )
+    if not low <= compression_level <= high:
+        raise ValueError(
+            f"Compression level {compression_level} is out of range [{low}, {high}]."
+        )
+
+
+def to_uint8_images(
+    images: np.ndarray, value_range: tuple[float, float] = (0.0, 1.0)
+) -> np.ndarray:
+    """Converts a batch of NCHW float images to NHWC uint8 pixels.
+
+    Values are scaled from `value_range` to [0, 255], rounded and clipped,
+    for the whole batch at once.
+    """
+    low, high = value_range
+    pixels = np.asarray(images, dtype=np.float32) - low
+    pixels *= 255.0 / (high - low)
+    np.round(pixels, out=pixels)
+    np.clip(pixels, 0, 255, out=pixels)
+    return pixels.transpose(0, 2, 3, 1).astype(np.uint8, order="C")
+
+
+def encode_image(
+    given_image: Image.Image,
+    image_format: ImageFormat,
+    compression_level: Optional[int] = None,
+) -> Base64CharacterEncodedByteSequence:
+    """Encodes an image for a response.
+
+    `compression_level` is the zlib level (0-9) of PNG images and the
+    quality (0-100) of JPEG and WebP images. Encoder defaults apply if None.
+    """
+    if image_format == ImageFormat.RAW:
+        return Base64CharacterEncodedByteSequence.decoded_from(given_image.tobytes())
+
+    options = {}
+    if image_format == ImageFormat.FAST_PNG:
+        options["compress_level"] = 1
+    elif compression_level is not None:
+        if image_format == ImageFormat.PNG:
+            options["compress_level"] = compression_level
+        else:
+            options["quality"] = compression_level
+    pil_format = "PNG" if image_format == ImageFormat.FAST_PNG else image_format.name
+    memory_for_image = BytesIO()
+    given_image.save(memory_for_image, format=pil_format, **options)
+    return Base64CharacterEncodedByteSequence.decoded_from(memory_for_image.getvalue())
+
+
+class ImageEncodingPool:
+    """Encodes response images on a thread pool, off the calling event loop.
+
+    Pillow releases the GIL while compressing, so the images of a response
+    are encoded in parallel, while the shortfin workers go on with the next
+    batch.
+
+    The coroutines may be awaited from any event loop.
+    """
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="image-encoding"
+        )
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    async def encode(
+        self,
+        images: Sequence[Image.Image],
+        image_format: ImageFormat,
+        compression_level: Optional[int] = None,
+    ) -> list[Base64CharacterEncodedByteSequence]:
+        """Encodes a batch of images."""
+        futures = [
+            wrap_future(
+                self._executor.submit(
+                    encode_image, image, image_format, compression_level
+                )
+            )
+            for image in images
+        ]
+        return [await future for future in futures]
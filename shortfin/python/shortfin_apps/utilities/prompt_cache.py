@@ -0,0 +1,92 @@
+"""
+LRU cache of device-resident prompt embeddings.
+
+Text encoders are deterministic, so the embeddings of a prompt can be reused
+by later requests on the same device, skipping tokenization and encoding.
+Negative prompts in particular are mostly the same across requests.
+"""
+
+import threading
+
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Hashable, Optional, Sequence
+
+import shortfin.array as sfnp
+
+# Embeddings of one prompt, e.g. the hidden states and pooled output.
+PromptEmbeddings = tuple[sfnp.device_array, ...]
+
+
+@dataclass
+class PromptCacheStats:
+    """Lookups of a `PromptEmbeddingCache`.
+
+    Attributes:
+        hits: Lookups that found all their keys
+        misses: Lookups that had to encode
+        evictions: Entries dropped to stay within capacity
+        entries: Entries held
+        bytes: Bytes held
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def embeddings_nbytes(embeddings: PromptEmbeddings) -> int:
+    return sum(array.dtype.compute_dense_nd_size(array.shape) for array in embeddings)
+
+
+class PromptEmbeddingCache:
+    """Embeddings of recently encoded prompts, bounded in bytes.
+
+    Keys should identify the device, the tokenizers and text encoder, and the
+    prompt. Cached embeddings are shared between requests and must not be
+    modified.
+    """
+
+    def __init__(self, capacity_bytes: int):
+        self.capacity_bytes = capacity_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, PromptEmbeddings] = OrderedDict()
+        self._stats = PromptCacheStats()
+
+    def get(self, keys: Sequence[Hashable]) -> Optional[list[PromptEmbeddings]]:
+        """Returns the embeddings of all `keys`, or None unless all are cached."""
+        with self._lock:
+            if not all(key in self._entries for key in keys):
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            for key in keys:
+                self._entries.move_to_end(key)
+            return [self._entries[key] for key in keys]
+
+    def put(self, key: Hashable, embeddings: PromptEmbeddings):
+        """Caches `embeddings`, whose transfers must have completed."""
+        nbytes = embeddings_nbytes(embeddings)
+        if nbytes > self.capacity_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = embeddings
+            self._stats.bytes += nbytes
+            while self._stats.bytes > self.capacity_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._stats.bytes -= embeddings_nbytes(evicted)
+                self._stats.evictions += 1
+
+    def get_stats(self) -> PromptCacheStats:
+        with self._lock:
+            return replace(self._stats, entries=len(self._entries))
@@ -6,6 +6,11 @@ import logging
 import asyncio
 import struct
 import threading
+import time
+
+from concurrent.futures import Future
+
+import numpy as np
 
 from iree.build.executor import FileNamespace, BuildAction, BuildContext, BuildFile
 from pathlib import Path
@@ -99,6 +104,31 @@ class SystemManager:
         self.t = threading.Thread(target=lambda: self.ls.run(self.run()))
         self.command_queue = self.ls.create_queue("command")
         self.command_writer = self.command_queue.writer()
+        # Parameter archives loaded by the services of this system, see
+        # `load_parameters`.
+        self._parameters: dict[tuple, sf.StaticProgramParameters] = {}
+
+    def load_parameters(
+        self, path: Path, *, parameter_scope: str, format: str = ""
+    ) -> sf.StaticProgramParameters:
+        """Loads a parameter archive, sharing it with services that loaded the same file.
+
+        Each archive is loaded on its own, so a service loading a base archive
+        and an adapter shares the base with services loading only the base.
+        """
+        key = (parameter_scope, format, Path(path).resolve())
+        p = self._parameters.get(key)
+        if p is not None:
+            self.logger.info(
+                "Sharing loaded parameter fiber '%s' from: %s", parameter_scope, path
+            )
+            return p
+
+        logging.info("Loading parameter fiber '%s' from: %s", parameter_scope, path)
+        p = sf.StaticProgramParameters(self.ls, parameter_scope=parameter_scope)
+        p.load(path, format=format)
+        self._parameters[key] = p
+        return p
 
     def start(self):
         self.logger.info("Starting system manager")
@@ -213,6 +243,49 @@ def convert_list_to_device_array(
     return values_sf
 
 
+def host_array_view(host_array: sfnp.device_array) -> np.ndarray:
+    """Returns a NumPy view over the mapped memory of a host array, without copying.
+
+    The view keeps the mapping alive. It only reflects transfers into the
+    host array that completed before it is read.
+    """
+    dtype_name = host_array.dtype.name
+    if dtype_name.startswith("sint"):
+        dtype_name = dtype_name[1:]
+    return np.frombuffer(host_array.map(read=True), dtype=np.dtype(dtype_name)).reshape(
+        host_array.shape
+    )
+
+
+def copy_device_array(
+    device_array: sfnp.device_array, device: sf.ScopedDevice
+) -> sfnp.device_array:
+    """Copies a device array to a new array on `device`.
+
+    The copy is only enqueued; await the device before reading it elsewhere.
+    """
+    copy = sfnp.device_array.for_device(device, device_array.shape, device_array.dtype)
+    copy.copy_from(device_array)
+    return copy
+
+
+async def read_device_array(
+    device_array: sfnp.device_array, device: sf.ScopedDevice
+) -> np.ndarray:
+    """Copies a device array to a new host array and returns a NumPy view of it.
+
+    Completion of the transfer is awaited on the device rather than polled
+    from the host buffer. NumPy has no bfloat16, so such arrays are widened
+    to float32 on the host.
+    """
+    host_array = device_array.for_transfer()
+    host_array.copy_from(device_array)
+    await device
+    if host_array.dtype == sfnp.bfloat16:
+        host_array = sfnp.convert(host_array, dtype=sfnp.float32)
+    return host_array_view(host_array)
+
+
 dtype_to_filetag = {
     "bfloat16": "bf16",
     "float32": "f32",
@@ -224,6 +297,25 @@ dtype_to_filetag = {
 }
 
 
+def wrap_future(future: Future) -> asyncio.Future:
+    """Wraps a concurrent future for the running loop.
+
+    Unlike `asyncio.wrap_future`, this only relies on `call_soon_threadsafe`,
+    which shortfin worker loops support.
+    """
+    loop = asyncio.get_running_loop()
+    wrapped = loop.create_future()
+
+    def copy_state(future: Future):
+        if future.exception() is not None:
+            wrapped.set_exception(future.exception())
+        else:
+            wrapped.set_result(future.result())
+
+    future.add_done_callback(lambda f: loop.call_soon_threadsafe(copy_state, f))
+    return wrapped
+
+
 def get_url_map(filenames: list[str], bucket: str):
     file_map = {}
     for filename in filenames:
@@ -461,16 +553,16 @@ class GenerateService:
             format: Optional format string
             component: Optional component name for organizing parameters
         """
-        p = sf.StaticProgramParameters(self.sysman.ls, parameter_scope=parameter_scope)
-        for path in paths:
-            logging.info("Loading parameter fiber '%s' from: %s", parameter_scope, path)
-            p.load(path, format=format)
-
         if not hasattr(self, "inference_parameters"):
             self.inference_parameters = {}
         if not self.inference_parameters.get(component):
             self.inference_parameters[component] = []
-        self.inference_parameters[component].append(p)
+        self.inference_parameters[component].extend(
+            self.sysman.load_parameters(
+                path, parameter_scope=parameter_scope, format=format
+            )
+            for path in paths
+        )
 
     def initialize_program_modules(self, component: str):
         """Initialize program modules for a component.
@@ -586,25 +678,111 @@ class GenerateService:
         )
 
 
+class BoardingPolicy:
+    """Event-driven batch boarding.
+
+    Pending work is boarded as soon as a full batch is waiting, or once the
+    oldest pending item has waited `max_delay_s`. With `adaptive` set, the
+    delay follows the observed arrival rate: the batcher waits as long as the
+    batch is expected to take to fill, and boards at once when it is not
+    expected to fill within `max_delay_s`, e.g. on an idle server.
+    """
+
+    # Weight of the latest inter-arrival time in the moving average.
+    ARRIVAL_SMOOTHING = 0.2
+
+    def __init__(self, *, ideal_batch_size: int, max_delay_s: float, adaptive=True):
+        self.ideal_batch_size = ideal_batch_size
+        self.max_delay_s = max_delay_s
+        self.adaptive = adaptive
+        self._last_arrival: Optional[float] = None
+        self._mean_interarrival: Optional[float] = None
+
+    def record_arrival(self, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        if self._last_arrival is not None:
+            interarrival = now - self._last_arrival
+            if self._mean_interarrival is None:
+                self._mean_interarrival = interarrival
+            else:
+                self._mean_interarrival += self.ARRIVAL_SMOOTHING * (
+                    interarrival - self._mean_interarrival
+                )
+        self._last_arrival = now
+
+    def delay(self, pending_count: int) -> float:
+        """Time the oldest of `pending_count` pending items may wait."""
+        if pending_count >= self.ideal_batch_size:
+            return 0.0
+        if not self.adaptive or self._mean_interarrival is None:
+            return self.max_delay_s
+        expected = (self.ideal_batch_size - pending_count) * self._mean_interarrival
+        return expected if expected <= self.max_delay_s else 0.0
+
+    def deadline(self, pending_count: int, oldest_arrival: float) -> float:
+        return oldest_arrival + self.delay(pending_count)
+
+    def should_board(
+        self, pending_count: int, oldest_arrival: float, now: Optional[float] = None
+    ) -> bool:
+        now = time.monotonic() if now is None else now
+        return now >= self.deadline(pending_count, oldest_arrival)
+
+
 class BatcherProcess(sf.Process):
     """The batcher is a persistent process responsible for flighting incoming work
-    into batches."""
+    into batches.
+
+    By default, the batcher is woken up by strobe messages sent at a fixed
+    interval. With a `boarding_policy`, strobes are only sent once the
+    deadline returned by `next_boarding_deadline` has passed.
+    """
 
     STROBE_SHORT_DELAY = 0.5
     STROBE_LONG_DELAY = 1.0
 
-    def __init__(self, fiber, name="batcher"):
+    def __init__(
+        self,
+        fiber,
+        name="batcher",
+        boarding_policy: Optional[BoardingPolicy] = None,
+    ):
         super().__init__(fiber=fiber)
         self.batcher_infeed = self.system.create_queue()
         self.strobe_enabled = True
         self.strobes = 0
         self.pending_requests = set()
+        self.boarding_policy = boarding_policy
+        self._wakeup_at: Optional[float] = None
         self.logger = logging.getLogger("batcher")
 
     def shutdown(self):
         """Shutdown the batcher process."""
         self.batcher_infeed.close()
 
+    def next_boarding_deadline(self) -> Optional[float]:
+        """Monotonic time at which pending work must be boarded, if any.
+
+        Only used with a boarding policy. To be implemented by subclasses.
+        """
+        return None
+
+    async def _wakeup(self, wakeup_at: float):
+        await asyncio.sleep(max(0.0, wakeup_at - time.monotonic()))
+        if self._wakeup_at == wakeup_at:
+            self._wakeup_at = None
+            if not self.batcher_infeed.closed:
+                self.submit(StrobeMessage())
+
+    def _schedule_wakeup(self):
+        deadline = self.next_boarding_deadline()
+        if deadline is None:
+            return
+        if self._wakeup_at is not None and self._wakeup_at <= deadline:
+            return
+        self._wakeup_at = deadline
+        asyncio.create_task(self._wakeup(deadline))
+
     def submit(self, request):
         """Submit a request to the batcher."""
         self.batcher_infeed.write_nodelay(request)
@@ -626,7 +804,9 @@ class BatcherProcess(sf.Process):
 
     async def run(self):
         """Main run loop for the batcher process."""
-        strober_task = asyncio.create_task(self._background_strober())
+        strober_task = None
+        if self.boarding_policy is None:
+            strober_task = asyncio.create_task(self._background_strober())
         reader = self.batcher_infeed.reader()
         while item := await reader():
             self.strobe_enabled = False
@@ -637,9 +817,12 @@ class BatcherProcess(sf.Process):
             else:
                 self.custom_message(item)
             await self.process_batches()
+            if self.boarding_policy is not None:
+                self._schedule_wakeup()
 
             self.strobe_enabled = True
-        await strober_task
+        if strober_task is not None:
+            await strober_task
 
     def handle_inference_request(self, request):
         """Handle an inference request. To be implemented by subclasses."""
@@ -1,5 +1,6 @@
 import asyncio
 import math
+import time
 import pytest
 
 import shortfin.array as sfnp
@@ -10,6 +11,9 @@ from uuid import uuid4
 
 from shortfin import ProgramIsolation
 
+from shortfin_apps.llm.components.batching.modes.continuous import (
+    ContinuousBatcherProcess,
+)
 from shortfin_apps.llm.components.batching.modes.default import (
     LlmBatcherProcess,
     PrefillBatcherProcess,
@@ -31,7 +35,8 @@ from shortfin_apps.llm.components.messages import (
     LlmInferenceExecRequest,
     InferencePhase,
 )
-from shortfin_apps.llm.components.scheduler import Scheduler
+from shortfin_apps.llm.components.scheduler import Scheduler, UpdateWorkload
+from shortfin_apps.utils import BatcherProcess, StrobeMessage
 
 
 @pytest.fixture
@@ -197,7 +202,106 @@ class TestLlmBatcherProcess:
         assert set(call_args[2]) == set(task_inputs)
 
 
+class TestContinuousBatcherProcess:
+    @pytest.mark.asyncio
+    async def test_wakes_only_for_held_up_iteration(
+        self, model_params, fiber, cache, exec_req_list
+    ):
+        batcher = ContinuousBatcherProcess(
+            fiber=fiber,
+            page_cache=cache,
+            model_params=model_params,
+            prefill_functions={4: AsyncMock()},
+            decode_functions={4: AsyncMock()},
+            program_isolation=ProgramIsolation.PER_CALL.value,
+            chunk_block_size=None,
+            token_budget=16,
+        )
+        # Idle, the periodic strobe runs at the default long delay.
+        assert batcher.STROBE_LONG_DELAY == BatcherProcess.STROBE_LONG_DELAY
+        assert batcher.next_boarding_deadline() is None
+
+        # A decode step waiting for another running sequence gets a short
+        # wakeup instead.
+        first, second = exec_req_list[:2]
+        for req in (first, second):
+            batcher.scheduler.handle_scheduler(
+                UpdateWorkload(count=1, rid=req.orig_instance_id)
+            )
+        batcher.scheduler.schedule_job(_get_task_input(first))
+        await batcher.process_batches()
+        assert batcher.scheduler.waiting_for_decode
+        assert batcher._wakeup_at is not None
+        assert batcher._wakeup_at - time.monotonic() <= batcher.STROBE_SHORT_DELAY
+        batcher.shutdown()
+
+
 class TestPrefillBatcherProcess:
+    def test_arguments_preallocated_per_entrypoint(self, model_params, fiber, cache):
+        batcher = PrefillBatcherProcess(
+            fiber=fiber,
+            page_cache=cache,
+            model_params=model_params,
+            prefill_functions={1: AsyncMock(), 4: AsyncMock()},
+            program_isolation=ProgramIsolation.PER_CALL.value,
+            chunk_block_size=None,
+        )
+        arena = batcher.array_cache
+        allocated_bytes = batcher.get_argument_arena_stats().allocated_bytes
+
+        # The padded arguments of each entrypoint fit preallocated buffers of
+        # their own size.
+        for batch_size in (1, 4):
+            for _ in range(batcher.PREALLOCATED_ARGUMENT_SETS):
+                for shape in batcher.argument_shapes(batch_size):
+                    allocation = arena.allocate(shape, sfnp.int64)
+                    assert allocation.key[0] == arena._bucket_bytes(
+                        sfnp.int64.compute_dense_nd_size(shape)
+                    )
+
+        stats = batcher.get_argument_arena_stats()
+        assert stats.stalls == 0
+        assert stats.allocated_bytes == allocated_bytes
+        arena.free()
+
+    def test_next_chunk_wakes_batcher_with_boarding_deadline(
+        self, model_params, fiber, cache, exec_req_list
+    ):
+        batcher = PrefillBatcherProcess(
+            fiber=fiber,
+            page_cache=cache,
+            model_params=model_params,
+            prefill_functions={4: AsyncMock()},
+            program_isolation=ProgramIsolation.PER_CALL.value,
+            chunk_block_size=2,
+            boarding_deadline_s=0.0,
+        )
+        batcher.submit = MagicMock()
+        req = exec_req_list[0]
+        batcher.handle_inference_request(req)
+        (first_chunk,) = batcher.scheduler.should_execute(batcher.strobes)[0]
+
+        logits = MagicMock()
+        logits.shape = [1, 4, 16]
+        llm_task = MagicMock(_task_inputs=[first_chunk], task_inputs=[first_chunk])
+        responder = batcher._llm_task_responder
+
+        # The first chunk readies the second one, which needs a strobe.
+        responder.set_success(llm_task, logits, None)
+        assert batcher.submit.call_count == 1
+        assert isinstance(batcher.submit.call_args.args[0], StrobeMessage)
+        (second_chunk,) = batcher.scheduler.should_execute(batcher.strobes)[0]
+        assert second_chunk.start_position > first_chunk.start_position
+
+        # The last chunk completes the request without waking the batcher.
+        with patch.object(req.done, "set_success") as set_success:
+            llm_task = MagicMock(
+                _task_inputs=[second_chunk], task_inputs=[second_chunk]
+            )
+            responder.set_success(llm_task, logits, None)
+            set_success.assert_called_once()
+        assert batcher.submit.call_count == 1
+
     def test_handle_inference_request(
         self, prefill_batcher_process_chunked: PrefillBatcherProcess, exec_req_list
     ):
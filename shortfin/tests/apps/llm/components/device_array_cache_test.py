@@ -4,7 +4,10 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
-from shortfin_apps.llm.components.device_array_cache import DeviceArrayCache
+from shortfin_apps.llm.components.device_array_cache import (
+    ArgumentArena,
+    DeviceArrayCache,
+)
 
 import shortfin.array as sfnp
 
@@ -115,3 +118,46 @@ def test_release_allocate_limit(generic_device):
 
     assert allocation1.device == allocation2.device
     assert allocation1.host == allocation2.host
+
+
+def test_arena_reuses_buffers_across_shapes(generic_device):
+    arena = ArgumentArena(generic_device)
+    allocation0 = arena.allocate((4, 30), sfnp.int64)
+    assert allocation0.shape == [4, 30]
+    assert allocation0.dtype == sfnp.int64
+    arena.release(allocation0)
+
+    # A different batch sequence length in the same bucket reuses the buffers.
+    allocation1 = arena.allocate((4, 32), sfnp.int64)
+    assert allocation1.shape == [4, 32]
+    assert allocation1.key[1] is allocation0.key[1]
+
+    stats = arena.get_stats()
+    assert stats.allocations == 2
+    assert stats.reuses == 1
+    assert stats.stalls == 1
+    assert stats.reuse_rate == 0.5
+
+
+def test_arena_preallocate(generic_device):
+    arena = ArgumentArena(generic_device)
+    arena.preallocate([(4, 64)], sfnp.int64, count=2)
+    allocated_bytes = arena.get_stats().allocated_bytes
+    assert allocated_bytes == 2 * 4 * 64 * 8
+
+    # Smaller arguments are served from larger free buckets.
+    allocations = [
+        arena.allocate((4, 64), sfnp.int64),
+        arena.allocate((4, 20), sfnp.int64),
+    ]
+    stats = arena.get_stats()
+    assert stats.stalls == 0
+    assert stats.allocated_bytes == allocated_bytes
+
+    # Once the preallocated buffers are in use, new ones are allocated.
+    allocations.append(arena.allocate((4,), sfnp.int64))
+    assert arena.get_stats().stalls == 1
+
+    for allocation in allocations:
+        allocation.release()
+    arena.free()
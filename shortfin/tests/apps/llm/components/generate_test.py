@@ -0,0 +1,100 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import asyncio
+
+from shortfin.support.responder import AbstractResponder
+
+from shortfin_apps.llm.components.generate import TokenStreamer
+
+
+class FakeResponder(AbstractResponder):
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+
+    def stream_part(self, content: bytes | None):
+        self.parts.append(content)
+
+
+class FakeTokenizer:
+    """Tokenizer whose token 3 is the first half of a two-token character."""
+
+    _pieces = {1: "Hello", 2: " world", 3: "\ufffd", 4: "!"}
+
+    def decode(self, sequences):
+        texts = []
+        for ids in sequences:
+            text = "".join(self._pieces[token] for token in ids)
+            texts.append(text.replace("\ufffd!", "\u00e9"))
+        return texts
+
+
+def _stream(streamer: TokenStreamer, steps):
+    async def main():
+        task = asyncio.create_task(streamer.run())
+        for tokens in steps:
+            await streamer.put(tokens)
+        await streamer.close()
+        await task
+
+    asyncio.run(main())
+
+
+def test_token_streamer_detokenizes_incrementally():
+    responder = FakeResponder()
+    _stream(TokenStreamer(responder, FakeTokenizer()), [[1], [2], [3], [4]])
+
+    # The incomplete character is held back until the next token completes it.
+    assert responder.parts == [
+        b"data: Hello\n\n",
+        b"data:  world\n\n",
+        b"data: \xc3\xa9\n\n",
+    ]
+
+
+def test_token_streamer_token_ids():
+    responder = FakeResponder()
+    _stream(TokenStreamer(responder, None), [[1], [2, 3]])
+    assert responder.parts == [b"data: [1]\n\n", b"data: [2, 3]\n\n"]
+
+
+class SlowClientResponder(FakeResponder):
+    """Responder whose client reads a part only when `read` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.read = asyncio.Event()
+
+    async def wait_for_stream_capacity(self):
+        await self.read.wait()
+        self.read.clear()
+
+
+def test_token_streamer_backpressure():
+    responder = SlowClientResponder()
+    streamer = TokenStreamer(responder, None, max_pending_steps=1)
+
+    async def main():
+        task = asyncio.create_task(streamer.run())
+        await streamer.put([1])
+        # The first part waits for the client, the second one fills the queue.
+        await streamer.put([2])
+        blocked_put = asyncio.create_task(streamer.put([3]))
+        await asyncio.sleep(0)
+        assert not blocked_put.done()
+        assert responder.parts == [b"data: [1]\n\n"]
+
+        responder.read.set()
+        await blocked_put
+        for _ in range(2):
+            await asyncio.sleep(0)
+            responder.read.set()
+        await streamer.close()
+        await task
+
+    asyncio.run(main())
+    assert responder.parts == [b"data: [1]\n\n", b"data: [2]\n\n", b"data: [3]\n\n"]
@@ -0,0 +1,118 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import pytest
+from typing import List
+
+from shortfin_apps.llm.components.kvcache import hashed_attention_cache
+from shortfin_apps.llm.components.kvcache.hashed_attention_cache import (
+    HashedPagedAttentionCache,
+    compute_block_hashes,
+)
+
+TEST_PAGE_SIZE = 16
+
+
+@pytest.fixture
+def hashed_cache(page_pool):
+    return HashedPagedAttentionCache(
+        page_pool=page_pool, tokens_per_page=TEST_PAGE_SIZE
+    )
+
+
+def _publish_sequence(cache: HashedPagedAttentionCache, tokens: List[int]):
+    cached_allocation = cache.lookup(tokens)
+    alloc = cache.allocate(tokens[cached_allocation.num_tokens :], cached_allocation)
+    alloc = cache.publish_pages_for_tokens(alloc)
+    cache.release_pages(alloc)
+    return alloc
+
+
+def test_prefix_match(hashed_cache):
+    tokens = list(range(3 * TEST_PAGE_SIZE))
+    published = _publish_sequence(hashed_cache, tokens)
+
+    cached_allocation = hashed_cache.lookup(tokens)
+    assert cached_allocation.num_tokens == len(tokens)
+    assert [p.index for p in cached_allocation.pages] == [
+        p.index for p in published.pages
+    ]
+
+    diverged = tokens[:TEST_PAGE_SIZE] + [1000 + i for i in range(TEST_PAGE_SIZE)]
+    cached_allocation = hashed_cache.lookup(diverged)
+    assert cached_allocation.num_tokens == TEST_PAGE_SIZE
+    assert cached_allocation.pages[0].index == published.pages[0].index
+
+    hashed_cache.shutdown()
+
+
+def test_find_block(hashed_cache):
+    tokens = list(range(2 * TEST_PAGE_SIZE))
+    published = _publish_sequence(hashed_cache, tokens)
+
+    hashes = compute_block_hashes(tokens, TEST_PAGE_SIZE)
+    assert len(hashes) == 2
+    for block_hash, page in zip(hashes, published.pages):
+        assert hashed_cache.find_block(block_hash).index == page.index
+
+    # The same block under a different prefix hashes differently.
+    other = compute_block_hashes(list(range(TEST_PAGE_SIZE, 2 * TEST_PAGE_SIZE)), 16)
+    assert hashed_cache.find_block(other[0]) is None
+
+    hashed_cache.shutdown()
+
+
+def test_eviction_removes_blocks(hashed_cache):
+    tokens = list(range(TEST_PAGE_SIZE))
+    _publish_sequence(hashed_cache, tokens)
+    (block_hash,) = compute_block_hashes(tokens, TEST_PAGE_SIZE)
+    assert hashed_cache.find_block(block_hash) is not None
+
+    assert hashed_cache.evict_pages(1) == 1
+    assert hashed_cache.find_block(block_hash) is None
+    assert hashed_cache.lookup(tokens).num_tokens == 0
+
+    hashed_cache.shutdown()
+
+
+def test_hash_collision_on_last_page(hashed_cache, monkeypatch):
+    # Every block of the same length collides.
+    monkeypatch.setattr(
+        hashed_attention_cache,
+        "block_hash",
+        lambda parent_hash, tokens: hash((parent_hash, len(tokens))),
+    )
+    tokens = list(range(2 * TEST_PAGE_SIZE))
+    published = _publish_sequence(hashed_cache, tokens)
+
+    diverged = tokens[:TEST_PAGE_SIZE] + [1000 + i for i in range(TEST_PAGE_SIZE)]
+    cached_allocation = hashed_cache.lookup(diverged)
+    assert cached_allocation.num_tokens == TEST_PAGE_SIZE
+    assert [p.index for p in cached_allocation.pages] == [published.pages[0].index]
+
+    hashed_cache.shutdown()
+
+
+def test_hash_collision_on_middle_page(hashed_cache, monkeypatch):
+    # Every block of the same length collides, so the whole chain of hashes
+    # matches even though the middle block differs.
+    monkeypatch.setattr(
+        hashed_attention_cache,
+        "block_hash",
+        lambda parent_hash, tokens: hash((parent_hash, len(tokens))),
+    )
+    tokens = list(range(3 * TEST_PAGE_SIZE))
+    published = _publish_sequence(hashed_cache, tokens)
+
+    diverged = list(tokens)
+    diverged[TEST_PAGE_SIZE : 2 * TEST_PAGE_SIZE] = [
+        1000 + i for i in range(TEST_PAGE_SIZE)
+    ]
+    cached_allocation = hashed_cache.lookup(diverged)
+    assert cached_allocation.num_tokens == TEST_PAGE_SIZE
+    assert [p.index for p in cached_allocation.pages] == [published.pages[0].index]
+
+    hashed_cache.shutdown()
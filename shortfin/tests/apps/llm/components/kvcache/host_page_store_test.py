@@ -0,0 +1,226 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import pytest
+from typing import List
+from unittest.mock import MagicMock
+
+import shortfin.array as sfnp
+
+from shortfin_apps.llm.components.decoder.decoder import PageManager
+from shortfin_apps.llm.components.kvcache.base_attention_cache import (
+    CacheAllocationFailure,
+)
+from shortfin_apps.llm.components.kvcache.host_page_store import HostPageStore
+from shortfin_apps.llm.components.kvcache.page_pool import PagePool, PagePoolConfig
+from shortfin_apps.llm.components.kvcache.trie_attention_cache import (
+    TriePagedAttentionCache,
+)
+
+TEST_PAGE_SIZE = 16
+TEST_POOL_CAPACITY = 4
+TEST_BLOCK_SIZE = 8
+
+
+@pytest.fixture
+def real_page_pool(device):
+    return PagePool(
+        devices=[device],
+        config=PagePoolConfig(
+            dtype=sfnp.float32,
+            alloc_page_count=TEST_POOL_CAPACITY,
+            paged_kv_block_size_elements_per_device=[TEST_BLOCK_SIZE],
+        ),
+    )
+
+
+def _publish_sequence(cache: TriePagedAttentionCache, tokens: List[int]):
+    cached_allocation = cache.lookup(tokens)
+    alloc = cache.allocate(tokens[cached_allocation.num_tokens :], cached_allocation)
+    alloc = cache.publish_pages_for_tokens(alloc)
+    cache.release_pages(alloc)
+    return alloc
+
+
+async def _publish_spilling_sequence(cache: TriePagedAttentionCache, tokens: List[int]):
+    """Publish `tokens`, releasing spilled pages if the pool runs out."""
+    try:
+        return _publish_sequence(cache, tokens)
+    except CacheAllocationFailure:
+        assert await cache.complete_spills() > 0
+        return _publish_sequence(cache, tokens)
+
+
+def _sequence(i: int) -> List[int]:
+    return [1000 * (i + 1) + t for t in range(TEST_PAGE_SIZE)]
+
+
+def test_evicted_page_is_offloaded_and_promoted(lsys, device, real_page_pool):
+    host_store = HostPageStore(real_page_pool, TEST_POOL_CAPACITY)
+    cache = TriePagedAttentionCache(
+        page_pool=real_page_pool,
+        tokens_per_page=TEST_PAGE_SIZE,
+        host_store=host_store,
+    )
+    page_table = real_page_pool.page_tables[0]
+    staging = sfnp.device_array.for_host(device, [TEST_BLOCK_SIZE], sfnp.float32)
+
+    async def write_page(index: int, value: float):
+        with staging.map(discard=True) as m:
+            m.items = [value] * TEST_BLOCK_SIZE
+        page_table.view(index).copy_from(staging)
+        await device
+
+    async def read_page(index: int) -> List[float]:
+        staging.copy_from(page_table.view(index))
+        await device
+        return staging.items.tolist()
+
+    async def main():
+        first = _publish_sequence(cache, _sequence(0))
+        await write_page(first.pages[0].index, 7.0)
+
+        for i in range(1, TEST_POOL_CAPACITY):
+            _publish_sequence(cache, _sequence(i))
+        assert real_page_pool.available_page_count() == 0
+
+        # Allocating one more page spills the least recently used one. The
+        # device page is only released once the copy completed.
+        with pytest.raises(CacheAllocationFailure):
+            _publish_sequence(cache, _sequence(TEST_POOL_CAPACITY))
+        assert host_store.spilled_page_count() == 1
+        assert real_page_pool.available_page_count() == 0
+        assert await cache.complete_spills() == 1
+        assert host_store.spilled_page_count() == 0
+        newest = _publish_sequence(cache, _sequence(TEST_POOL_CAPACITY))
+        await write_page(newest.pages[0].index, 3.0)
+        stats = cache.get_stats()
+        assert stats.evicted_pages == 1
+        assert stats.offloaded_pages == 1
+
+        # The offloaded prefix still matches and is copied back to the device.
+        # The page dropped to make room for it is not spilled.
+        cached_allocation = cache.lookup(_sequence(0))
+        assert cached_allocation.num_tokens == TEST_PAGE_SIZE
+        stats = cache.get_stats()
+        assert stats.promoted_pages == 1
+        assert stats.evicted_pages == 2
+        assert stats.offloaded_pages == 1
+        assert host_store.spilled_page_count() == 0
+        assert (
+            await read_page(cached_allocation.pages[0].index) == [7.0] * TEST_BLOCK_SIZE
+        )
+        cache.release_pages(cached_allocation)
+
+    lsys.run(main())
+    cache.shutdown()
+    assert real_page_pool.available_page_count() == TEST_POOL_CAPACITY
+
+
+def test_beam_step_retried_after_spill(lsys, real_page_pool):
+    host_store = HostPageStore(real_page_pool, TEST_POOL_CAPACITY)
+    cache = TriePagedAttentionCache(
+        page_pool=real_page_pool,
+        tokens_per_page=TEST_PAGE_SIZE,
+        host_store=host_store,
+    )
+    for i in range(2):
+        _publish_sequence(cache, _sequence(i))
+
+    # The prompt fills its page, so each of the two beams needs a new page
+    # while only one is free.
+    prompt = _sequence(2)
+    cache_info = cache.allocate(prompt, cache.lookup(prompt))
+    prompt_pages = [page.index for page in cache_info.pages]
+    decode_reqs = [MagicMock(instance_id=f"beam{i}") for i in range(2)]
+    allocated_cache_recs = {req.instance_id: cache_info for req in decode_reqs}
+    page_manager = PageManager(
+        cache,
+        real_page_pool,
+        initial_pages=list(prompt_pages),
+        initial_length=len(prompt),
+        tokens_per_page=TEST_PAGE_SIZE,
+    )
+    assert real_page_pool.available_page_count() == 1
+
+    def update():
+        return page_manager.update_decode_reqs(
+            [0, 0], decode_reqs, allocated_cache_recs, [5, 6], len(prompt)
+        )
+
+    async def main():
+        # Making room spills a cached page, which is only freed once its copy
+        # completed. The failed step must not change any state.
+        with pytest.raises(CacheAllocationFailure):
+            update()
+        assert host_store.spilled_page_count() == 1
+        assert page_manager.position == len(prompt)
+        assert cache_info.num_tokens == len(prompt)
+        assert [page.index for page in cache_info.pages] == prompt_pages
+        assert await cache.complete_spills() == 1
+
+        to_run = update()
+        assert page_manager.position == len(prompt) + 1
+        beam_pages = [req.page_ids for req in to_run]
+        assert [pages[:1] for pages in beam_pages] == [prompt_pages] * 2
+        assert beam_pages[0][1] != beam_pages[1][1]
+        # Each beam added its token and page once.
+        cache_info_after = allocated_cache_recs[decode_reqs[0].instance_id]
+        assert cache_info_after.num_tokens == len(prompt) + 2
+        assert [page.index for page in cache_info_after.pages] == prompt_pages + [
+            beam_pages[0][1],
+            beam_pages[1][1],
+        ]
+        assert real_page_pool.available_page_count() == 0
+
+    lsys.run(main())
+    assert cache.get_stats().offloaded_pages == 1
+    cache.release_pages(allocated_cache_recs[decode_reqs[0].instance_id])
+    cache.shutdown()
+
+
+def test_full_host_store_drops_oldest(lsys, real_page_pool):
+    host_store = HostPageStore(real_page_pool, 1)
+    cache = TriePagedAttentionCache(
+        page_pool=real_page_pool,
+        tokens_per_page=TEST_PAGE_SIZE,
+        host_store=host_store,
+    )
+
+    async def main():
+        for i in range(TEST_POOL_CAPACITY + 2):
+            await _publish_spilling_sequence(cache, _sequence(i))
+
+    lsys.run(main())
+
+    # Two pages were evicted; only the most recent one is kept on the host.
+    stats = cache.get_stats()
+    assert stats.evicted_pages == 2
+    assert stats.offloaded_pages == 2
+    assert host_store.available_slot_count() == 0
+    assert cache.lookup(_sequence(0)).num_tokens == 0
+    assert cache.lookup(_sequence(1)).num_tokens == TEST_PAGE_SIZE
+
+    cache.shutdown()
+    assert host_store.available_slot_count() == 1
+
+
+def test_shutdown_releases_spilled_pages(real_page_pool):
+    host_store = HostPageStore(real_page_pool, TEST_POOL_CAPACITY)
+    cache = TriePagedAttentionCache(
+        page_pool=real_page_pool,
+        tokens_per_page=TEST_PAGE_SIZE,
+        host_store=host_store,
+    )
+    for i in range(TEST_POOL_CAPACITY):
+        _publish_sequence(cache, _sequence(i))
+    with pytest.raises(CacheAllocationFailure):
+        _publish_sequence(cache, _sequence(TEST_POOL_CAPACITY))
+    assert host_store.spilled_page_count() == 1
+
+    cache.shutdown()
+    assert host_store.spilled_page_count() == 0
+    assert real_page_pool.available_page_count() == TEST_POOL_CAPACITY
@@ -46,6 +46,43 @@ def test_page_copy(setup_pool):
     logger.info(f"Successfully copied page on system")
 
 
+def test_page_bulk_acquire_and_free(setup_pool):
+    pool = setup_pool
+    total = pool.total_page_count()
+    indices = pool.acquire_free_page_indices(16)
+    assert indices is not None and len(indices) == 16
+    assert len(set(indices)) == 16
+    assert pool.available_page_count() == total - 16
+    assert not any(pool.is_page_free(i) for i in indices)
+
+    assert pool.free_page_indices(indices) == 16
+    assert pool.available_page_count() == total
+    assert all(pool.is_page_free(i) for i in indices)
+
+
+def test_page_acquire_exhausted(setup_pool):
+    pool = setup_pool
+    total = pool.total_page_count()
+    pages = pool.acquire_free_pages(total)
+    assert len(pages) == total
+    assert pool.available_page_count() == 0
+    assert pool.acquire_free_pages(1) is None
+    pool.free_pages(pages)
+    assert pool.available_page_count() == total
+
+
+def test_page_double_free(setup_pool):
+    pool = setup_pool
+    total = pool.total_page_count()
+    pages = pool.acquire_free_pages(2)
+    pool.free_pages(pages)
+    # Freeing the same pages again must not grow the free list.
+    pool.free_pages(pages)
+    assert pool.free_page_indices([p.index for p in pages]) == 0
+    assert pool.available_page_count() == total
+    assert len(pool.acquire_free_pages(total)) == total
+
+
 @pytest.fixture(autouse=True)
 def setup_logging():
     """Set up logging format to include timestamp and level"""
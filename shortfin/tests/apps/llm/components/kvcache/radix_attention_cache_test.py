@@ -0,0 +1,113 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import math
+import pytest
+from typing import List
+
+from shortfin_apps.llm.components.kvcache.base_attention_cache import (
+    CacheAllocationFailure,
+)
+from shortfin_apps.llm.components.kvcache.radix_attention_cache import (
+    RadixPagedAttentionCache,
+)
+
+TEST_PAGE_SIZE = 16
+
+
+@pytest.fixture
+def radix_cache(page_pool):
+    return RadixPagedAttentionCache(page_pool=page_pool, tokens_per_page=TEST_PAGE_SIZE)
+
+
+def _publish_sequence(cache: RadixPagedAttentionCache, tokens: List[int]):
+    cached_allocation = cache.lookup(tokens)
+    alloc = cache.allocate(tokens[cached_allocation.num_tokens :], cached_allocation)
+    alloc = cache.publish_pages_for_tokens(alloc)
+    cache.release_pages(alloc)
+    return alloc
+
+
+def test_sub_page_match(radix_cache):
+    base = list(range(2 * TEST_PAGE_SIZE))
+    published = _publish_sequence(radix_cache, base)
+
+    diverge_at = TEST_PAGE_SIZE + 5
+    tokens = base[:diverge_at] + [1000 + i for i in range(27)]
+    cached_allocation = radix_cache.lookup(tokens)
+
+    assert cached_allocation.num_tokens == diverge_at
+    assert cached_allocation.tokens == base[:diverge_at]
+    assert cached_allocation.number_of_published_pages == 1
+    assert cached_allocation.partial_page_tokens == 5
+    assert len(cached_allocation.pages) == 2
+    assert cached_allocation.pages[0].index == published.pages[0].index
+    # The partially matching page is copied, never shared.
+    assert cached_allocation.pages[1].index != published.pages[1].index
+
+    alloc = radix_cache.allocate(
+        tokens[cached_allocation.num_tokens :], cached_allocation
+    )
+    assert len(alloc.pages) == math.ceil(len(tokens) / TEST_PAGE_SIZE)
+    assert alloc.num_tokens == len(tokens)
+
+    alloc = radix_cache.publish_pages_for_tokens(alloc)
+    assert alloc.number_of_published_pages == len(tokens) // TEST_PAGE_SIZE
+    radix_cache.release_pages(alloc)
+    # The base holds 2 pages, the new branch its copied page and 1 new page.
+    pool = radix_cache.page_pool
+    assert pool.available_page_count() == pool.total_page_count() - 4
+
+    # Both branches are now cached.
+    assert radix_cache.lookup(base).num_tokens == len(base)
+    assert radix_cache.lookup(tokens).num_tokens == len(tokens)
+    # Full matches copy no page.
+    assert pool.available_page_count() == pool.total_page_count() - 4
+
+    radix_cache.shutdown()
+
+
+def test_no_partial_match(radix_cache):
+    _publish_sequence(radix_cache, list(range(TEST_PAGE_SIZE)))
+
+    tokens = [500 + i for i in range(TEST_PAGE_SIZE)]
+    cached_allocation = radix_cache.lookup(tokens)
+    assert cached_allocation.num_tokens == 0
+    assert cached_allocation.partial_page_tokens == 0
+    assert cached_allocation.pages == []
+
+    radix_cache.shutdown()
+
+
+def test_full_page_match_unchanged(radix_cache):
+    base = list(range(2 * TEST_PAGE_SIZE))
+    _publish_sequence(radix_cache, base)
+
+    cached_allocation = radix_cache.lookup(base)
+    assert cached_allocation.num_tokens == len(base)
+    assert cached_allocation.partial_page_tokens == 0
+    assert cached_allocation.number_of_published_pages == 2
+
+    radix_cache.shutdown()
+
+
+def test_failed_allocation_frees_copied_page(radix_cache):
+    base = list(range(2 * TEST_PAGE_SIZE))
+    _publish_sequence(radix_cache, base)
+    pool = radix_cache.page_pool
+    available = pool.available_page_count()
+
+    tokens = base[: TEST_PAGE_SIZE + 5]
+    cached_allocation = radix_cache.lookup(tokens + [1000])
+    assert cached_allocation.partial_page_tokens == 5
+    assert pool.available_page_count() == available - 1
+
+    too_many_tokens = [2000 + i for i in range(available * TEST_PAGE_SIZE)]
+    with pytest.raises(CacheAllocationFailure):
+        radix_cache.allocate(too_many_tokens, cached_allocation, evict=False)
+    assert pool.available_page_count() == available
+
+    radix_cache.shutdown()
@@ -358,7 +358,7 @@ def test_lru_eviction(trie_cache, access_count):
     logger.debug("\nCache state before attempting new allocation:")
     print_tree_state(trie_cache, "  ")
     logger.debug(
-        f"\nAvailable pages in pool:, {len(trie_cache.page_pool.available_pages)}"
+        f"\nAvailable pages in pool:, {trie_cache.page_pool.available_page_count()}"
     )
 
     # Try to allocate new sequence - should evict least recently used unpublished sequence
@@ -524,3 +524,93 @@ def test_reference_counting(trie_cache, ref_count):
     logger.debug("\nCleaning up allocations...")
     for alloc in allocations + fill_allocations:
         trie_cache.release_pages(alloc)
+
+
+def test_cache_stats(trie_cache, published_sequence):
+    """Test hit/miss/eviction counters"""
+    tokens = list(range(TEST_PAGE_SIZE * 2))
+    published_sequence(tokens)  # miss
+    stats = trie_cache.get_stats()
+    assert stats.lookups == 1
+    assert stats.misses == 1
+    assert stats.hits == 0
+
+    trie_cache.lookup(tokens)  # hit
+    stats = trie_cache.get_stats()
+    assert stats.hits == 1
+    assert stats.matched_tokens == len(tokens)
+    assert stats.hit_rate == 0.5
+
+    # Fill the pool so that a new allocation has to evict.
+    for i in range(TEST_POOL_CAPACITY - 2):
+        published_sequence(list(range(1000 * (i + 1), 1000 * (i + 1) + TEST_PAGE_SIZE)))
+    new_tokens = list(range(50000, 50000 + TEST_PAGE_SIZE))
+    cached_allocation = trie_cache.lookup(new_tokens)
+    alloc = trie_cache.allocate(new_tokens, cached_allocation)
+    trie_cache.release_pages(alloc)
+    assert trie_cache.get_stats().evicted_pages == 1
+
+
+def test_eviction_heap_bounded(trie_cache, published_sequence):
+    """Repeated hits must not grow the eviction index without bound"""
+    tokens = list(range(TEST_PAGE_SIZE))
+    published_sequence(tokens)
+    for _ in range(1000):
+        trie_cache.lookup(tokens)
+    assert len(trie_cache._eviction_heap) <= 2 * len(trie_cache.leaves) + 65
+
+
+def test_eviction_follows_access_order(trie_cache, published_sequence):
+    """The least recently looked up leaf is evicted first"""
+    sequences = [
+        list(range(i * 100, i * 100 + TEST_PAGE_SIZE))
+        for i in range(TEST_POOL_CAPACITY)
+    ]
+    for tokens in sequences:
+        published_sequence(tokens)
+
+    # Touch every sequence except the second one.
+    for i, tokens in enumerate(sequences):
+        if i != 1:
+            trie_cache.lookup(tokens)
+
+    assert trie_cache.evict_pages(1) == 1
+    assert trie_cache.lookup(sequences[1]).num_tokens == 0
+    for i, tokens in enumerate(sequences):
+        if i != 1:
+            assert trie_cache.lookup(tokens).num_tokens == TEST_PAGE_SIZE
+
+
+def test_lookup_continuation(trie_cache, published_sequence):
+    """Continuations follow the most recently used branch"""
+    tokens = list(range(TEST_PAGE_SIZE * 3))
+    published_sequence(tokens)
+    stats = trie_cache.get_stats()
+
+    half = TEST_PAGE_SIZE // 2
+    assert trie_cache.lookup_continuation(tokens[:half], 4) == tokens[half : half + 4]
+    assert (
+        trie_cache.lookup_continuation(tokens[: TEST_PAGE_SIZE + 1], TEST_PAGE_SIZE * 4)
+        == tokens[TEST_PAGE_SIZE + 1 :]
+    )
+    assert trie_cache.lookup_continuation([1000] + tokens[1:half], 4) == []
+    # Continuation lookups are not counted as cache lookups.
+    assert trie_cache.get_stats() == stats
+
+    branch = tokens[:TEST_PAGE_SIZE] + list(range(500, 500 + TEST_PAGE_SIZE))
+    published_sequence(branch)
+    assert trie_cache.lookup_continuation(tokens[:TEST_PAGE_SIZE], 2) == [500, 501]
+
+
+def test_cached_prefix_length(trie_cache, published_sequence):
+    """Only whole cached pages count towards the prefix length"""
+    tokens = list(range(TEST_PAGE_SIZE * 2 + 3))
+    published_sequence(tokens)
+    stats = trie_cache.get_stats()
+
+    assert trie_cache.cached_prefix_length(tokens) == TEST_PAGE_SIZE * 2
+    assert trie_cache.cached_prefix_length(tokens[: TEST_PAGE_SIZE + 1]) == (
+        TEST_PAGE_SIZE
+    )
+    assert trie_cache.cached_prefix_length([1000] + tokens[1:]) == 0
+    assert trie_cache.get_stats() == stats
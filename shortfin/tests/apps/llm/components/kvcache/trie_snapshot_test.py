@@ -0,0 +1,197 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import os
+import pytest
+from typing import List
+
+import shortfin.array as sfnp
+
+from shortfin_apps.llm.components.config_struct import ModelParams, PagedKVCacheParams
+from shortfin_apps.llm.components.kvcache import trie_snapshot
+from shortfin_apps.llm.components.kvcache.page_pool import PagePool, PagePoolConfig
+from shortfin_apps.llm.components.kvcache.trie_attention_cache import (
+    TriePagedAttentionCache,
+)
+from shortfin_apps.llm.components.kvcache.trie_snapshot import (
+    load_trie_snapshot,
+    save_trie_snapshot,
+)
+
+TEST_PAGE_SIZE = 16
+TEST_POOL_CAPACITY = 8
+TEST_BLOCK_SIZE = 8
+TEST_FINGERPRINT = "test-model"
+
+
+def _make_cache(device) -> TriePagedAttentionCache:
+    page_pool = PagePool(
+        devices=[device],
+        config=PagePoolConfig(
+            dtype=sfnp.float32,
+            alloc_page_count=TEST_POOL_CAPACITY,
+            paged_kv_block_size_elements_per_device=[TEST_BLOCK_SIZE],
+        ),
+    )
+    return TriePagedAttentionCache(page_pool=page_pool, tokens_per_page=TEST_PAGE_SIZE)
+
+
+def _publish_sequence(cache: TriePagedAttentionCache, tokens: List[int]):
+    cached_allocation = cache.lookup(tokens)
+    alloc = cache.allocate(tokens[cached_allocation.num_tokens :], cached_allocation)
+    alloc = cache.publish_pages_for_tokens(alloc)
+    cache.release_pages(alloc)
+    return alloc
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return tmp_path / "prefix_cache"
+
+
+def test_snapshot_round_trip(lsys, device, snapshot_path):
+    shared = list(range(2 * TEST_PAGE_SIZE))
+    first = shared + [100 + i for i in range(TEST_PAGE_SIZE)]
+    second = shared + [200 + i for i in range(TEST_PAGE_SIZE)]
+    staging = sfnp.device_array.for_host(device, [TEST_BLOCK_SIZE], sfnp.float32)
+
+    async def write_page(cache, index: int, value: float):
+        with staging.map(discard=True) as m:
+            m.items = [value] * TEST_BLOCK_SIZE
+        cache.page_pool.page_tables[0].view(index).copy_from(staging)
+        await device
+
+    async def read_page(cache, index: int) -> List[float]:
+        staging.copy_from(cache.page_pool.page_tables[0].view(index))
+        await device
+        return staging.items.tolist()
+
+    async def main():
+        cache = _make_cache(device)
+        for tokens in (first, second):
+            alloc = _publish_sequence(cache, tokens)
+            for i, page in enumerate(alloc.pages):
+                await write_page(cache, page.index, float(tokens[i * TEST_PAGE_SIZE]))
+        assert await save_trie_snapshot(cache, snapshot_path, TEST_FINGERPRINT) == 4
+        cache.shutdown()
+
+        restored = _make_cache(device)
+        assert await load_trie_snapshot(restored, snapshot_path, TEST_FINGERPRINT) == 4
+        assert restored.page_pool.available_page_count() == TEST_POOL_CAPACITY - 4
+        for tokens in (first, second):
+            cached_allocation = restored.lookup(tokens)
+            assert cached_allocation.num_tokens == len(tokens)
+            for i, page in enumerate(cached_allocation.pages):
+                expected = float(tokens[i * TEST_PAGE_SIZE])
+                assert (
+                    await read_page(restored, page.index)
+                    == [expected] * TEST_BLOCK_SIZE
+                )
+
+        # Restored pages are evictable like any other published page.
+        assert restored.evict_pages(TEST_POOL_CAPACITY) == 4
+        restored.shutdown()
+
+    lsys.run(main())
+
+
+def test_snapshot_fingerprint_mismatch(lsys, device, snapshot_path):
+    async def main():
+        cache = _make_cache(device)
+        _publish_sequence(cache, list(range(TEST_PAGE_SIZE)))
+        assert await save_trie_snapshot(cache, snapshot_path, TEST_FINGERPRINT) == 1
+        cache.shutdown()
+
+        restored = _make_cache(device)
+        assert await load_trie_snapshot(restored, snapshot_path, "other-model") == 0
+        assert restored.page_pool.available_page_count() == TEST_POOL_CAPACITY
+        assert restored.lookup(list(range(TEST_PAGE_SIZE))).num_tokens == 0
+        restored.shutdown()
+
+    lsys.run(main())
+
+
+def test_snapshot_truncated_to_free_pages(lsys, device, snapshot_path):
+    tokens = list(range(3 * TEST_PAGE_SIZE))
+
+    async def main():
+        cache = _make_cache(device)
+        _publish_sequence(cache, tokens)
+        assert await save_trie_snapshot(cache, snapshot_path, TEST_FINGERPRINT) == 3
+        cache.shutdown()
+
+        restored = _make_cache(device)
+        held = restored.page_pool.acquire_free_pages(TEST_POOL_CAPACITY - 2)
+        assert await load_trie_snapshot(restored, snapshot_path, TEST_FINGERPRINT) == 2
+        assert restored.lookup(tokens).num_tokens == 2 * TEST_PAGE_SIZE
+        restored.page_pool.free_pages(held)
+        restored.shutdown()
+
+    lsys.run(main())
+
+
+def test_snapshot_pins_one_slice(lsys, device, snapshot_path, monkeypatch):
+    monkeypatch.setattr(trie_snapshot, "_TRANSFER_PAGES", 2)
+    chain = list(range(3 * TEST_PAGE_SIZE))
+    single = [100 + i for i in range(TEST_PAGE_SIZE)]
+    cache = _make_cache(device)
+    read_pages = trie_snapshot._read_pages
+    evicted = []
+
+    async def read_pages_and_evict(*args):
+        # Only the first page of each sequence is pinned while the first
+        # slice is read, so the rest of the chain can be evicted.
+        if not evicted:
+            evicted.append(cache.evict_pages(TEST_POOL_CAPACITY))
+        await read_pages(*args)
+
+    monkeypatch.setattr(trie_snapshot, "_read_pages", read_pages_and_evict)
+
+    async def main():
+        _publish_sequence(cache, chain)
+        _publish_sequence(cache, single)
+        assert await save_trie_snapshot(cache, snapshot_path, TEST_FINGERPRINT) == 2
+        assert evicted == [2]
+        cache.shutdown()
+
+        restored = _make_cache(device)
+        assert await load_trie_snapshot(restored, snapshot_path, TEST_FINGERPRINT) == 2
+        assert restored.lookup(chain).num_tokens == TEST_PAGE_SIZE
+        assert restored.lookup(single).num_tokens == TEST_PAGE_SIZE
+        restored.shutdown()
+
+    lsys.run(main())
+
+
+def test_fingerprint_tracks_weights(tmp_path):
+    model_params = ModelParams(
+        max_seq_len=512,
+        transformer_block_count=2,
+        attn_head_dim=16,
+        prefill_batch_sizes=[4],
+        decode_batch_sizes=[4],
+        paged_kv_cache=PagedKVCacheParams(
+            block_seq_stride=TEST_PAGE_SIZE,
+            attention_head_count_kv=2,
+            device_block_count=TEST_POOL_CAPACITY,
+            kv_cache_dtype=sfnp.float16,
+        ),
+    )
+    weights = tmp_path / "model.irpa"
+    weights.write_bytes(b"0" * 16)
+    os.utime(weights, ns=(0, 0))
+    fingerprint = model_params.fingerprint(weights)
+
+    # Retrained weights of the same size are told apart by their mtime.
+    weights.write_bytes(b"1" * 16)
+    os.utime(weights, ns=(0, 1))
+    assert model_params.fingerprint(weights) != fingerprint
+
+    # A weights version replaces the file metadata.
+    versioned = model_params.fingerprint(weights, weights_version="v1")
+    os.utime(weights, ns=(0, 2))
+    assert model_params.fingerprint(weights, weights_version="v1") == versioned
+    assert model_params.fingerprint(weights, weights_version="v2") != versioned
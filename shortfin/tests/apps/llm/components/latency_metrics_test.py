@@ -0,0 +1,37 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+from shortfin_apps.llm.components.latency_metrics import (
+    ClassLatencyMetrics,
+    LatencyHistogram,
+)
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for latency_s in (0.005, 0.02, 0.02, 0.3, 60.0):
+        histogram.record(latency_s)
+
+    assert histogram.count == 5
+    assert histogram.quantile_s(0.5) == 0.025
+    assert histogram.quantile_s(0.8) == 0.5
+    assert histogram.quantile_s(1.0) == float("inf")
+
+
+def test_class_latency_metrics():
+    metrics = ClassLatencyMetrics()
+    metrics.record(priority=0, tenant="a", admission_wait_s=0.0, end_to_end_s=1.0)
+    metrics.record(priority=0, tenant="a", admission_wait_s=0.5, end_to_end_s=2.0)
+    metrics.record(priority=1, tenant=None, admission_wait_s=0.0, end_to_end_s=3.0)
+
+    stats = metrics.get_stats()
+    assert set(stats) == {(0, "a"), (1, None)}
+    assert stats[(0, "a")].end_to_end.mean_s == 1.5
+    assert stats[(0, "a")].admission_wait.total_s == 0.5
+
+    # Returned stats are a snapshot:
+    metrics.record(priority=1, tenant=None, admission_wait_s=0.0, end_to_end_s=3.0)
+    assert stats[(1, None)].end_to_end.count == 1
@@ -0,0 +1,106 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import json
+import pytest
+import shortfin.array as sfnp
+
+from unittest.mock import MagicMock
+
+from shortfin_apps.llm.components.config_struct import (
+    ModelParams,
+    PagedKVCacheParams,
+    ServedModelConfig,
+    ServerParams,
+)
+from shortfin_apps.llm.components.decode_config import (
+    DecodeConfig,
+    LogitsNormalization,
+)
+from shortfin_apps.llm.components.manager import LlmSystemManager
+from shortfin_apps.llm.components.service import LlmGenerateService
+
+
+@pytest.fixture
+def sysman():
+    sysman = LlmSystemManager(device="local-task")
+    yield sysman
+    sysman.ls.shutdown()
+
+
+def test_workers_are_shared(sysman):
+    worker = sysman.get_worker("inference-main-0")
+    assert sysman.get_worker("inference-main-0") is worker
+    assert sysman.get_worker("inference-prefill-0") is not worker
+
+
+def test_load_served_models(tmp_path):
+    path = tmp_path / "models.json"
+    path.write_text(
+        json.dumps(
+            [
+                {
+                    "name": "small",
+                    "model_config": "small/config.json",
+                    "vmfb": "small/model.vmfb",
+                    "parameters": ["small/model.irpa"],
+                    "page_budget": 64,
+                }
+            ]
+        )
+    )
+
+    (model,) = ServedModelConfig.load_list(path)
+    assert model.name == "small"
+    assert model.parameters == ["small/model.irpa"]
+    assert model.page_budget == 64
+    assert model.tokenizer_json is None
+
+
+def test_served_model_tokenizer_requires_config():
+    with pytest.raises(ValueError, match="tokenizer_config_json"):
+        ServedModelConfig(
+            name="small",
+            model_config="small/config.json",
+            vmfb="small/model.vmfb",
+            tokenizer_json="small/tokenizer.json",
+        )
+
+
+def _model_params(logits_normalization):
+    return ModelParams(
+        max_seq_len=64,
+        transformer_block_count=2,
+        attn_head_dim=16,
+        prefill_batch_sizes=[4],
+        decode_batch_sizes=[4],
+        logits_normalization=logits_normalization,
+        paged_kv_cache=PagedKVCacheParams(
+            block_seq_stride=16,
+            attention_head_count_kv=2,
+            device_block_count=8,
+            kv_cache_dtype=sfnp.float16,
+        ),
+    )
+
+
+def test_decode_config_per_model(sysman):
+    server_params = ServerParams(decode_config=DecodeConfig(num_beams=2))
+    services = {
+        normalization: LlmGenerateService(
+            name=normalization.name,
+            sysman=sysman,
+            tokenizer=MagicMock(),
+            model_params=_model_params(normalization),
+            server_params=server_params,
+        )
+        for normalization in (LogitsNormalization.NONE, LogitsNormalization.SOFTMAX)
+    }
+
+    for normalization, service in services.items():
+        assert service.decode_config.logits_normalization == normalization
+        assert service.decode_config.num_beams == 2
+    assert server_params.decode_config.logits_normalization == LogitsNormalization.NONE
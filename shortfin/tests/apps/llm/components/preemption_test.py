@@ -0,0 +1,67 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import asyncio
+import pytest
+
+from shortfin_apps.llm.components.batching.preemption import (
+    PreemptionManager,
+    PreemptionPolicy,
+    SequenceState,
+)
+
+
+def test_no_victim_without_other_sequences():
+    manager = PreemptionManager(PreemptionPolicy.NEWEST_FIRST)
+    seq = manager.register()
+
+    assert not asyncio.run(manager.make_room(seq))
+    assert not seq.preempt_requested
+
+
+def test_newest_sequence_preempts_itself():
+    manager = PreemptionManager(PreemptionPolicy.NEWEST_FIRST)
+    manager.register()
+    newest = manager.register()
+
+    assert asyncio.run(manager.make_room(newest))
+    assert newest.preempt_requested
+    assert manager.preemptions == 1
+
+
+@pytest.mark.parametrize(
+    "policy,expected_victim",
+    [
+        (PreemptionPolicy.NEWEST_FIRST, 2),
+        (PreemptionPolicy.LOWEST_PRIORITY, 1),
+    ],
+)
+def test_victim_suspends_and_resumes(policy, expected_victim):
+    manager = PreemptionManager(policy)
+    requester = manager.register(priority=0)
+    others = [manager.register(priority=1), manager.register(priority=0)]
+    victim = others[expected_victim - 1]
+
+    async def run():
+        make_room = asyncio.create_task(manager.make_room(requester))
+        await asyncio.sleep(0)
+        assert victim.preempt_requested
+        assert requester.state == SequenceState.WAITING
+        assert not make_room.done()
+
+        # The victim releases its pages at its next step:
+        suspend = asyncio.create_task(manager.suspend(victim))
+        assert await asyncio.wait_for(make_room, timeout=1)
+        assert requester.state == SequenceState.RUNNING
+        assert victim.state == SequenceState.SUSPENDED
+
+        # A finishing sequence resumes the suspended one:
+        manager.unregister(requester)
+        await asyncio.wait_for(suspend, timeout=1)
+        assert victim.state == SequenceState.RUNNING
+        assert not victim.preempt_requested
+
+    asyncio.run(run())
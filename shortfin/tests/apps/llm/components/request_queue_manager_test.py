@@ -4,6 +4,8 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
+import asyncio
+
 import shortfin.array as sfnp
 from shortfin_apps.llm.components.config_struct import ModelParams, PagedKVCacheParams
 from shortfin_apps.llm.components.decode_config import DecodeConfig
@@ -217,3 +219,99 @@ def test_add_to_queue(
         assert request_id in manager.current_tasks()
     else:
         assert request_id is None
+
+
+@pytest.fixture
+def overcommit_manager(mock_model_params):
+    page_cache = MagicMock()
+    page_cache.cached_prefix_length.return_value = 0
+    return RequestQueueManager(
+        model_params=mock_model_params,
+        page_cache=page_cache,
+        admission_mode="overcommit",
+    )
+
+
+def test_overcommit_needed_pages(overcommit_manager):
+    manager = overcommit_manager
+    decode_config = DecodeConfig(num_beams=1, max_completion_tokens=160)
+    input_batch = [list(range(64))]
+
+    # Nothing is known about completions yet, so the worst case is reserved.
+    assert manager._calculate_needed_pages([decode_config], input_batch, True) == 14
+
+    # Prompt pages held by the prefix cache are not reserved.
+    manager._page_cache.cached_prefix_length.return_value = 48
+    assert manager._calculate_needed_pages([decode_config], input_batch, True) == 11
+
+    # Completions much shorter than their limit shrink the reservation.
+    for _ in range(50):
+        request_id = manager.add_to_queue(
+            decode_configs=[decode_config],
+            input_batch=input_batch,
+            is_pretokenized=True,
+            responder=MagicMock(),
+        )
+        manager.remove_from_queue(request_id, completion_tokens=[16])
+    assert manager._calculate_needed_pages([decode_config], input_batch, True) < 11
+    assert manager.available_page_count == manager.total_page_count
+
+
+def test_overcommit_waits_for_capacity(overcommit_manager, responder):
+    manager = overcommit_manager
+    large = DecodeConfig(num_beams=1, max_completion_tokens=16 * 70)
+    small = DecodeConfig(num_beams=1, max_completion_tokens=16 * 40)
+
+    async def run():
+        first = await manager.wait_for_admission(
+            decode_configs=[large],
+            input_batch=[[1]],
+            is_pretokenized=True,
+            responder=responder,
+        )
+        waiting = [
+            asyncio.create_task(
+                manager.wait_for_admission(
+                    decode_configs=[config],
+                    input_batch=[[1]],
+                    is_pretokenized=True,
+                    responder=responder,
+                    priority=priority,
+                )
+            )
+            for config, priority in [(large, 1), (small, 0)]
+        ]
+        await asyncio.sleep(0)
+        assert not any(task.done() for task in waiting)
+
+        # Freeing the first request admits the higher priority request,
+        # even though it arrived later.
+        manager.remove_from_queue(first)
+        second = await asyncio.wait_for(waiting[1], timeout=1)
+        assert not waiting[0].done()
+
+        # Cancelled waiters give up their place in the queue.
+        waiting[0].cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting[0]
+        assert manager._waiting == []
+        manager.remove_from_queue(second)
+
+    asyncio.run(run())
+    responder.send_error.assert_not_called()
+    assert manager.available_page_count == manager.total_page_count
+
+
+def test_overcommit_rejects_oversized_request(overcommit_manager, responder):
+    decode_config = DecodeConfig(num_beams=1, max_completion_tokens=16 * 200)
+
+    async def run():
+        return await overcommit_manager.wait_for_admission(
+            decode_configs=[decode_config],
+            input_batch=[[1]],
+            is_pretokenized=True,
+            responder=responder,
+        )
+
+    assert asyncio.run(run()) is None
+    responder.send_error.assert_called_once()
@@ -4,8 +4,17 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 import logging
+import pytest
 
-from shortfin_apps.llm.components.scheduler import Scheduler, WorkloadBuilder
+from shortfin_apps.llm.components.invocation import LlmTaskInput
+from shortfin_apps.llm.components.scheduler import (
+    ContinuousScheduler,
+    PipelinedScheduler,
+    Scheduler,
+    WeightedFairQueue,
+    WorkloadBuilder,
+)
+from shortfin_apps.utils import BoardingPolicy
 
 
 logger = logging.getLogger(__name__)
@@ -257,6 +266,237 @@ def test_scheduler_reserved_two_separate():
     assert to_schedule[1] == workload[1]
 
 
+# Check that the pipelined scheduler spreads reservations over two batches
+def test_pipelined_scheduler_balances_groups():
+    scheduler = PipelinedScheduler(ideal_batch_size=8, pipeline_depth=2)
+
+    reserve_helper(scheduler, rid=0, count=2)
+    reserve_helper(scheduler, rid=1, count=2)
+    reserve_helper(scheduler, rid=2, count=1)
+    reserve_helper(scheduler, rid=3, count=2)
+
+    placement = scheduler._workgroup_placement
+    assert placement[0] != placement[1]
+    assert placement[2] == placement[0]
+    assert placement[3] == placement[1]
+
+    workload = make_workload({0: 2, 1: 2, 2: 1, 3: 2})
+    schedule_workload(scheduler, workload)
+    to_schedule = scheduler.should_execute(strobe=0)
+
+    # Both groups are ready but are dispatched as separate batches.
+    assert len(to_schedule) == 2
+    assert to_schedule[0] == workload[0] + workload[2]
+    assert to_schedule[1] == workload[1] + workload[3]
+
+
+# Check that a request finishing in one batch does not stall the other
+def test_pipelined_scheduler_request_completes():
+    scheduler = PipelinedScheduler(ideal_batch_size=8, pipeline_depth=2)
+
+    reserve_helper(scheduler, rid=0, count=1)
+    reserve_helper(scheduler, rid=1, count=1)
+    reserve_helper(scheduler, rid=2, count=1)
+
+    reserve_helper(scheduler, rid=2, count=0)
+    workload = make_workload({0: 1, 1: 1})
+    schedule_workload(scheduler, workload)
+    to_schedule = scheduler.should_execute(strobe=0)
+    assert to_schedule == [workload[0], workload[1]]
+
+    # Only one batch has returned its results; it is dispatched on its own.
+    workload = make_workload({1: 1})
+    schedule_workload(scheduler, workload)
+    to_schedule = scheduler.should_execute(strobe=0)
+    assert to_schedule == [workload[1]]
+
+
+def make_task_input(rid, instance_id, token_count=1, priority=0, tenant=None):
+    return LlmTaskInput(
+        rid=rid,
+        instance_id=instance_id,
+        block_count=1,
+        seq_len=token_count,
+        input_tokens=tuple(range(token_count)),
+        page_ids=(0,),
+        priority=priority,
+        tenant=tenant,
+    )
+
+
+# Check that decode steps are taken first and prefill fills the token budget
+def test_continuous_scheduler_token_budget():
+    scheduler = ContinuousScheduler(
+        token_budget=16, max_prefill_batch_size=4, max_decode_batch_size=4
+    )
+    decode = [make_task_input(rid=i, instance_id=i) for i in range(2)]
+    prefill = [
+        make_task_input(rid=10 + i, instance_id=10 + i, token_count=6) for i in range(3)
+    ]
+    for task in prefill:
+        scheduler.schedule_job(task, prefill=True)
+    for task in decode:
+        scheduler.schedule_job(task)
+
+    iteration = scheduler.should_execute(strobe=0)
+    assert iteration.decode == decode
+    assert iteration.prefill == prefill[:2]
+    assert iteration.token_count == 14
+
+    # The remaining prefill runs at the next iteration, even if over budget.
+    iteration = scheduler.should_execute(strobe=0)
+    assert iteration.decode == []
+    assert iteration.prefill == prefill[2:]
+    assert scheduler.should_execute(strobe=0) is None
+
+
+# Check that an iteration waits for the running sequences, or one strobe
+def test_continuous_scheduler_waits_for_running():
+    scheduler = ContinuousScheduler(
+        token_budget=16, max_prefill_batch_size=4, max_decode_batch_size=4
+    )
+    reserve_helper(scheduler, rid=0, count=1)
+    reserve_helper(scheduler, rid=1, count=1)
+
+    first = make_task_input(rid=0, instance_id=0)
+    scheduler.schedule_job(first)
+    assert scheduler.should_execute(strobe=0) is None
+
+    second = make_task_input(rid=1, instance_id=1)
+    scheduler.schedule_job(second)
+    assert scheduler.should_execute(strobe=0).decode == [first, second]
+
+    # A finished sequence leaves the running set immediately.
+    reserve_helper(scheduler, rid=1, count=0)
+    scheduler.schedule_job(first)
+    assert scheduler.should_execute(strobe=1).decode == [first]
+
+    # A straggler holds up the iteration for at most one strobe.
+    reserve_helper(scheduler, rid=2, count=1)
+    scheduler.schedule_job(first)
+    assert not scheduler.waiting_for_decode
+    assert scheduler.should_execute(strobe=2) is None
+    assert scheduler.waiting_for_decode
+    assert scheduler.should_execute(strobe=3).decode == [first]
+    assert not scheduler.waiting_for_decode
+
+
+# Check that prefill chunks of a request join successive iterations
+def test_continuous_scheduler_chunked_prefill():
+    scheduler = ContinuousScheduler(
+        token_budget=16, max_prefill_batch_size=4, max_decode_batch_size=4
+    )
+    chunks = [make_task_input(rid=0, instance_id=0, token_count=4) for _ in range(2)]
+    for chunk in chunks:
+        scheduler.schedule_job(chunk, prefill=True)
+
+    assert scheduler.should_execute(strobe=0).prefill == [chunks[0]]
+    assert scheduler.should_execute(strobe=0) is None
+    assert scheduler.handle_completed(0) is False
+    assert scheduler.should_execute(strobe=0).prefill == [chunks[1]]
+    assert scheduler.handle_completed(0) is True
+
+
+# Check that backlogged tenants are served tokens in proportion to their shares
+def test_weighted_fair_queue_shares():
+    queue = WeightedFairQueue({"a": 3.0, "b": 1.0})
+    tasks = [
+        make_task_input(rid=f"{tenant}{i}", instance_id=i, token_count=4, tenant=tenant)
+        for tenant in ("b", "a")
+        for i in range(4)
+    ]
+
+    order = queue.order(tasks)
+    assert [task.tenant for task in order[:4]] == ["b", "a", "a", "a"]
+    assert [task.tenant for task in order[4:6]] == ["b", "a"]
+
+    # A new tenant starts at the virtual clock of the served tasks, ahead of
+    # the backlog of "b".
+    queue.served(order[:6], order[6:])
+    late = make_task_input(rid="c0", instance_id=0, token_count=4, tenant="c")
+    assert queue.order(order[6:] + [late]) == [late] + order[6:]
+
+
+def test_weighted_fair_queue_forgets_departed_work():
+    queue = WeightedFairQueue({"a": 1.0})
+    bulk = [
+        make_task_input(rid=i, instance_id=i, token_count=4, tenant="a")
+        for i in range(2)
+    ]
+    other = make_task_input(rid=2, instance_id=2, token_count=4, tenant="unknown")
+    queue.order(bulk + [other])
+
+    # `other` left without being dispatched, so its tag is dropped, and the
+    # virtual clock caught up with the finish time of its tenant.
+    queue.served(bulk, [])
+    assert queue._tags == {}
+    assert queue._finish_times == {"a": 8.0}
+
+
+def test_weighted_fair_queue_priority():
+    queue = WeightedFairQueue({"a": 100.0})
+    bulk = make_task_input(rid=0, instance_id=0, tenant="a")
+    urgent = make_task_input(rid=1, instance_id=1, token_count=64, priority=-1)
+    assert queue.order([bulk, urgent]) == [urgent, bulk]
+
+
+# Check that the continuous scheduler takes decode work in fair order
+def test_continuous_scheduler_fair_queue():
+    scheduler = ContinuousScheduler(
+        token_budget=16, max_prefill_batch_size=4, max_decode_batch_size=2
+    )
+    scheduler.fair_queue = WeightedFairQueue({"a": 1.0, "b": 1.0})
+    tasks = [
+        make_task_input(rid=i, instance_id=i, tenant=tenant)
+        for i, tenant in enumerate(["a", "a", "a", "b"])
+    ]
+    for task in tasks:
+        scheduler.schedule_job(task)
+
+    assert scheduler.should_execute(strobe=0).decode == [tasks[0], tasks[3]]
+    assert scheduler.should_execute(strobe=0).decode == tasks[1:3]
+
+
+def test_boarding_policy_adapts_to_arrival_rate():
+    policy = BoardingPolicy(ideal_batch_size=4, max_delay_s=0.1)
+
+    # Without an arrival rate, work waits for the full deadline:
+    assert policy.delay(1) == 0.1
+    assert policy.delay(4) == 0.0
+
+    # With frequent arrivals, wait as long as the batch takes to fill:
+    for now in (0.0, 0.01, 0.02):
+        policy.record_arrival(now)
+    assert policy.delay(1) == pytest.approx(0.03)
+    assert not policy.should_board(1, oldest_arrival=0.02, now=0.03)
+    assert policy.should_board(1, oldest_arrival=0.02, now=0.06)
+
+    # A batch that is not expected to fill in time boards at once:
+    policy.record_arrival(1.0)
+    assert policy.delay(1) == 0.0
+    assert policy.should_board(1, oldest_arrival=1.0, now=1.0)
+
+
+def test_scheduler_boarding_policy():
+    scheduler = Scheduler(ideal_batch_size=4)
+    scheduler.boarding_policy = BoardingPolicy(ideal_batch_size=4, max_delay_s=60.0)
+
+    workload = make_workload({0: 2})
+    schedule_workload(scheduler, workload)
+
+    # Strobes no longer board partial batches:
+    assert len(scheduler.should_execute(strobe=2)) == 0
+    assert scheduler.boarding_deadline() is not None
+
+    # Requests arrive rarely, so the partial batch is boarded:
+    scheduler.boarding_policy.record_arrival(0.0)
+    scheduler.boarding_policy.record_arrival(3600.0)
+    to_schedule = scheduler.should_execute(strobe=0)
+    assert len(to_schedule) == 1
+    assert to_schedule[0] == workload[0]
+    assert scheduler.boarding_deadline() is None
+
+
 class TestWorkloadBuilder:
     def setup_method(self):
         self.ideal_batch_size = 4
@@ -355,3 +595,13 @@ class TestWorkloadBuilder:
 
         assert self.workload_builder.get_jobs() == expected
         assert self.workload_builder.available() == 0
+
+    def test_workload_builder_no_merge(self):
+        workload_builder = WorkloadBuilder(
+            ideal_batch_size=self.ideal_batch_size, merge_jobs=False
+        )
+        job1 = ["Task1"]
+        job2 = ["Task2"]
+        workload_builder.add_work(job1)
+        workload_builder.add_work(job2)
+        assert workload_builder.get_jobs() == [job1, job2]
@@ -0,0 +1,186 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import asyncio
+import numpy as np
+import pytest
+
+from unittest.mock import MagicMock, patch
+
+from shortfin_apps.llm.components.decode_config import DecodeConfig
+from shortfin_apps.llm.components.decoder.decoder import PageManager
+from shortfin_apps.llm.components.decoder.speculative_decoder import (
+    PromptLookupDecoder,
+    SpeculationMetrics,
+    accept_draft_tokens,
+    greedy_tokens,
+    propose_ngram_tokens,
+)
+from shortfin_apps.llm.components.messages import InferencePhase
+from shortfin_apps.llm.components.prefill_config import PrefillConfig
+
+VOCAB_SIZE = 64
+
+
+class MockVoidFuture:
+    def __init__(self):
+        self._event = asyncio.Event()
+
+    def set_success(self):
+        self._event.set()
+
+    def __await__(self):
+        return self._event.wait().__await__()
+
+
+class FakeBatcher:
+    """Runs a model predicting the token after each input token."""
+
+    def __init__(self, page_cache):
+        self.page_cache = page_cache
+        self.phases = []
+        self.reservations = []
+
+    def get_page_cache(self):
+        return self.page_cache
+
+    def get_preemption_manager(self):
+        return None
+
+    def reserve_workload(self, *, rid, count, phase=InferencePhase.DECODE):
+        self.reservations.append((count, phase))
+
+    def submit(self, req):
+        self.phases.append(req.phase)
+        tokens = req.input_token_ids
+        if req.phase == InferencePhase.PREFILL and not req.return_all_logits:
+            tokens = tokens[-1:]
+        logits = np.zeros((len(tokens), VOCAB_SIZE), dtype=np.float32)
+        for i, token in enumerate(tokens):
+            logits[i, (token + 1) % VOCAB_SIZE] = 1.0
+        req.result_logits = logits
+        req.done.set_success()
+
+
+@pytest.mark.parametrize(
+    "draft_tokens,target_tokens,expected",
+    [
+        ([1, 2, 3], [1, 2, 3, 4], [1, 2, 3, 4]),
+        ([1, 2, 3], [1, 5, 3, 4], [1, 5]),
+        ([1, 2, 3], [6, 2, 3, 4], [6]),
+        ([], [7], [7]),
+    ],
+)
+def test_accept_draft_tokens(draft_tokens, target_tokens, expected):
+    assert accept_draft_tokens(draft_tokens, target_tokens) == expected
+
+
+def test_greedy_tokens():
+    logits = np.array([[0.5, 2.0, 1.0], [3.0, 0.0, 1.0]], dtype=np.float16)
+    assert greedy_tokens(logits, None) == [1, 0]
+
+    indices = np.array([[7, 8, 9], [10, 11, 12]])
+    assert greedy_tokens(logits, indices) == [8, 10]
+
+
+@pytest.mark.parametrize(
+    "tokens,max_ngram_size,max_tokens,expected",
+    [
+        # The longest matching n-gram wins over more recent shorter ones.
+        ([1, 2, 3, 4, 9, 3, 5, 2, 3], 2, 3, [4, 9, 3]),
+        ([1, 2, 3, 4, 9, 3, 5, 2, 3], 1, 3, [5, 2, 3]),
+        # Proposals are cut at the end of the sequence.
+        ([1, 2, 3, 1, 2], 3, 5, [3, 1, 2]),
+        ([1, 2, 3, 4], 3, 5, []),
+        ([1], 3, 5, []),
+    ],
+)
+def test_propose_ngram_tokens(tokens, max_ngram_size, max_tokens, expected):
+    assert propose_ngram_tokens(tokens, max_ngram_size, max_tokens) == expected
+
+
+def test_speculation_metrics():
+    metrics = SpeculationMetrics()
+    metrics.record(proposed_tokens=4, accepted_tokens=3)
+    metrics.record(proposed_tokens=4, accepted_tokens=1)
+    metrics.record(proposed_tokens=0, accepted_tokens=0)
+
+    stats = metrics.get_stats()
+    assert stats.steps == 3
+    assert stats.acceptance_rate == 0.5
+    assert stats.tokens_per_step == 7 / 3
+
+
+def test_page_manager_extend_and_rollback(cache, page_pool):
+    tokens_per_page = cache.tokens_per_page
+    total_pages = page_pool.available_page_count()
+    prompt = list(range(tokens_per_page + 4))
+    req = MagicMock(instance_id="req")
+    cache_info = cache.allocate(prompt)
+    allocated_cache_recs = {req.instance_id: cache_info}
+    prompt_pages = [page.index for page in cache_info.pages]
+    page_manager = PageManager(
+        cache,
+        page_pool,
+        initial_pages=list(prompt_pages),
+        initial_length=len(prompt),
+        tokens_per_page=tokens_per_page,
+    )
+
+    # Extending past the last page allocates a block of pages at once.
+    page_ids = page_manager.extend(req, allocated_cache_recs, list(range(15)))
+    assert page_manager.position == len(prompt) + 15
+    assert page_ids[:2] == prompt_pages
+    assert len(page_ids) == 3
+    # The allocation replaces the cache info of the request.
+    cache_info = allocated_cache_recs[req.instance_id]
+    assert cache_info.num_tokens == page_manager.position
+    assert len(cache_info.pages) == 3
+    held_pages = total_pages - page_pool.available_page_count()
+
+    # Rolling back into the previous page drops the page from the beam.
+    page_manager.rollback(req, allocated_cache_recs, 10)
+    assert page_manager.position == len(prompt) + 5
+    assert cache_info.num_tokens == page_manager.position
+    assert [page.index for page in cache_info.pages] == prompt_pages
+
+    # Filling the page allocates nothing, and the next page is the one
+    # dropped by the rollback.
+    assert page_manager.extend(req, allocated_cache_recs, [0] * 7) == prompt_pages
+    assert page_manager.extend(req, allocated_cache_recs, [0]) == page_ids
+    assert page_manager.position == 2 * tokens_per_page + 1
+    assert total_pages - page_pool.available_page_count() == held_pages
+
+    # Pages allocated but never used go back to the pool.
+    page_manager.release_pages()
+    assert total_pages - page_pool.available_page_count() == len(page_ids)
+
+
+def test_prompt_lookup_decodes_without_proposals(cache):
+    batcher = FakeBatcher(cache)
+    results = []
+    with patch(
+        "shortfin_apps.llm.components.messages.sf.VoidFuture", new=MockVoidFuture
+    ):
+        decoder = PromptLookupDecoder(
+            prefill_config=PrefillConfig(has_prefill_position=True),
+            decode_config=DecodeConfig(eos_token_id=0, max_completion_tokens=4),
+            unified_batcher=batcher,
+            results_callback=results.append,
+            rid="rid",
+            num_speculative_tokens=3,
+            max_ngram_size=2,
+        )
+        asyncio.run(decoder.run([10, 11, 12]))
+
+    assert results == [[[13, 14, 15, 16]]]
+    # Without repeated n-grams nothing is proposed, so every step after the
+    # prefill is a plain decode step.
+    assert batcher.phases == [InferencePhase.PREFILL] + [InferencePhase.DECODE] * 3
+    assert batcher.reservations == [
+        (1, InferencePhase.DECODE),
+        (0, InferencePhase.DECODE),
+    ]
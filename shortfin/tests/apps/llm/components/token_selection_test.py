@@ -0,0 +1,82 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import numpy as np
+import pytest
+
+from shortfin_apps.llm.components.decode_config import (
+    DecodeConfig,
+    LogitsNormalization,
+)
+from shortfin_apps.llm.components.decoder.decoder import TokenSelector
+from shortfin_apps.llm.components.token_selection import select_batch_candidates
+
+VOCAB_SIZE = 64
+
+
+def make_logits(rng, count):
+    return rng.standard_normal((count, VOCAB_SIZE)).astype(np.float16)
+
+
+@pytest.mark.parametrize(
+    "normalization",
+    [LogitsNormalization.NONE, LogitsNormalization.LOG_SOFTMAX],
+)
+def test_batch_candidates_match_token_selector(normalization):
+    rng = np.random.default_rng(0)
+    greedy = DecodeConfig(
+        eos_token_id=-1, logits_normalization=normalization, temperature=0.7
+    )
+    beam = DecodeConfig(
+        eos_token_id=-1, num_beams=3, logits_normalization=normalization
+    )
+
+    per_request = {"greedy": TokenSelector(greedy), "beam": TokenSelector(beam)}
+    batched = {"greedy": TokenSelector(greedy), "beam": TokenSelector(beam)}
+    configs = {"greedy": greedy, "beam": beam}
+    rows = {"greedy": 1, "beam": 1}
+
+    for _ in range(4):
+        # Interleave the rows of both requests in one batch:
+        names = [name for name in rows for _ in range(rows[name])]
+        logits = make_logits(rng, len(names))
+        tokens, scores = select_batch_candidates(
+            logits,
+            None,
+            [configs[name] for name in names],
+            [s for name in rows for s in batched[name].scores],
+        )
+
+        for name in rows:
+            positions = [i for i, n in enumerate(names) if n == name]
+            expected_beams, expected_tokens = per_request[name].step(
+                [logits[np.newaxis, i : i + 1] for i in positions],
+                [None for _ in positions],
+            )
+            num_beams = configs[name].num_beams
+            beams, selected = batched[name].step_candidates(
+                [(tokens[i, :num_beams], scores[i, :num_beams]) for i in positions]
+            )
+            assert sorted(zip(beams, selected)) == sorted(
+                zip(expected_beams, expected_tokens)
+            )
+            # The per-request path accumulates scores in the logits dtype.
+            assert sorted(batched[name].scores) == pytest.approx(
+                sorted(per_request[name].scores), rel=1e-2
+            )
+            rows[name] = len(selected)
+
+
+def test_batch_candidates_with_indices():
+    logits = np.array([[0.5, 2.0, 1.0], [3.0, 0.0, 1.0]], dtype=np.float32)
+    indices = np.array([[7, 8, 9], [10, 11, 12]])
+    config = DecodeConfig(
+        num_beams=2, logits_normalization=LogitsNormalization.LOG_SOFTMAX
+    )
+
+    tokens, scores = select_batch_candidates(logits, indices, [config] * 2, [0.0, 1.0])
+    assert tokens.tolist() == [[8, 9], [10, 12]]
+    assert scores.tolist() == [[2.0, 1.0], [4.0, 2.0]]
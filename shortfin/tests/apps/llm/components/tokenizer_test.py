@@ -68,3 +68,58 @@ def test_tokenizer_to_array(cpu_fiber, bert_tokenizer):
     print(masks)
     assert masks.view(0).items.tolist() == [1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0]
     assert masks.view(1).items.tolist() == [1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0]
+
+
+@pytest.fixture
+def word_tokenizer():
+    import tokenizers
+    import shortfin_apps.llm.components.tokenizer as tokenizer
+
+    vocab = {"[UNK]": 0, "hello": 1, "world": 2, "again": 3}
+    raw_tk = tokenizers.Tokenizer(
+        tokenizers.models.WordLevel(vocab=vocab, unk_token="[UNK]")
+    )
+    raw_tk.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    raw_tk.decoder = tokenizers.decoders.WordPiece()
+    return tokenizer.Tokenizer(raw_tk)
+
+
+def test_tokenization_pool(lsys, word_tokenizer):
+    from shortfin_apps.llm.components.tokenizer import TokenizationPool
+
+    pool = TokenizationPool(word_tokenizer, max_workers=2, cache_size=2)
+
+    async def main():
+        encs = await pool.encode(["hello world", "world again", "hello world"])
+        assert [enc.ids for enc in encs] == [[1, 2], [2, 3], [1, 2]]
+        assert encs[0] is encs[2]
+
+        # Repeated prompts are served from the cache.
+        (cached,) = await pool.encode(["world again"])
+        assert cached is encs[1]
+
+        # The least recently used prompt is evicted.
+        await pool.encode(["again"])
+        (hello,) = await pool.encode(["hello world"])
+        assert hello is not encs[0]
+        assert hello.ids == [1, 2]
+
+        assert await pool.decode([[1, 2], [3]]) == ["hello world", "again"]
+
+    lsys.run(main())
+    pool.shutdown()
+
+
+def test_tokenization_pool_concurrent(lsys, word_tokenizer):
+    import asyncio
+    from shortfin_apps.llm.components.tokenizer import TokenizationPool
+
+    pool = TokenizationPool(word_tokenizer, max_workers=1, cache_size=0)
+    texts = [" ".join(["hello", "world", "again"][: i % 3 + 1]) for i in range(32)]
+
+    async def main():
+        results = await asyncio.gather(*[pool.encode([text]) for text in texts])
+        assert [len(encs[0].ids) for encs in results] == [i % 3 + 1 for i in range(32)]
+
+    lsys.run(main())
+    pool.shutdown()
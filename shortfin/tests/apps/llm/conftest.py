@@ -76,9 +76,6 @@ class MockPagePool(PagePool):
             self._queue.put(page)
             self.attn_page_entries.append(page)
 
-        self.available_pages = []
-        for page in self.attn_page_entries:
-            self.available_pages.append(page)
         self.page_tables = []
 
         # Set up a basic page table with shape [num_pages, 16].
@@ -101,11 +98,17 @@ class MockPagePool(PagePool):
             paged_kv_block_size_elements_per_device=[TEST_PAGE_SIZE],
         )
 
+    def available_page_count(self) -> int:
+        return self._queue.qsize()
+
+    def total_page_count(self) -> int:
+        return len(self.attn_page_entries)
+
     def acquire_free_pages(self, count: int) -> List[PageInfo]:
-        try:
-            return [self._queue.get_nowait() for _ in range(count)]
-        except queue.Empty:
+        # Like `PagePool`, take no page unless all are available.
+        if self._queue.qsize() < count:
             return None
+        return [self._queue.get_nowait() for _ in range(count)]
 
     def free_pages(self, pages):
         for page in pages:
@@ -0,0 +1,115 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import asyncio
+import numpy as np
+import pytest
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture(autouse=True)
+def mock_void_future():
+    with patch("shortfin_apps.sd.components.messages.sf.VoidFuture", new=MagicMock):
+        yield
+
+
+def _request(prompt, seed, **kwargs):
+    from shortfin_apps.sd.components.messages import SDXLInferenceExecRequest
+
+    return SDXLInferenceExecRequest(
+        prompt=prompt,
+        neg_prompt="",
+        height=1024,
+        width=1024,
+        steps=20,
+        guidance_scale=7.5,
+        seed=seed,
+        **kwargs,
+    )
+
+
+def test_combine_pads_with_last_request():
+    from shortfin_apps.sd.components.messages import (
+        InferencePhase,
+        SDXLInferenceExecRequest,
+    )
+
+    requests = [_request("a", 1), _request("b", 2), _request("c", 3)]
+    combined = SDXLInferenceExecRequest.combine(requests, batch_size=4)
+
+    assert combined.batch_size == 4
+    assert combined.prompt == ["a", "b", "c", "c"]
+    assert combined.neg_prompt == ["", "", "", ""]
+    assert combined.seed == [1, 2, 3, 3]
+    assert combined.members == requests
+    assert combined.phases[InferencePhase.DENOISE]["metadata"] == (
+        requests[0].phases[InferencePhase.DENOISE]["metadata"]
+    )
+
+
+def test_postprocess_splits_rows():
+    from shortfin_apps.sd.components.messages import SDXLInferenceExecRequest
+    from shortfin_apps.sd.components.service import InferenceExecutorProcess
+
+    requests = [_request("a", 1), _request("b", 2)]
+    combined = SDXLInferenceExecRequest.combine(requests, batch_size=4)
+    # Row i of the padded batch is filled with i / 4.
+    rows = np.arange(4, dtype=np.float32).reshape(4, 1, 1, 1) / 4
+    combined.image_array = np.broadcast_to(rows, (4, 3, 2, 2))
+
+    executor = SimpleNamespace(exec_request=combined)
+    asyncio.run(InferenceExecutorProcess._postprocess(executor, device=None))
+
+    # The padding rows are dropped.
+    assert combined.response_image is None
+    for i, request in enumerate(requests):
+        assert request.response_image.size == (2, 2)
+        assert request.response_image.getpixel((0, 0)) == (64 * i,) * 3
+
+
+def test_flight_boards_oldest_first():
+    from shortfin_apps.sd.components.service import SDXLBatcherProcess
+
+    oldest = _request(["a", "b"], [1, 2])
+    assert not oldest.can_combine
+    newer = [_request("c", 3), _request("d", 4)]
+
+    # A request that cannot be combined is not passed over by newer ones.
+    assert SDXLBatcherProcess.select_flight([oldest, *newer]) == [oldest]
+    assert SDXLBatcherProcess.select_flight(newer) == newer
+
+    combinable = _request("e", 5)
+    assert SDXLBatcherProcess.select_flight([combinable, oldest, *newer]) == [
+        combinable,
+        *newer,
+    ]
+
+
+def test_boarding_deadline_follows_oldest_pending():
+    from shortfin_apps.sd.components import service
+    from shortfin_apps.utils import BoardingPolicy
+
+    batcher = service.SDXLBatcherProcess.__new__(service.SDXLBatcherProcess)
+    batcher.service = SimpleNamespace(idle_meta_fibers=[MagicMock()])
+    batcher.boarding_policy = BoardingPolicy(
+        ideal_batch_size=4, max_delay_s=1.0, adaptive=False
+    )
+    batcher.pending_requests = []
+    batcher._arrivals = {}
+
+    requests = [_request(prompt, i) for i, prompt in enumerate("abc")]
+    for arrival, request in enumerate(requests):
+        with patch.object(service.time, "monotonic", return_value=float(arrival)):
+            batcher.handle_inference_request(request)
+    assert batcher.next_boarding_deadline() == 1.0
+
+    # Once the oldest request boarded, the deadline is that of the next one.
+    with patch.object(service, "InferenceExecutorProcess"):
+        asyncio.run(batcher.board(requests[:1], meta_fiber=None))
+    assert batcher.pending_requests == requests[1:]
+    assert batcher.next_boarding_deadline() == 2.0
@@ -0,0 +1,17 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+
+def test_flight_batch_sizes():
+    from shortfin_apps.sd.components.config_struct import ModelParams
+
+    params = ModelParams(
+        max_seq_len=64,
+        num_latents_channels=4,
+        dims=[[1024, 1024]],
+        batch_sizes={"clip": [1, 2, 4], "unet": [1, 4, 8], "vae": [1]},
+    )
+    assert params.flight_batch_sizes == [1, 4]
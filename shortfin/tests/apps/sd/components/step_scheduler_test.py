@@ -0,0 +1,29 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import asyncio
+
+
+def test_denoise_steps_interleave():
+    from shortfin_apps.sd.components.step_scheduler import DenoiseStepScheduler
+
+    scheduler = DenoiseStepScheduler()
+    order = []
+
+    async def denoise(name, steps):
+        for _ in range(steps):
+            async with scheduler:
+                order.append(name)
+                # Stands in for the invocation of the step.
+                await asyncio.sleep(0)
+
+    async def run():
+        await asyncio.gather(denoise("long", 5), denoise("short", 2))
+
+    asyncio.run(run())
+    assert order == ["long", "short", "long", "short", "long", "long", "long"]
+    assert scheduler.steps == 7
+    assert scheduler.contended_steps == 4
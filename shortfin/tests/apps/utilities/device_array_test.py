@@ -0,0 +1,61 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import gc
+
+import numpy as np
+import pytest
+
+import shortfin.array as sfnp
+
+from shortfin_apps.utils import copy_device_array, read_device_array
+
+SHAPE = [2, 2]
+
+
+def _host_array(device, dtype, values):
+    # Host arrays cannot be filled with bfloat16 items directly, so such
+    # arrays are converted from float32.
+    fill_dtype = sfnp.float32 if dtype == sfnp.bfloat16 else dtype
+    host_array = sfnp.device_array.for_host(device, SHAPE, fill_dtype)
+    with host_array.map(discard=True) as m:
+        m.items = values
+    if fill_dtype != dtype:
+        host_array = sfnp.convert(host_array, dtype=dtype)
+    return host_array
+
+
+@pytest.mark.parametrize(
+    "dtype,values,np_dtype",
+    [
+        (sfnp.float16, [0.5, -1.0, 2.25, 1024.0], np.float16),
+        (sfnp.sint64, [-(2**40), -1, 0, 2**40], np.int64),
+        # NumPy has no bfloat16, so the values are widened to float32.
+        (sfnp.bfloat16, [0.5, -1.0, 2.25, 1024.0], np.float32),
+    ],
+)
+def test_read_device_array(cpu_lsys, cpu_device, dtype, values, np_dtype):
+    results = []
+
+    async def main():
+        src = sfnp.device_array.for_device(cpu_device, SHAPE, dtype)
+        src.copy_from(_host_array(cpu_device, dtype, values))
+        copy = copy_device_array(src, cpu_device)
+        view = await read_device_array(src, cpu_device)
+
+        # Reusing the source buffer leaves the view and the copy untouched.
+        src.copy_from(_host_array(cpu_device, dtype, [0] * len(values)))
+        await cpu_device
+        results.append(view)
+        results.append(await read_device_array(copy, cpu_device))
+
+    cpu_lsys.run(main())
+    # The views keep their host buffers alive on their own.
+    gc.collect()
+    for view in results:
+        assert view.dtype == np_dtype
+        assert view.shape == tuple(SHAPE)
+        assert view.flatten().tolist() == values
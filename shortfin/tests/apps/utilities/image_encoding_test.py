@@ -0,0 +1,84 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+import asyncio
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+def test_to_uint8_images():
+    from shortfin_apps.utilities.image import to_uint8_images
+
+    images = np.array([[[[0.0, 0.5]]], [[[1.2, -0.1]]]], dtype=np.float16)
+    pixels = to_uint8_images(images)
+    assert pixels.shape == (2, 1, 2, 1)
+    assert pixels.flags.c_contiguous
+    assert pixels[..., 0].tolist() == [[[0, 128]], [[255, 0]]]
+
+    pixels = to_uint8_images(np.array([[[[-1.0, 0.0, 1.0]]]]), value_range=(-1, 1))
+    assert pixels[..., 0].tolist() == [[[0, 128, 255]]]
+
+
+@pytest.mark.parametrize(
+    "image_format,compression_level",
+    [("png", None), ("png", 0), ("fast_png", None), ("jpeg", 95), ("webp", None)],
+)
+def test_image_encoding_pool(image_format, compression_level):
+    from shortfin_apps.utilities.image import ImageEncodingPool, ImageFormat
+
+    images = [
+        Image.fromarray(np.full((8, 8, 3), value, dtype=np.uint8)) for value in (0, 255)
+    ]
+    pool = ImageEncodingPool(max_workers=2)
+    try:
+        encoded = asyncio.run(
+            pool.encode(images, ImageFormat(image_format), compression_level)
+        )
+    finally:
+        pool.shutdown()
+
+    for image, each_encoded in zip(images, encoded):
+        decoded = Image.open(BytesIO(each_encoded.as_bytes))
+        assert decoded.size == image.size
+        if image_format in ("png", "fast_png"):
+            assert decoded.format == "PNG"
+            assert np.array_equal(np.asarray(decoded), np.asarray(image))
+
+
+def test_encode_raw_image():
+    from shortfin_apps.utilities.image import ImageFormat, encode_image
+
+    pixels = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+    encoded = encode_image(Image.fromarray(pixels), ImageFormat.RAW)
+    assert encoded.as_bytes == pixels.tobytes()
+
+
+@pytest.mark.parametrize(
+    "image_format,compression_level,valid",
+    [
+        ("png", None, True),
+        ("png", 9, True),
+        ("png", 10, False),
+        ("jpeg", 100, True),
+        ("webp", -1, False),
+        ("raw", None, True),
+        ("raw", 5, False),
+        (None, 100, True),
+        (None, 101, False),
+    ],
+)
+def test_validate_compression_level(image_format, compression_level, valid):
+    from shortfin_apps.utilities.image import ImageFormat, validate_compression_level
+
+    image_format = ImageFormat(image_format) if image_format is not None else None
+    if valid:
+        validate_compression_level(image_format, compression_level)
+    else:
+        with pytest.raises(ValueError):
+            validate_compression_level(image_format, compression_level)
@@ -0,0 +1,54 @@
+# Copyright 2025 Advanced Micro Devices, Inc.
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+from collections import namedtuple
+
+import shortfin.array as sfnp
+
+# Only the dtype and shape of cached arrays are inspected.
+Embedding = namedtuple("Embedding", ["dtype", "shape"])
+
+
+def embeddings(rows: int):
+    # 2 bytes per element, 1 KiB per row.
+    return (Embedding(sfnp.float16, [rows, 512]),)
+
+
+def test_lookup_hits_only_if_all_keys_cached():
+    from shortfin_apps.utilities.prompt_cache import PromptEmbeddingCache
+
+    cache = PromptEmbeddingCache(capacity_bytes=4096)
+    assert cache.get(["neg", "cat"]) is None
+    cache.put("neg", embeddings(1))
+    assert cache.get(["neg", "cat"]) is None
+    cache.put("cat", embeddings(2))
+    assert cache.get(["neg", "cat"]) == [embeddings(1), embeddings(2)]
+
+    stats = cache.get_stats()
+    assert (stats.hits, stats.misses) == (1, 2)
+    assert stats.hit_rate == 1 / 3
+    assert (stats.entries, stats.bytes) == (2, 3072)
+
+
+def test_eviction_is_least_recently_used_and_bounded_in_bytes():
+    from shortfin_apps.utilities.prompt_cache import PromptEmbeddingCache
+
+    cache = PromptEmbeddingCache(capacity_bytes=3072)
+    cache.put("a", embeddings(1))
+    cache.put("b", embeddings(1))
+    cache.put("c", embeddings(1))
+    assert cache.get(["a"]) is not None
+    cache.put("d", embeddings(1))
+
+    assert cache.get(["b"]) is None
+    assert cache.get(["a", "c", "d"]) is not None
+    # Entries larger than the cache are not stored.
+    cache.put("e", embeddings(4))
+    assert cache.get(["e"]) is None
+
+    stats = cache.get_stats()
+    assert stats.evictions == 1
+    assert (stats.entries, stats.bytes) == (3, 3072)